@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# this_file: benchmarks/bench_path.py
+
+"""Microbenchmarks for the py_needs PATH subsystem.
+
+Builds synthetic PATHs in a temporary directory and times the lookup
+functions against them. Every directory holds executables, non-executable
+files and symlinks, plus a set of names shared by all directories so that
+shadowing is exercised.
+
+Usage:
+    python benchmarks/bench_path.py                       # tiny + small
+    python benchmarks/bench_path.py -s medium -s large    # bigger trees
+    python benchmarks/bench_path.py --save                # record baseline
+    python benchmarks/bench_path.py --compare             # fail on regression
+
+Results are written as JSON. `--compare` exits with status 1 when any
+metric's median exceeds the baseline by more than `--threshold` (ratio) and
+by more than `--floor-us` (absolute), so that noise on sub-microsecond
+metrics does not fail the run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from twat_ez import py_needs
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+
+# name -> (directories, entries per directory)
+SCENARIOS: dict[str, tuple[int, int]] = {
+    "tiny": (10, 10),
+    "small": (50, 100),
+    "medium": (200, 1000),
+    "large": (500, 5000),
+}
+DEFAULT_SCENARIOS = ["tiny", "small"]
+
+SHARED_NAMES = 5  # Names present in every directory, to exercise shadowing
+NON_EXECUTABLE_EVERY = 10  # Every n-th entry is a plain, non-executable file
+SYMLINK_EVERY = 10  # Every n-th entry (offset by 5) is a symlink
+
+
+def build_tree(root: Path, n_dirs: int, n_entries: int) -> list[Path]:
+    """Create n_dirs directories with n_entries entries each under root."""
+    dirs = []
+    for d in range(n_dirs):
+        directory = root / f"bin{d:03d}"
+        directory.mkdir()
+        dirs.append(directory)
+        for i in range(n_entries):
+            if i < SHARED_NAMES:
+                name = f"shared{i}"
+            else:
+                name = f"tool{d}_{i}"
+            entry = directory / name
+            if i % SYMLINK_EVERY == 5 and d > 0:  # noqa: PLR2004
+                entry.symlink_to(dirs[0] / "shared0")
+                continue
+            entry.write_bytes(b"#!/bin/sh\n")
+            if i % NON_EXECUTABLE_EVERY != 1:
+                entry.chmod(0o755)
+    return dirs
+
+
+def measure(
+    func: Callable[[], object],
+    *,
+    setup: Callable[[], object] | None = None,
+    repeat: int = 50,
+) -> dict[str, float]:
+    """Time func `repeat` times, running setup (untimed) before each call."""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return {
+        "min_us": round(min(samples), 3),
+        "median_us": round(statistics.median(samples), 3),
+        "repeat": repeat,
+    }
+
+
+def clear_all() -> None:
+    """Reset every py_needs cache that influences PATH lookups."""
+    py_needs.clear_path_cache()
+    py_needs.which.cache_clear()
+    py_needs.clear_executable_index()
+
+
+def run_scenario(name: str, n_dirs: int, n_entries: int, repeat: int) -> dict:
+    """Run all benchmarks for one synthetic PATH layout."""
+    with tempfile.TemporaryDirectory(prefix="twat_ez_bench_") as tmp:
+        dirs = build_tree(Path(tmp), n_dirs, n_entries)
+        last_tool = f"tool{n_dirs - 1}_{n_entries - 1}"
+        target = dirs[-1] / last_tool
+        batch = [d / "shared1" for d in dirs]
+        extra_dir = str(Path(tmp) / "extra")
+        os.mkdir(extra_dir)
+
+        def extra_provider() -> list[str]:
+            return [extra_dir]
+
+        old_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = os.pathsep.join(str(d) for d in dirs)
+        try:
+            clear_all()
+            results = {
+                "build_extended_path": measure(
+                    py_needs.build_extended_path,
+                    setup=py_needs.clear_path_cache,
+                    repeat=repeat,
+                ),
+                "which_cold_last_dir": measure(
+                    lambda: py_needs.which(last_tool),
+                    setup=py_needs.which.cache_clear,
+                    repeat=repeat,
+                ),
+                "which_cold_shadowed": measure(
+                    lambda: py_needs.which("shared1"),
+                    setup=py_needs.which.cache_clear,
+                    repeat=repeat,
+                ),
+                "which_cold_missing": measure(
+                    lambda: py_needs.which("does-not-exist"),
+                    setup=py_needs.which.cache_clear,
+                    repeat=repeat,
+                ),
+                "which_warm": measure(lambda: py_needs.which(last_tool), repeat=repeat),
+                "verify_executable": measure(
+                    lambda: py_needs.verify_executable(target), repeat=repeat
+                ),
+                "verify_executables_batch": measure(
+                    lambda: py_needs.verify_executables(batch), repeat=repeat
+                ),
+                "which_all_shadowed": measure(
+                    lambda: py_needs.which_all("shared1"), repeat=repeat
+                ),
+                "executable_index_cold": measure(
+                    py_needs.executable_index,
+                    setup=py_needs.clear_executable_index,
+                    repeat=repeat,
+                ),
+                "executable_index_rescan_none": measure(
+                    lambda: py_needs.executable_index(refresh=True), repeat=repeat
+                ),
+                "index_prefix_query": measure(
+                    lambda: py_needs.executable_index().prefix("shared"),
+                    repeat=repeat,
+                ),
+                "index_glob_query": measure(
+                    lambda: py_needs.executable_index().glob(f"tool{n_dirs - 1}_*9"),
+                    repeat=repeat,
+                ),
+                "register_provider_incremental": measure(
+                    lambda: py_needs.register_path_provider(extra_provider),
+                    setup=lambda: py_needs.unregister_path_provider(extra_provider),
+                    repeat=repeat,
+                ),
+            }
+            py_needs.unregister_path_provider(extra_provider)
+        finally:
+            os.environ["PATH"] = old_path
+            clear_all()
+    return {"dirs": n_dirs, "entries": n_entries, "metrics": results}
+
+
+def compare(
+    current: dict, baseline: dict, threshold: float, floor_us: float
+) -> list[str]:
+    """Return human-readable regressions of current against baseline."""
+    regressions = []
+    for scenario, data in current["scenarios"].items():
+        base_metrics = baseline.get("scenarios", {}).get(scenario, {}).get("metrics")
+        if not base_metrics:
+            continue
+        for metric, result in data["metrics"].items():
+            if metric not in base_metrics:
+                continue
+            old = base_metrics[metric]["median_us"]
+            new = result["median_us"]
+            if new > old * (1 + threshold) and new - old > floor_us:
+                regressions.append(
+                    f"{scenario}/{metric}: {old:.1f}us -> {new:.1f}us "
+                    f"(x{new / old:.2f})"
+                )
+    return regressions
+
+
+def main() -> int:
+    """Entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run (repeatable). Default: tiny, small",
+    )
+    parser.add_argument("-n", "--repeat", type=int, default=50)
+    parser.add_argument("-o", "--output", type=Path, help="Write results here")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save", action="store_true", help="Overwrite baseline")
+    parser.add_argument("--compare", action="store_true", help="Check baseline")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--floor-us", type=float, default=5.0)
+    args = parser.parse_args()
+
+    if platform.system() == "Windows":
+        sys.stderr.write("Synthetic trees use POSIX modes and symlinks; skipping.\n")
+        return 0
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scenarios": {
+            name: run_scenario(name, *SCENARIOS[name], args.repeat)
+            for name in args.scenario or DEFAULT_SCENARIOS
+        },
+    }
+    text = json.dumps(results, indent=2)
+    sys.stdout.write(text + "\n")
+    if args.output:
+        args.output.write_text(text + "\n")
+
+    status = 0
+    if args.compare:
+        if not args.baseline.exists():
+            sys.stderr.write(f"No baseline at {args.baseline}\n")
+            return 1
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(results, baseline, args.threshold, args.floor_us)
+        for line in regressions:
+            sys.stderr.write(f"REGRESSION {line}\n")
+        status = 1 if regressions else 0
+    if args.save:
+        args.baseline.write_text(text + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
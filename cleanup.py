@@ -51,12 +51,24 @@ Required Files:
 """
 
 import subprocess
+import contextlib
+import fnmatch
+import hashlib
+import io
+import json
 import os
+import re
 import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
 from datetime import datetime, UTC
 from pathlib import Path
-from typing import NoReturn
-from shutil import which
+from typing import IO, NoReturn
+from shutil import copyfileobj
 
 # Configuration
 IGNORE_PATTERNS = [
@@ -70,6 +82,21 @@ IGNORE_PATTERNS = [
 ]
 REQUIRED_FILES = ["LOG.md", ".cursor/rules/0project.mdc", "TODO.md"]
 LOG_FILE = Path("llms.txt")
+MANIFEST_FILE = Path(".cache/cleanup-manifest.json")
+TREE_FILE = Path(".cursor/rules/filetree.mdc")
+REPO_CONTENT_FILE = "REPO_CONTENT.txt"
+# Left out of REPO_CONTENT.txt, in addition to IGNORE_PATTERNS and .gitignore
+BUNDLE_IGNORE_PATTERNS = (
+    ".specstory/**/*.md,.venv/**,_private/**,llms.txt,**/*.json,*.lock"
+)
+# Written by this script, so never inputs of its steps
+GENERATED_FILES = {
+    LOG_FILE.as_posix(),
+    MANIFEST_FILE.as_posix(),
+    TREE_FILE.as_posix(),
+    REPO_CONTENT_FILE,
+}
+_log_lock = threading.Lock()
 
 # Ensure we're working from the script's directory
 os.chdir(Path(__file__).parent)
@@ -103,11 +130,13 @@ def log_message(message: str) -> None:
     """Log a message to file and console with timestamp."""
     timestamp = datetime.now(UTC).strftime("%Y-%m-%d %H:%M:%S")
     log_line = f"{timestamp} - {message}\n"
-    with LOG_FILE.open("a") as f:
+    with _log_lock, LOG_FILE.open("a") as f:
         f.write(log_line)
 
 
-def run_command(cmd: list[str], check: bool = True) -> subprocess.CompletedProcess:
+def run_command(
+    cmd: list[str], *, check: bool = True, log: bool = True
+) -> subprocess.CompletedProcess:
     """Run a shell command and return the result."""
     try:
         result = subprocess.run(
@@ -117,7 +146,7 @@ def run_command(cmd: list[str], check: bool = True) -> subprocess.CompletedProce
             text=True,
             shell=False,  # Explicitly set shell=False for security
         )
-        if result.stdout:
+        if result.stdout and log:
             log_message(result.stdout)
         return result
     except subprocess.CalledProcessError as e:
@@ -128,12 +157,606 @@ def run_command(cmd: list[str], check: bool = True) -> subprocess.CompletedProce
         return subprocess.CompletedProcess(cmd, 1, "", str(e))
 
 
-def check_command_exists(cmd: str) -> bool:
-    """Check if a command exists in the system."""
+@dataclass(frozen=True)
+class Step:
+    """A command in the check graph, started once every step in `after` has finished.
+
+    Attributes:
+        name: Step name, used in `after`, log prefixes and the manifest
+        cmd: Command, without the paths it works on
+        targets: Paths appended to cmd
+        after: Names of steps that must finish first
+        inputs: Glob patterns of the files the step's result depends on;
+            with none, the step always runs
+        scoped: The step can run on just the changed .py files
+        rewrites: The step modifies its inputs (a fixer or formatter)
+
+    """
+
+    name: str
+    cmd: list[str]
+    targets: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+    inputs: tuple[str, ...] = ()
+    scoped: bool = False
+    rewrites: bool = False
+
+    @property
+    def command(self) -> list[str]:
+        return [*self.cmd, *self.targets]
+
+
+@dataclass(frozen=True)
+class StepResult:
+    """Exit status and wall time of one step."""
+
+    name: str
+    returncode: int
+    seconds: float
+
+
+PYTHON_INPUTS = ("src/*.py", "tests/*.py", "src/*.pyi", "pyproject.toml")
+TEST_INPUTS = ("src/*", "tests/*", "pyproject.toml")
+
+# Only the ruff steps rewrite files, so only they (and the tests that should
+# see their result) are ordered; mypy runs alongside the whole chain.
+CHECK_STEPS = [
+    Step(
+        "ruff-fix",
+        ["python", "-m", "ruff", "check", "--fix", "--unsafe-fixes"],
+        targets=("src", "tests"),
+        inputs=PYTHON_INPUTS,
+        scoped=True,
+        rewrites=True,
+    ),
+    Step(
+        "ruff-format",
+        ["python", "-m", "ruff", "format", "--respect-gitignore"],
+        targets=("src", "tests"),
+        after=("ruff-fix",),
+        inputs=PYTHON_INPUTS,
+        scoped=True,
+        rewrites=True,
+    ),
+    Step(
+        "mypy",
+        ["python", "-m", "mypy"],
+        targets=("src", "tests"),
+        inputs=PYTHON_INPUTS,
+    ),
+    Step(
+        "pytest",
+        ["python", "-m", "pytest"],
+        targets=("tests",),
+        after=("ruff-format",),
+        inputs=TEST_INPUTS,
+    ),
+]
+INSTALL_INPUTS = ("pyproject.toml", "uv.lock")
+
+
+def run_step(step: Step) -> StepResult:
+    """Run one step, logging each output line prefixed with the step name."""
+    start = time.perf_counter()
+    try:
+        process = subprocess.Popen(  # noqa: S603 - commands come from CHECK_STEPS
+            step.command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            shell=False,  # Explicitly set shell=False for security
+        )
+    except OSError as e:
+        log_message(f"[{step.name}] Failed to start: {e}")
+        return StepResult(step.name, 127, time.perf_counter() - start)
+    with process:
+        for line in process.stdout or ():
+            log_message(f"[{step.name}] {line.rstrip()}")
+    return StepResult(step.name, process.returncode, time.perf_counter() - start)
+
+
+def run_steps(steps: list[Step], max_workers: int | None = None) -> list[StepResult]:
+    """Run steps concurrently, each as soon as the steps it comes after are done.
+
+    Dependencies only order the steps: a step still runs when one it comes
+    after has failed, as the sequential checks always did.
+
+    Args:
+        steps: Steps to run; names in `after` must refer to other steps
+        max_workers: Maximum number of steps running at once
+
+    Returns:
+        One result per step, in the order given
+
+    """
+    names = {step.name for step in steps}
+    for step in steps:
+        if unknown := set(step.after) - names:
+            msg = f"Step {step.name} comes after unknown steps: {sorted(unknown)}"
+            raise ValueError(msg)
+
+    pending = list(steps)
+    done: dict[str, StepResult] = {}
+    running: dict[Future[StepResult], Step] = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(steps) or 1) as pool:
+        while pending or running:
+            for step in [s for s in pending if all(d in done for d in s.after)]:
+                pending.remove(step)
+                running[pool.submit(run_step, step)] = step
+            if not running:
+                msg = f"Dependency cycle among steps: {[s.name for s in pending]}"
+                raise ValueError(msg)
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                done[running.pop(future).name] = future.result()
+    return [done[step.name] for step in steps]
+
+
+def log_step_times(results: list[StepResult], wall: float) -> None:
+    """Log the wall time of each step and of the whole run."""
+    log_message("Step timings:")
+    for result in results:
+        status = "ok" if result.returncode == 0 else f"exit {result.returncode}"
+        log_message(f"  {result.name:<12} {result.seconds:8.2f}s  {status}")
+    sequential = sum(result.seconds for result in results)
+    log_message(f"  {'total':<12} {wall:8.2f}s  ({sequential:.2f}s if sequential)")
+
+
+def _file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "blake2b").hexdigest()
+
+
+@dataclass
+class Manifest:
+    """Content hashes of the repository's files, and of each step's inputs
+    when that step last succeeded.
+
+    Files are listed with `git ls-files` (tracked plus untracked, minus
+    ignored). A file is re-hashed only when its size or mtime changed, so
+    a run with nothing changed costs one git call and a stat per file.
+    """
+
+    path: Path = MANIFEST_FILE
+    hashes: dict[str, str] = field(default_factory=dict)
+    _stats: dict[str, list[int]] = field(default_factory=dict)
+    _steps: dict[str, dict[str, str]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path = MANIFEST_FILE) -> "Manifest":
+        """Read the manifest, starting empty if it is missing or corrupt."""
+        manifest = cls(path)
+        try:
+            data = json.loads(path.read_text())
+            manifest.hashes = data["hashes"]
+            manifest._stats = data["stats"]
+            manifest._steps = data["steps"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return manifest
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"hashes": self.hashes, "stats": self._stats, "steps": self._steps}
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, sort_keys=True))
+        tmp.replace(self.path)
+
+    def scan(self) -> None:
+        """Update hashes to the current state of the repository."""
+        result = run_command(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            check=False,
+            log=False,
+        )
+        hashes: dict[str, str] = {}
+        stats: dict[str, list[int]] = {}
+        for name in dict.fromkeys(result.stdout.split("\0")):
+            if not name or name in GENERATED_FILES:
+                continue
+            try:
+                st = os.stat(name)
+                stamp = [st.st_size, st.st_mtime_ns]
+                digest = self.hashes.get(name)
+                if digest is None or self._stats.get(name) != stamp:
+                    digest = _file_digest(name)
+            except OSError:  # Deleted but still in the index
+                continue
+            hashes[name], stats[name] = digest, stamp
+        self.hashes, self._stats = hashes, stats
+
+    def inputs(self, patterns: tuple[str, ...]) -> dict[str, str]:
+        """Hashes of the files matching any of the glob patterns."""
+        return {
+            name: digest
+            for name, digest in self.hashes.items()
+            if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+        }
+
+    def is_fresh(self, step: str, inputs: dict[str, str]) -> bool:
+        """Whether step last succeeded on exactly these inputs."""
+        return self._steps.get(step) == inputs
+
+    def changed(self, step: str, inputs: dict[str, str]) -> list[str] | None:
+        """Files added or modified since step last succeeded.
+
+        Returns:
+            The changed files, or None if the step has never succeeded
+
+        """
+        previous = self._steps.get(step)
+        if previous is None:
+            return None
+        return sorted(
+            name for name, digest in inputs.items() if previous.get(name) != digest
+        )
+
+    def record(self, step: str, inputs: dict[str, str]) -> None:
+        """Remember that step succeeded on these inputs."""
+        self._steps[step] = inputs
+
+    def listing(self) -> dict[str, str]:
+        """File names and sizes: what a file tree shows."""
+        return {name: str(self._stats[name][0]) for name in self.hashes}
+
+
+def plan_steps(steps: list[Step], manifest: Manifest) -> list[Step]:
+    """Drop steps whose inputs are unchanged, and scope the rest to changes.
+
+    A scoped step runs on just the changed .py files, unless a non-Python
+    input (pyproject.toml) changed or it has never succeeded. Dependencies on
+    dropped steps are removed.
+    """
+    planned = []
+    for step in steps:
+        inputs = manifest.inputs(step.inputs)
+        if inputs and manifest.is_fresh(step.name, inputs):
+            log_message(f"[{step.name}] Inputs unchanged since last success; skipped")
+            continue
+        changed = manifest.changed(step.name, inputs)
+        if (
+            step.scoped
+            and changed is not None
+            and all(name.endswith((".py", ".pyi")) for name in changed)
+        ):
+            if not changed:  # Only deletions
+                manifest.record(step.name, inputs)
+                continue
+            log_message(f"[{step.name}] Scoped to {len(changed)} changed files")
+            planned.append(replace(step, targets=tuple(changed)))
+            continue
+        planned.append(step)
+    names = {step.name for step in planned}
+    return [
+        replace(step, after=tuple(name for name in step.after if name in names))
+        for step in planned
+    ]
+
+
+def _glob_regex(pattern: str) -> str:
+    """Translate a gitignore glob (without anchoring) to a regex."""
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and (end := pattern.find("]", i + 1)) > i:
+            out.append("[" + pattern[i + 1 : end].replace("!", "^", 1) + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """Patterns in .gitignore syntax, matched against paths relative to base.
+
+    Supports comments, `!` negation, trailing `/` (directories only),
+    anchoring by a leading or inner `/`, and `*`, `?`, `[...]` and `**`.
+    """
+
+    def __init__(self, patterns: list[str], base: str = "") -> None:
+        self.base = base
+        self.rules: list[tuple[re.Pattern[str], bool, bool]] = []
+        for raw in patterns:
+            line = raw.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            line = line.removeprefix("!").removeprefix("\\")
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if "/" in line:
+                regex = _glob_regex(line.lstrip("/"))
+            else:
+                regex = "(?:.*/)?" + _glob_regex(line)
+            self.rules.append((re.compile(regex + r"\Z"), negate, dir_only))
+
+    @classmethod
+    def from_file(cls, path: Path, base: str = "") -> "IgnoreRules | None":
+        """Rules of a .gitignore file, or None if it does not exist."""
+        try:
+            return cls(path.read_text(errors="replace").splitlines(), base)
+        except OSError:
+            return None
+
+    def match(self, path: str, *, is_dir: bool) -> bool | None:
+        """True if ignored, False if re-included, None if no rule applies."""
+        if self.base:
+            if not path.startswith(self.base + "/"):
+                return None
+            path = path[len(self.base) + 1 :]
+        verdict = None
+        for regex, negate, dir_only in self.rules:
+            if (is_dir or not dir_only) and regex.match(path):
+                verdict = not negate
+        return verdict
+
+
+@dataclass(frozen=True)
+class RepoEntry:
+    """A file or directory found by walk_repo()."""
+
+    path: str  # Relative, "/"-separated
+    is_dir: bool
+    size: int
+    last: tuple[bool, ...]  # Per level: is this the last entry among its siblings
+
+
+def _sorted_entries(directory: str) -> list[os.DirEntry[str]]:
+    try:
+        with os.scandir(directory) as it:
+            return sorted(it, key=lambda entry: entry.name)
+    except OSError:
+        return []
+
+
+def _entry_size(entry: os.DirEntry[str]) -> int:
+    try:
+        return entry.stat(follow_symlinks=False).st_size
+    except OSError:
+        return 0
+
+
+def _is_ignored(path: str, chain: list[IgnoreRules], *, is_dir: bool) -> bool:
+    """Apply .gitignore precedence: the deepest rule set with a match wins."""
+    verdict = None
+    for rules in chain:
+        if (match := rules.match(path, is_dir=is_dir)) is not None:
+            verdict = match
+    return bool(verdict)
+
+
+def walk_repo(
+    root: str = ".", ignore_patterns: list[str] = IGNORE_PATTERNS
+) -> Iterator[RepoEntry]:
+    """Yield the repository's files and directories in tree order.
+
+    Uses one os.scandir() per directory. Entries whose name matches
+    ignore_patterns, or that are ignored by a .gitignore (in the directory
+    or any parent within root), are skipped; ignored directories are not
+    entered. Symlinks are listed but never followed.
+    """
+    top = IgnoreRules(ignore_patterns)
+    root_rules = IgnoreRules.from_file(Path(root, ".gitignore"))
+    stack = [root_rules] if root_rules else []
+
+    def walk(directory: str, rel: str, last: tuple[bool, ...]) -> Iterator[RepoEntry]:
+        kept = []
+        for entry in _sorted_entries(directory):
+            path, is_dir = f"{rel}{entry.name}", entry.is_dir(follow_symlinks=False)
+            if not _is_ignored(path, [top, *stack], is_dir=is_dir):
+                kept.append((entry, path, is_dir))
+        for i, (entry, path, is_dir) in enumerate(kept):
+            here = (*last, i == len(kept) - 1)
+            yield RepoEntry(path, is_dir, _entry_size(entry), here)
+            if is_dir:
+                rules = IgnoreRules.from_file(Path(entry.path, ".gitignore"), path)
+                if rules:
+                    stack.append(rules)
+                yield from walk(entry.path, f"{path}/", here)
+                if rules:
+                    stack.pop()
+
+    yield from walk(root, "", ())
+
+
+KIB = 1024
+
+
+def _human_size(size: int) -> str:
+    """Size as `tree -h` prints it: "1023", "1.0K", " 40K"."""
+    value = float(size)
+    for unit in ("", "K", "M", "G", "T"):
+        if value < KIB or unit == "T":
+            break
+        value /= KIB
+    if not unit:
+        return f"{size:4d}"
+    return f"{value:3.1f}{unit}" if value < 10 else f"{value:3.0f}{unit}"
+
+
+BUNDLE_HEADER = """\
+This file is a merged representation of the codebase, containing files not
+matching ignore patterns, combined into a single document by cleanup.py.
+
+================================================================
+File Summary
+================================================================
+
+Notes:
+------
+- Files matching patterns in .gitignore are excluded
+- Files matching these patterns are excluded: {ignored}
+- Binary files are not included
+{processing}
+================================================================
+Directory Structure
+================================================================
+"""
+
+
+def _compress_lines(
+    lines: Iterable[str], *, compress: bool, remove_empty_lines: bool
+) -> Iterator[str]:
+    """Strip trailing whitespace and drop (or collapse runs of) blank lines."""
+    previous_blank = False
+    for raw in lines:
+        line = raw.rstrip() + "\n" if compress else raw
+        if line.strip():
+            previous_blank = False
+        elif remove_empty_lines or (compress and previous_blank):
+            continue
+        else:
+            previous_blank = True
+        yield line
+
+
+def _is_binary(head: bytes) -> bool:
+    return b"\0" in head
+
+
+def _tree_line(entry: RepoEntry) -> str:
+    indent = "".join("    " if last else "│   " for last in entry.last[:-1])
+    branch = "└── " if entry.last[-1] else "├── "
+    name = entry.path.rsplit("/", 1)[-1]
+    return f"{indent}{branch}[{_human_size(entry.size)}]  {name}\n"
+
+
+def _bundle_text(
+    path: str, out: IO[str], *, compress: bool, remove_empty_lines: bool
+) -> bool:
+    """Append one file's section to the bundle; False if binary or unreadable."""
     try:
-        return which(cmd) is not None
-    except Exception:
+        with open(path, "rb") as f:
+            if _is_binary(f.read(8192)):
+                return False
+            f.seek(0)
+            text = io.TextIOWrapper(f, encoding="utf-8", errors="replace")
+            out.write(f"\n{'=' * 16}\nFile: {path}\n{'=' * 16}\n")
+            out.writelines(
+                _compress_lines(
+                    text, compress=compress, remove_empty_lines=remove_empty_lines
+                )
+            )
+    except OSError as e:
+        log_message(f"Skipping {path}: {e}")
         return False
+    return True
+
+
+def _bundle_header(
+    bundle_ignore: str, *, compress: bool, remove_empty_lines: bool
+) -> str:
+    processing = []
+    if remove_empty_lines:
+        processing.append("- Empty lines have been removed from all files\n")
+    elif compress:
+        processing.append("- Runs of empty lines have been collapsed\n")
+    if compress:
+        processing.append("- Trailing whitespace has been removed\n")
+    return BUNDLE_HEADER.format(
+        ignored=", ".join(bundle_ignore.split(",")), processing="".join(processing)
+    )
+
+
+def _write_bundle(
+    bundle_file: Path, header: str, structure: list[str], contents: IO[str]
+) -> None:
+    bundle_tmp = bundle_file.with_name(bundle_file.name + ".tmp")
+    with bundle_tmp.open("w", encoding="utf-8") as bundle:
+        bundle.write(header)
+        bundle.writelines(structure)
+        bundle.write(f"\n{'=' * 64}\nFiles\n{'=' * 64}\n")
+        contents.seek(0)
+        copyfileobj(contents, bundle)
+        bundle.write(f"\n{'=' * 64}\nEnd of Codebase\n{'=' * 64}\n")
+    bundle_tmp.replace(bundle_file)
+
+
+def snapshot_repo(
+    *,
+    tree_file: Path | None = TREE_FILE,
+    bundle_file: Path | None = Path(REPO_CONTENT_FILE),
+    compress: bool = True,
+    remove_empty_lines: bool = True,
+    bundle_ignore: str = BUNDLE_IGNORE_PATTERNS,
+) -> None:
+    """Write the file tree and the repository bundle from a single walk.
+
+    Both files are streamed to temporary files and moved into place when
+    complete. The bundle's file contents are spooled while the directory
+    structure (which precedes them) is collected, so no file is ever held
+    in memory whole. Files this script writes (GENERATED_FILES and the two
+    outputs) appear in neither.
+
+    Args:
+        tree_file: Where to write the `tree`-style listing, or None
+        bundle_file: Where to write the bundle of file contents, or None
+        compress: Strip trailing whitespace and collapse runs of blank lines
+        remove_empty_lines: Drop blank lines entirely
+        bundle_ignore: Comma-separated glob patterns left out of the bundle
+
+    """
+    skip = IgnoreRules([p.strip() for p in bundle_ignore.split(",") if p.strip()])
+    outputs = {p.as_posix() for p in (tree_file, bundle_file) if p} | GENERATED_FILES
+    # Outputs, and their .tmp files being written during the walk, are pruned:
+    # the tree must show the same files as Manifest.listing(), its freshness
+    # input, and the outputs' sizes change on every run
+    generated = [f"/{path}{tmp}" for path in sorted(outputs) for tmp in ("", ".tmp")]
+    structure: list[str] = []
+    counts = {"dirs": 0, "files": 0}
+    with contextlib.ExitStack() as stack:
+        tree = contents = None
+        if tree_file:
+            tree_file.parent.mkdir(parents=True, exist_ok=True)
+            tree_tmp = tree_file.with_name(tree_file.name + ".tmp")
+            tree = stack.enter_context(tree_tmp.open("w", encoding="utf-8"))
+            tree.write("---\ndescription: File tree of the project\nglobs: \n---\n")
+            tree.write(f"[{_human_size(os.stat('.').st_size)}]  .\n")
+        if bundle_file:
+            contents = stack.enter_context(
+                tempfile.TemporaryFile("w+", encoding="utf-8")
+            )
+
+        for entry in walk_repo(
+            ignore_patterns=[*IGNORE_PATTERNS, "*_cache", *generated]
+        ):
+            counts["dirs" if entry.is_dir else "files"] += 1
+            if tree:
+                tree.write(_tree_line(entry))
+            if not contents or skip.match(entry.path, is_dir=entry.is_dir):
+                continue
+            name = entry.path.rsplit("/", 1)[-1] + ("/" if entry.is_dir else "")
+            if entry.is_dir or _bundle_text(
+                entry.path,
+                contents,
+                compress=compress,
+                remove_empty_lines=remove_empty_lines,
+            ):
+                structure.append(f"{'  ' * (len(entry.last) - 1)}{name}\n")
+
+        if tree and tree_file:
+            tree.write(f"\n{counts['dirs']} directories, {counts['files']} files\n")
+            tree.close()
+            tree_tmp.replace(tree_file)
+        if contents and bundle_file:
+            header = _bundle_header(
+                bundle_ignore, compress=compress, remove_empty_lines=remove_empty_lines
+            )
+            _write_bundle(bundle_file, header, structure, contents)
 
 
 class Cleanup:
@@ -141,6 +764,7 @@ class Cleanup:
 
     def __init__(self) -> None:
         self.workspace = Path.cwd()
+        self.manifest = Manifest.load()
 
     def _print_header(self, message: str) -> None:
         """Print a section header."""
@@ -156,43 +780,52 @@ class Cleanup:
         return not missing
 
     def _generate_tree(self) -> None:
-        """Generate and display tree structure of the project."""
-        if not check_command_exists("tree"):
-            log_message("Warning: 'tree' command not found. Skipping tree generation.")
+        """Generate and display tree structure of the project.
+
+        The walk that writes the tree also refreshes REPO_CONTENT.txt if
+        that is stale, so main() does not walk the repository again.
+        """
+        listing = self.manifest.listing()
+        if listing and TREE_FILE.exists() and self.manifest.is_fresh("tree", listing):
+            log_message("\nProject structure (unchanged):")
+            log_message(TREE_FILE.read_text().split("---\n", 2)[-1])
             return
 
         try:
-            # Create/overwrite the file with YAML frontmatter
-            rules_dir = Path(".cursor/rules")
-            rules_dir.mkdir(parents=True, exist_ok=True)
-            # Get tree output
-            tree_result = run_command(
-                ["tree", "-a", "-I", ".git", "--gitignore", "-n", "-h", "-I", "*_cache"]
+            inputs = _bundle_inputs(self.manifest)
+            bundle_fresh = (
+                bool(inputs)
+                and Path(REPO_CONTENT_FILE).exists()
+                and self.manifest.is_fresh("repomix", inputs)
             )
-            tree_text = tree_result.stdout
-            # Write frontmatter and tree output to file
-            with open(rules_dir / "filetree.mdc", "w") as f:
-                f.write("---\ndescription: File tree of the project\nglobs: \n---\n")
-                f.write(tree_text)
+            snapshot_repo(bundle_file=None if bundle_fresh else Path(REPO_CONTENT_FILE))
+            self.manifest.record("tree", listing)
+            if inputs and not bundle_fresh:
+                self.manifest.record("repomix", inputs)
 
             # Log the contents
             log_message("\nProject structure:")
-            log_message(tree_text)
+            log_message(TREE_FILE.read_text().split("---\n", 2)[-1])
 
         except Exception as e:
             log_message(f"Failed to generate tree: {e}")
-        return
 
     def _git_status(self) -> bool:
         """Check git status and return True if there are changes."""
         result = run_command(["git", "status", "--porcelain"], check=False)
         return bool(result.stdout.strip())
 
-    def _venv(self) -> None:
-        """Create and activate virtual environment using uv."""
+    def _venv(self, *, reuse: bool = False) -> None:
+        """Create and activate virtual environment using uv.
+
+        Args:
+            reuse: Only activate an existing .venv instead of recreating it
+
+        """
         log_message("Setting up virtual environment")
         try:
-            run_command(["uv", "venv"])
+            if not (reuse and (self.workspace / ".venv").is_dir()):
+                run_command(["uv", "venv"])
             # Activate the virtual environment
             venv_path = self.workspace / ".venv" / "bin" / "activate"
             if venv_path.exists():
@@ -206,57 +839,49 @@ class Cleanup:
         except Exception as e:
             log_message(f"Failed to create virtual environment: {e}")
 
-    def _install(self) -> None:
-        """Install package in development mode with all extras."""
+    def _install(self, *, incremental: bool = False) -> None:
+        """Install package in development mode with all extras.
+
+        Args:
+            incremental: Reuse the existing .venv, and skip the install if
+                pyproject.toml and uv.lock are unchanged since the last one
+
+        """
+        inputs = self.manifest.inputs(INSTALL_INPUTS)
+        fresh = bool(inputs) and self.manifest.is_fresh("install", inputs)
+        if incremental and fresh and (self.workspace / ".venv").is_dir():
+            log_message("Dependencies unchanged since last install; skipped")
+            return
         log_message("Installing package with all extras")
         try:
-            self._venv()
+            self._venv(reuse=incremental)
             run_command(["uv", "pip", "install", "-e", ".[test,dev]"])
+            self.manifest.record("install", inputs)
             log_message("Package installed successfully")
         except Exception as e:
             log_message(f"Failed to install package: {e}")
 
     def _run_checks(self) -> None:
-        """Run code quality checks using ruff and pytest."""
+        """Run code quality checks (ruff, mypy, pytest) as a dependency graph."""
         log_message("Running code quality checks")
 
         try:
-            # Run ruff checks
-            log_message(">>> Running code fixes...")
-            run_command(
-                [
-                    "python",
-                    "-m",
-                    "ruff",
-                    "check",
-                    "--fix",
-                    "--unsafe-fixes",
-                    "src",
-                    "tests",
-                ],
-                check=False,
-            )
-            run_command(
-                [
-                    "python",
-                    "-m",
-                    "ruff",
-                    "format",
-                    "--respect-gitignore",
-                    "src",
-                    "tests",
-                ],
-                check=False,
-            )
-
-            # Run type checks
-            log_message(">>>Running type checks...")
-            run_command(["python", "-m", "mypy", "src", "tests"], check=False)
-
-            # Run tests
-            log_message(">>> Running tests...")
-            run_command(["python", "-m", "pytest", "tests"], check=False)
-
+            steps = plan_steps(CHECK_STEPS, self.manifest)
+            before = {step.name: self.manifest.inputs(step.inputs) for step in steps}
+            start = time.perf_counter()
+            results = run_steps(steps)
+            log_step_times(results, time.perf_counter() - start)
+
+            # Fixers are recorded with what they left behind; other steps with
+            # what they were given, so they rerun if a fixer changed it
+            self.manifest.scan()
+            for step, result in zip(steps, results, strict=True):
+                if result.returncode == 0:
+                    after = self.manifest.inputs(step.inputs)
+                    self.manifest.record(
+                        step.name, after if step.rewrites else before[step.name]
+                    )
+            self.manifest.save()
             log_message("All checks completed")
         except Exception as e:
             log_message(f"Failed during checks: {e}")
@@ -265,6 +890,7 @@ class Cleanup:
         """Show current repository status: tree structure, git status, and run checks."""
         prefix()  # Add README.md content at start
         self._print_header("Current Status")
+        self.manifest.scan()
 
         # Check required files
         self._check_required_files()
@@ -278,8 +904,8 @@ class Cleanup:
 
         # Run additional checks
         self._print_header("Environment Status")
-        self._venv()
-        self._install()
+        self._venv(reuse=True)
+        self._install(incremental=True)
         self._run_checks()
 
         suffix()  # Add TODO.md content at end
@@ -324,36 +950,59 @@ class Cleanup:
             log_message(f"Failed to push changes: {e}")
 
 
+def _bundle_inputs(
+    manifest: Manifest | None,
+    options: tuple[object, ...] = (
+        True,
+        True,
+        BUNDLE_IGNORE_PATTERNS,
+        REPO_CONTENT_FILE,
+    ),
+) -> dict[str, str]:
+    """Inputs of the bundle step: every file's hash plus the bundle options."""
+    if manifest is None or not manifest.hashes:
+        return {}
+    return {**manifest.hashes, "<options>": json.dumps(options)}
+
+
 def repomix(
     *,
     compress: bool = True,
     remove_empty_lines: bool = True,
-    ignore_patterns: str = ".specstory/**/*.md,.venv/**,_private/**,llms.txt,**/*.json,*.lock",
-    output_file: str = "REPO_CONTENT.txt",
+    ignore_patterns: str = BUNDLE_IGNORE_PATTERNS,
+    output_file: str = REPO_CONTENT_FILE,
+    manifest: Manifest | None = None,
 ) -> None:
     """Combine repository files into a single text file.
 
+    Written in-process by snapshot_repo(), in the layout of the repomix tool
+    this used to shell out to.
+
     Args:
-        compress: Whether to compress whitespace in output
+        compress: Strip trailing whitespace and collapse runs of empty lines
         remove_empty_lines: Whether to remove empty lines
         ignore_patterns: Comma-separated glob patterns of files to ignore
         output_file: Output file path
+        manifest: Skip the run if no file and no option changed since the
+            last successful one
 
     """
+    options = (compress, remove_empty_lines, ignore_patterns, output_file)
+    inputs = _bundle_inputs(manifest, options)
+    fresh = manifest and inputs and manifest.is_fresh("repomix", inputs)
+    if fresh and Path(output_file).exists():
+        log_message(f"Repository unchanged; {output_file} is up to date")
+        return
     try:
-        # Build command
-        cmd = ["repomix"]
-        if compress:
-            cmd.append("--compress")
-        if remove_empty_lines:
-            cmd.append("--remove-empty-lines")
-        if ignore_patterns:
-            cmd.append("-i")
-            cmd.append(ignore_patterns)
-        cmd.extend(["-o", output_file])
-
-        # Run repomix
-        run_command(cmd)
+        snapshot_repo(
+            tree_file=None,
+            bundle_file=Path(output_file),
+            compress=compress,
+            remove_empty_lines=remove_empty_lines,
+            bundle_ignore=ignore_patterns,
+        )
+        if manifest and inputs:
+            manifest.record("repomix", inputs)
         log_message(f"Repository content mixed into {output_file}")
 
     except Exception as e:
@@ -396,7 +1045,9 @@ def main() -> NoReturn:
             print_usage()
     except Exception as e:
         log_message(f"Error: {e}")
-    repomix()
+    cleanup.manifest.scan()
+    repomix(manifest=cleanup.manifest)
+    cleanup.manifest.save()
     sys.stdout.write(Path("llms.txt").read_text())
     sys.exit(0)  # Ensure we exit with a status code
 
@@ -1,5 +1,12 @@
 """twat ez plugin"""
 
-from importlib import metadata
 
-__version__ = metadata.version(__name__)
+def __getattr__(name: str) -> str:
+    # Resolved on first access: importlib.metadata takes longer to import than
+    # a whole `python -m twat_ez which` run
+    if name == "__version__":
+        from importlib import metadata  # noqa: PLC0415
+
+        return metadata.version(__name__)
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
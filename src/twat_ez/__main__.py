@@ -0,0 +1,10 @@
+# this_file: src/twat_ez/__main__.py
+
+"""Run the twat-ez command-line interface: `python -m twat_ez`."""
+
+import sys
+
+from twat_ez.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
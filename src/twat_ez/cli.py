@@ -0,0 +1,225 @@
+# this_file: src/twat_ez/cli.py
+
+"""
+Command-line interface: `python -m twat_ez <command>` or `twat-ez <command>`.
+
+Only argparse is imported up front. twat_ez.py_needs is imported by the
+command that runs, so `--help` costs little more than starting Python, and
+no command needs fire or pydantic.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from typing import TYPE_CHECKING, cast
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from types import ModuleType
+
+    from twat_ez.py_needs import CacheStats
+
+
+def _py_needs() -> ModuleType:
+    from twat_ez import py_needs  # noqa: PLC0415
+
+    return py_needs
+
+
+def _out(line: object) -> None:
+    sys.stdout.write(f"{line}\n")
+
+
+def _err(line: object) -> None:
+    sys.stderr.write(f"{line}\n")
+
+
+def _which(args: argparse.Namespace) -> int:
+    found = _py_needs().which(
+        args.name, verify=not args.no_verify, min_version=args.min_version
+    )
+    if found is None:
+        _err(f"{args.name}: not found")
+        return 1
+    _out(found)
+    return 0
+
+
+def _which_all(args: argparse.Namespace) -> int:
+    matches = _py_needs().which_all(args.name)
+    for match in matches:
+        _out(match.path if match.safe else f"{match.path}  # rejected: {match.reason}")
+    if not matches:
+        _err(f"{args.name}: not found")
+    return 0 if any(match.safe for match in matches) else 1
+
+
+def _download(args: argparse.Namespace) -> int:
+    try:
+        data = _py_needs().download_url(args.url, mode=0)
+    except RuntimeError as e:  # Raised with a "Download failed: ..." message
+        _err(e)
+        return 1
+    except (OSError, ValueError) as e:
+        _err(f"Download failed: {e}")
+        return 1
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(data)
+    else:
+        sys.stdout.buffer.write(data)
+    return 0
+
+
+def _install(args: argparse.Namespace) -> int:
+    py_needs = _py_needs()
+    try:
+        py_needs.needs(args.modules, target=args.target)(lambda: None)()
+    except RuntimeError as e:
+        _err(e)
+        return 1
+    return 0
+
+
+def _format_stats(stats: list[CacheStats]) -> list[str]:
+    def show(value: object) -> str:
+        return "-" if value is None else str(value)
+
+    lines = [
+        (
+            f"{'cache':<22} {'entries':>8} {'bytes':>10} {'hits':>7} {'misses':>7} "
+            f"{'hit rate':>8} {'maxsize':>7}"
+        )
+    ]
+    for s in stats:
+        rate = "-" if s.hit_rate is None else f"{s.hit_rate:.0%}"
+        lines.append(
+            f"{s.name:<22} {s.entries:>8} {s.bytes:>10} {show(s.hits):>7} "
+            f"{show(s.misses):>7} {rate:>8} {show(s.maxsize):>7}"
+        )
+    return lines
+
+
+def _cache(args: argparse.Namespace) -> int:
+    py_needs = _py_needs()
+    names = args.names or None
+    try:
+        if args.action == "clear":
+            cleared = py_needs.clear_caches(names)
+            _out(f"Cleared {len(cleared)} caches: {', '.join(cleared)}")
+        elif args.action == "warm":
+            for name, seconds in py_needs.warm_caches(names).items():
+                _out(f"{name:<22} {seconds * 1000:8.1f} ms")
+        elif args.action == "export":
+            text = py_needs.export_caches(names)
+            if args.output:
+                with open(args.output, "w", encoding="utf-8") as f:
+                    f.write(text + "\n")
+            else:
+                _out(text)
+        else:
+            for line in _format_stats(py_needs.cache_stats(names)):
+                _out(line)
+    except KeyError as e:
+        _err(e.args[0])
+        return 2
+    return 0
+
+
+def _add_which(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("name", help="Executable to look for")
+    parser.add_argument("--min-version", help="Skip matches older than this, e.g. 2.40")
+    parser.add_argument(
+        "--no-verify", action="store_true", help="Skip the security checks"
+    )
+
+
+def _add_which_all(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("name", help="Executable to look for")
+
+
+def _add_download(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("url")
+    parser.add_argument("-o", "--output", help="Write here instead of stdout")
+
+
+def _add_install(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("modules", nargs="+", help="Modules to make importable")
+    parser.add_argument(
+        "--target",
+        action="store_true",
+        help="Install into UV_INSTALL_TARGET instead of this environment",
+    )
+
+
+def _add_cache(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "action",
+        choices=["info", "clear", "warm", "export"],
+        nargs="?",
+        default="info",
+        help="info (default): statistics; export: statistics as JSON",
+    )
+    parser.add_argument("names", nargs="*", help="Caches to act on (default: all)")
+    parser.add_argument("-o", "--output", help="export: write here instead of stdout")
+
+
+# name -> (help, add arguments, run)
+COMMANDS: dict[
+    str,
+    tuple[
+        str,
+        Callable[[argparse.ArgumentParser], None],
+        Callable[[argparse.Namespace], int],
+    ],
+] = {
+    "which": ("Locate an executable on the extended PATH", _add_which, _which),
+    "which-all": (
+        "List every match, including shadowed ones",
+        _add_which_all,
+        _which_all,
+    ),
+    "download": ("Download a URL", _add_download, _download),
+    "install": ("Install missing Python modules with uv", _add_install, _install),
+    "cache": ("Inspect, clear, warm or export twat-ez caches", _add_cache, _cache),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """The argument parser for all commands."""
+    parser = argparse.ArgumentParser(
+        prog="twat-ez", description="Easy utilities for the twat ecosystem"
+    )
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Log debug messages"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, (help_text, add_arguments, run) in COMMANDS.items():
+        command = commands.add_parser(name, help=help_text, description=help_text)
+        add_arguments(command)
+        command.set_defaults(run=run)
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """
+    Run a command.
+
+    Args:
+        argv: Arguments, without the program name; defaults to sys.argv[1:]
+
+    Returns:
+        int: Exit status
+    """
+    args = build_parser().parse_args(argv)
+    # Before py_needs is imported; stdout may carry command output
+    import logging  # noqa: PLC0415
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format="%(levelname)s: %(message)s",
+        stream=sys.stderr,
+    )
+    run = cast("Callable[[argparse.Namespace], int]", args.run)
+    return run(args)
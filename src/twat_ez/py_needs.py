@@ -7,24 +7,54 @@
 # this_file: py_needs.py
 
 """
-A focused module that provides QtNetwork-based download functionality with
-a synchronous Python interface. Handles HTTP redirects automatically.
+Find executables and install missing Python dependencies on demand.
+
+The @needs decorator installs modules that cannot be imported with uv,
+into the running environment or into the site-packages of an embedding
+application such as FontLab, Glyphs or Blender. Supporting it:
+
+- An extended PATH built from XDG, system and registered provider
+  directories, searched by which() with an executable trust policy and
+  an index of executables
+- uv and pip resolution, a standalone uv bootstrap and a cross-process
+  install lock
+- Synchronous HTTP downloads through QtNetwork when available, else urllib
+- A registry of the module's caches, with statistics, clearing and warming
 """
 
 from __future__ import annotations
 
+import contextlib
+import fnmatch
+import hashlib
 import importlib
 import importlib.util
+import inspect
+import itertools
+import json
 import logging
 import os
 import platform
-import shutil
+import re
 import site
+import stat
 import subprocess
 import sys
-from collections.abc import Callable
-from functools import lru_cache, wraps
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque, namedtuple
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache, partial, update_wrapper, wraps
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Generic, NamedTuple, TypeVar, cast
+
+if TYPE_CHECKING:
+    import asyncio
 
 ###############################
 ## PATH PROVIDERS & ENVIRONMENT FUNCTIONS
@@ -40,67 +70,916 @@ Functions related to system path management including:
 # Type for path provider functions
 PathProvider = Callable[[], list[str]]
 
-# Registry for custom path providers
-_path_providers: list[PathProvider] = []
+# Registry for custom path providers, kept sorted by (-priority, registration)
+_path_providers: list[_ProviderEntry] = []
 
-# Configure basic logging
-logging.basicConfig(
-    level=logging.DEBUG, format="%(levelname)s: %(message)s", stream=sys.stdout
-)
+
+###############################
+## INSTRUMENTATION
+###############################
+"""
+Timing hooks for py_needs operations:
+- Hook registry, free when nothing is subscribed
+- Recorder with JSON and Chrome trace export
+"""
+
+
+@dataclass(frozen=True)
+class TimingEvent:
+    """A single timed py_needs operation."""
+
+    name: str
+    target: str | None  # First string argument, e.g. the command or URL
+    start: float  # time.perf_counter() at entry
+    duration: float  # Seconds
+    cache: str | None  # "hit", "miss", or None for uncached operations
+    outcome: str  # "ok", "none", or "error:<ExceptionType>"
+    thread: int
+
+
+# Type for timing hooks
+TimingHook = Callable[[TimingEvent], None]
+
+# Registry for timing hooks; instrumented calls skip all bookkeeping when empty
+_timing_hooks: list[TimingHook] = []
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+_R = TypeVar("_R")
+
+
+def add_timing_hook(hook: TimingHook) -> None:
+    """Subscribe a callable to receive a TimingEvent per instrumented call."""
+    _timing_hooks.append(hook)
+
+
+def remove_timing_hook(hook: TimingHook) -> None:
+    """Unsubscribe a timing hook. Unknown hooks are ignored."""
+    with contextlib.suppress(ValueError):
+        _timing_hooks.remove(hook)
+
+
+def _emit_timing(
+    name: str,
+    start: float,
+    *,
+    target: str | None = None,
+    cache: str | None = None,
+    outcome: str = "ok",
+) -> None:
+    """Deliver a TimingEvent to every hook. Hook errors never propagate."""
+    event = TimingEvent(
+        name=name,
+        target=target,
+        start=start,
+        duration=time.perf_counter() - start,
+        cache=cache,
+        outcome=outcome,
+        thread=threading.get_ident(),
+    )
+    for hook in tuple(_timing_hooks):
+        try:
+            hook(event)
+        except Exception as e:
+            logging.debug(f"Timing hook {hook!r} failed: {e!s}")
+
+
+def _timed(name: str) -> Callable[[_F], _F]:
+    """
+    Instrument a function so that it reports TimingEvents.
+
+    When applied on top of a cache (functools.lru_cache or _LookupCache),
+    hits are detected from cache_info() and the cache methods remain
+    reachable through the wrapper.
+    """
+
+    def decorator(func: _F) -> _F:
+        cache_info = getattr(func, "cache_info", None)
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _timing_hooks:
+                return func(*args, **kwargs)
+            hits = cache_info().hits if cache_info else 0
+            target = args[0] if args and isinstance(args[0], str) else None
+            start = time.perf_counter()
+            outcome = "ok"
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                outcome = f"error:{type(e).__name__}"
+                raise
+            else:
+                if result is None:
+                    outcome = "none"
+                return result
+            finally:
+                cache = None
+                if cache_info:
+                    cache = "hit" if cache_info().hits > hits else "miss"
+                _emit_timing(name, start, target=target, cache=cache, outcome=outcome)
+
+        # Keep the cache management interface reachable through the wrapper
+        for attr in ("cache_info", "cache_clear", "cache_bytes", "invalidate"):
+            if hasattr(func, attr):
+                setattr(wrapper, attr, getattr(func, attr))
+        return cast(_F, wrapper)
+
+    return decorator
+
+
+class TimingRecorder:
+    """
+    Collects TimingEvents while subscribed.
+
+    Use as a context manager to subscribe for the duration of a block:
+
+        with py_needs.TimingRecorder() as recorder:
+            py_needs.which("uv")
+        print(recorder.to_json())
+    """
+
+    def __init__(self) -> None:
+        self.events: list[TimingEvent] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, event: TimingEvent) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    def __enter__(self) -> TimingRecorder:
+        add_timing_hook(self)
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        remove_timing_hook(self)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Aggregate count, total seconds, hits and misses per operation."""
+        totals: dict[str, dict[str, float]] = {}
+        for event in self.events:
+            entry = totals.setdefault(
+                event.name, {"count": 0, "total": 0.0, "hits": 0, "misses": 0}
+            )
+            entry["count"] += 1
+            entry["total"] += event.duration
+            if event.cache == "hit":
+                entry["hits"] += 1
+            elif event.cache == "miss":
+                entry["misses"] += 1
+        return totals
+
+    def to_json(self) -> str:
+        """Serialize recorded events as a JSON list."""
+        return json.dumps([asdict(event) for event in self.events], indent=2)
+
+    def to_chrome_trace(self) -> str:
+        """Serialize recorded events in Chrome trace format (chrome://tracing)."""
+        origin = min((event.start for event in self.events), default=0.0)
+        pid = os.getpid()
+        trace = [
+            {
+                "name": event.name,
+                "cat": "py_needs",
+                "ph": "X",
+                "ts": (event.start - origin) * 1e6,
+                "dur": event.duration * 1e6,
+                "pid": pid,
+                "tid": event.thread,
+                "args": {
+                    "target": event.target,
+                    "cache": event.cache,
+                    "outcome": event.outcome,
+                },
+            }
+            for event in self.events
+        ]
+        return json.dumps({"traceEvents": trace, "displayTimeUnit": "ms"})
+
+
+###############################
+## CACHING PRIMITIVES
+###############################
+_CacheInfo = namedtuple("_CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class _LookupCache(Generic[_R]):
+    """
+    LRU memo with the functools.lru_cache interface plus selective eviction.
+
+    invalidate() drops only the entries a predicate marks as stale, so a
+    PATH change can keep results it cannot have affected. revalidate, if
+    given, is called with each call's arguments before the lookup, so that
+    it can invalidate entries the call would otherwise hit.
+    """
+
+    def __init__(
+        self,
+        func: Callable[..., _R],
+        maxsize: int,
+        revalidate: Callable[[tuple, dict[str, Any]], None] | None = None,
+    ) -> None:
+        update_wrapper(self, func)
+        self._func = func
+        self._maxsize = maxsize
+        self._revalidate = revalidate
+        self._data: OrderedDict[Any, tuple[tuple, dict[str, Any], _R]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.RLock()
+
+    def __call__(self, *args: Any, **kwargs: Any) -> _R:
+        if self._revalidate is not None:
+            self._revalidate(args, kwargs)
+        key = (args, tuple(sorted(kwargs.items())))
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return self._data[key][2]
+            self._misses += 1
+        result = self._func(*args, **kwargs)
+        with self._lock:
+            self._data[key] = (args, kwargs, result)
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+        return result
+
+    def cache_info(self) -> _CacheInfo:
+        """Report hits, misses, maxsize and current size like lru_cache."""
+        with self._lock:
+            return _CacheInfo(self._hits, self._misses, self._maxsize, len(self._data))
+
+    def cache_clear(self) -> None:
+        """Drop all entries and reset statistics."""
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = 0
+
+    def cache_bytes(self) -> int:
+        """Approximate memory held by the cached arguments and results."""
+        with self._lock:
+            entries = list(self._data.values())
+        return sum(
+            _approx_size(args) + _approx_size(result) for args, _, result in entries
+        )
+
+    def invalidate(self, stale: Callable[[tuple, dict[str, Any], _R], bool]) -> int:
+        """
+        Drop entries for which stale(args, kwargs, result) is true.
+
+        Returns:
+            int: Number of entries dropped
+        """
+        with self._lock:
+            keys = [key for key, entry in self._data.items() if stale(*entry)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+
+def _lookup_cache(
+    maxsize: int,
+    *,
+    revalidate: Callable[[tuple, dict[str, Any]], None] | None = None,
+) -> Callable[[Callable[..., _R]], _LookupCache[_R]]:
+    """Decorator form of _LookupCache, used like functools.lru_cache."""
+
+    def decorator(func: Callable[..., _R]) -> _LookupCache[_R]:
+        return _LookupCache(func, maxsize, revalidate)
+
+    return decorator
+
+
+def _is_miss(_args: tuple, _kwargs: dict[str, Any], result: object) -> bool:
+    """_LookupCache.invalidate() predicate selecting cached "not found" results."""
+    return result is None
+
+
+def _approx_size(value: Any) -> int:
+    """sys.getsizeof() of value and of the items it directly holds."""
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple | list | set | frozenset):
+        size += sum(sys.getsizeof(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    elif isinstance(value, Path):
+        size += sys.getsizeof(str(value))
+    return size
+
+
+####################################
+## CACHE REGISTRY
+####################################
+@dataclass(frozen=True)
+class CacheStats:
+    """
+    A snapshot of one registered cache.
+
+    hits and misses are None for caches that do not count them, and bytes
+    is an estimate: the sizes of cached objects and their direct items.
+    """
+
+    name: str
+    entries: int
+    bytes: int
+    hits: int | None = None
+    misses: int | None = None
+    maxsize: int | None = None
+
+    @property
+    def hit_rate(self) -> float | None:
+        if self.hits is None or self.misses is None or not self.hits + self.misses:
+            return None
+        return self.hits / (self.hits + self.misses)
+
+
+@dataclass(frozen=True)
+class _RegisteredCache:
+    stats: Callable[[], CacheStats]
+    clear: Callable[[], object]
+    warm: Callable[[], object] | None
+
+
+_cache_registry: dict[str, _RegisteredCache] = {}
+
+
+def register_cache(
+    name: str,
+    cache: Any = None,
+    *,
+    stats: Callable[[], CacheStats] | None = None,
+    clear: Callable[[], object] | None = None,
+    warm: Callable[[], object] | None = None,
+) -> None:
+    """
+    Make a cache visible to cache_stats(), clear_caches(), warm_caches()
+    and export_caches().
+
+    Args:
+        name: Unique name; registering a name again replaces the entry
+        cache: An object with the lru_cache interface (cache_info() and
+            cache_clear(), plus cache_bytes() if it can report its size);
+            it supplies stats and clear
+        stats: Snapshot function, for caches of another shape
+        clear: Clear function, for caches of another shape
+        warm: Fills the cache ahead of first use
+
+    Raises:
+        ValueError: If neither cache nor both stats and clear are given
+    """
+    if cache is not None:
+        stats = stats or (lambda: _lru_stats(name, cache))
+        clear = clear or cache.cache_clear
+    if stats is None or clear is None:
+        msg = f"Cache {name!r} needs either cache or both stats and clear"
+        raise ValueError(msg)
+    _cache_registry[name] = _RegisteredCache(stats, clear, warm)
+
+
+def unregister_cache(name: str) -> bool:
+    """Remove a cache from the registry. Returns False if it was not registered."""
+    return _cache_registry.pop(name, None) is not None
+
+
+def _lru_stats(name: str, cache: Any) -> CacheStats:
+    info = cache.cache_info()
+    size = cache.cache_bytes() if hasattr(cache, "cache_bytes") else 0
+    return CacheStats(name, info.currsize, size, info.hits, info.misses, info.maxsize)
+
+
+def _registered(names: Iterable[str] | None) -> list[tuple[str, _RegisteredCache]]:
+    if names is None:
+        return list(_cache_registry.items())
+    names = list(names)
+    if unknown := [name for name in names if name not in _cache_registry]:
+        msg = f"Unknown caches: {', '.join(unknown)}"
+        raise KeyError(msg)
+    return [(name, _cache_registry[name]) for name in names]
+
+
+def cache_stats(names: Iterable[str] | None = None) -> list[CacheStats]:
+    """
+    Statistics of the named caches, or of all registered caches.
+
+    Raises:
+        KeyError: If a name is not registered
+    """
+    return [entry.stats() for _, entry in _registered(names)]
+
+
+def clear_caches(names: Iterable[str] | None = None) -> list[str]:
+    """
+    Clear the named caches, or all registered caches, in memory and on disk.
+
+    Returns:
+        list[str]: Names of the cleared caches
+
+    Raises:
+        KeyError: If a name is not registered
+    """
+    cleared = []
+    for name, entry in _registered(names):
+        entry.clear()
+        cleared.append(name)
+    return cleared
+
+
+def warm_caches(names: Iterable[str] | None = None) -> dict[str, float]:
+    """
+    Fill the named caches (or all that can be warmed) ahead of first use.
+
+    Warmers only compute what a first lookup would; a warmer that fails is
+    logged and skipped.
+
+    Returns:
+        dict[str, float]: Seconds spent per warmed cache
+
+    Raises:
+        KeyError: If a name is not registered
+    """
+    timings = {}
+    for name, entry in _registered(names):
+        if entry.warm is None:
+            continue
+        start = time.perf_counter()
+        try:
+            entry.warm()
+        except Exception as e:
+            logging.debug(f"Warming cache {name} failed: {e!s}")
+            continue
+        timings[name] = time.perf_counter() - start
+    return timings
+
+
+def export_caches(names: Iterable[str] | None = None) -> str:
+    """
+    Cache statistics as JSON, for collecting from running processes.
+
+    Raises:
+        KeyError: If a name is not registered
+    """
+    return json.dumps(
+        {
+            "pid": os.getpid(),
+            "time": time.time(),
+            "caches": [
+                {**asdict(stats), "hit_rate": stats.hit_rate}
+                for stats in cache_stats(names)
+            ],
+        },
+        indent=2,
+    )
+
+
+####################################
+## HOST DETECTION
+####################################
+# A host detector returns the site-packages directory of the application
+# embedding this interpreter, or None if it does not recognize the host
+HostDetector = Callable[[], Path | None]
+
+
+@dataclass(frozen=True)
+class _HostDetectorEntry:
+    name: str
+    detector: HostDetector
+    priority: int
+    sequence: int
+
+
+_host_detectors: list[_HostDetectorEntry] = []  # Sorted by (-priority, sequence)
+_host_detector_sequence = itertools.count()
+_detected_host: tuple[str, Path] | None = None
+_host_detected = False
+_host_lock = threading.RLock()
+
+
+def _fontlab_data_site_packages(fontlab: Any, sys_path: tuple[str, ...]) -> Path | None:
+    """FontLab's site-packages from its data path, if it is in sys.path."""
+    python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    fontlab_path = Path(fontlab.flPreferences.instance().dataPath)
+    site_packages_path = fontlab_path / "python" / python_version / "site-packages"
+    return site_packages_path if str(site_packages_path) in sys_path else None
+
+
+def _fontlab_spec_found() -> bool:
+    try:
+        return importlib.util.find_spec("fontlab") is not None
+    except (ImportError, ValueError):
+        return False
+
+
+@lru_cache(maxsize=8)
+def _fontlab_site_packages_for(
+    sys_path: tuple[str, ...], fontlab: object
+) -> Path | None:
+    """
+    Detect FontLab's site-packages for a given sys.path and fontlab module.
+
+    Cheapest evidence first: an already imported fontlab module, then
+    sys.path entries shaped like <data>/python/<ver>/site-packages, then a
+    find_spec() probe. fontlab is imported only to disambiguate between
+    several such entries.
+    """
+    if fontlab is not None:
+        return _fontlab_data_site_packages(fontlab, sys_path)
+
+    python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
+    suffix = ("python", python_version, "site-packages")
+    candidates = [entry for entry in sys_path if Path(entry).parts[-3:] == suffix]
+    if not candidates or not _fontlab_spec_found():
+        return None
+    if len(candidates) == 1:
+        return Path(candidates[0])
+
+    try:
+        import fontlab as fontlab_module  # noqa: PLC0415
+    except ImportError:
+        return None
+    return _fontlab_data_site_packages(fontlab_module, sys_path)
 
 
 def _get_fontlab_site_packages() -> Path | None:
     """
     Get the FontLab site-packages directory path if FontLab is available.
 
-    This function attempts to locate the FontLab-specific site-packages directory
-    by using FontLab's data path and the current Python version. This is needed
-    because FontLab maintains its own Python environment.
+    FontLab maintains its own Python environment, with a site-packages
+    directory under its data path. Detection does not import fontlab in the
+    common cases and is cached per sys.path, so it is cheap to call
+    repeatedly.
 
     Returns:
         Path: Path to FontLab's site-packages directory if found and in sys.path
         None: If FontLab is not available or the path is not in sys.path
     """
-    try:
-        import fontlab  # noqa: PLC0415
-
-        # Get FontLab data path
-        fontlab_path = Path(fontlab.flPreferences.instance().dataPath)
+    return _fontlab_site_packages_for(tuple(sys.path), sys.modules.get("fontlab"))
 
-        # Get current Python version (major.minor)
-        python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
 
-        # Construct the full path
-        site_packages_path = fontlab_path / "python" / python_version / "site-packages"
+def _glyphs_site_packages() -> Path | None:
+    """Glyphs' site-packages, if running inside Glyphs."""
+    if sys.modules.get("GlyphsApp") is None:
+        return None
+    for entry in sys.path:
+        parts = Path(entry).parts
+        if parts[-1:] == ("site-packages",) and any(
+            part.startswith("Glyphs") for part in parts
+        ):
+            return Path(entry)
+    return None
 
-        # Only return the path if it's actually in sys.path
-        return site_packages_path if str(site_packages_path) in sys.path else None
 
-    except ImportError:
+def _blender_site_packages() -> Path | None:
+    """Blender's user script modules directory, if running inside Blender."""
+    if (bpy := sys.modules.get("bpy")) is None:
         return None
+    modules = Path(bpy.utils.user_resource("SCRIPTS", path="modules"))
+    return modules if str(modules) in sys.path else None
+
+
+def register_host_detector(
+    name: str, detector: HostDetector, *, priority: int = 0
+) -> None:
+    """
+    Register a detector for an application that embeds Python.
+
+    Detectors run lazily, in priority order, the first time the install
+    target is needed; the first one returning a path wins and the result is
+    cached. Registering a name again replaces its detector.
+
+    Args:
+        name: Host name, e.g. "blender"
+        detector: Callable returning the host's site-packages or None
+        priority: Higher priorities are tried first
+    """
+    entry = _HostDetectorEntry(name, detector, priority, next(_host_detector_sequence))
+    with _host_lock:
+        _host_detectors[:] = [e for e in _host_detectors if e.name != name]
+        _host_detectors.append(entry)
+        _host_detectors.sort(key=lambda e: (-e.priority, e.sequence))
+        clear_host_cache()
+
+
+def unregister_host_detector(name: str) -> bool:
+    """
+    Remove a host detector.
+
+    Returns:
+        bool: True if a detector with that name was registered
+    """
+    with _host_lock:
+        count = len(_host_detectors)
+        _host_detectors[:] = [e for e in _host_detectors if e.name != name]
+        clear_host_cache()
+        return len(_host_detectors) != count
+
+
+def clear_host_cache() -> None:
+    """Forget the detected host so detectors run again on next use."""
+    global _detected_host, _host_detected  # noqa: PLW0603
+    with _host_lock:
+        _detected_host = None
+        _host_detected = False
+
+
+def detect_host() -> tuple[str, Path] | None:
+    """
+    Identify the application embedding this interpreter.
+
+    Returns:
+        tuple[str, Path] | None: Host name and its site-packages directory,
+            or None for a plain interpreter
+    """
+    global _detected_host, _host_detected  # noqa: PLW0603
+    with _host_lock:
+        if _host_detected:
+            return _detected_host
+        for entry in _host_detectors:
+            try:
+                site_packages = entry.detector()
+            except Exception as e:
+                logging.warning(
+                    f"Host detector {entry.name!r} failed: {e}", exc_info=True
+                )
+                continue
+            if site_packages is not None:
+                _detected_host = (entry.name, Path(site_packages))
+                break
+        _host_detected = True
+        return _detected_host
+
+
+# Looked up through the module so tests and callers can patch them
+register_host_detector("fontlab", lambda: _get_fontlab_site_packages())
+register_host_detector("blender", lambda: _blender_site_packages())
+register_host_detector("glyphs", lambda: _glyphs_site_packages())
 
 
 def get_site_packages_path() -> Path:
-    # Get FontLab site-packages if available, otherwise fall back to user site-packages
-    return _get_fontlab_site_packages() or Path(site.getusersitepackages())
+    # Get the host's site-packages if embedded, otherwise the user site-packages
+    host = detect_host()
+    return host[1] if host else Path(site.getusersitepackages())
 
 
 ####################################
 ## INSTALLATION TARGET CONFIG
 ####################################
-# Configurable via UV_INSTALL_TARGET environment variable
-UV_INSTALL_TARGET = Path(
-    os.environ.get(
-        "UV_INSTALL_TARGET",
-        str(get_site_packages_path()),
+def get_install_target() -> Path:
+    """
+    Get the directory that @needs(target=True) installs into.
+
+    An explicitly assigned py_needs.UV_INSTALL_TARGET wins, then the
+    UV_INSTALL_TARGET environment variable, then get_site_packages_path().
+    """
+    if (assigned := globals().get("UV_INSTALL_TARGET")) is not None:
+        return Path(assigned)
+    return Path(os.environ.get("UV_INSTALL_TARGET", str(get_site_packages_path())))
+
+
+def __getattr__(name: str) -> Any:
+    # UV_INSTALL_TARGET is computed on first access, so importing this
+    # module does not run host detection
+    if name == "UV_INSTALL_TARGET":
+        return get_install_target()
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
+
+
+####################################
+## PATH PROVIDER REGISTRY
+####################################
+@dataclass(eq=False)
+class _ProviderEntry:
+    """A registered path provider and its cached result."""
+
+    provider: PathProvider
+    priority: int = 0
+    ttl: float | None = None  # Seconds; None caches until clear_provider_cache()
+    timeout: float | None = None  # Seconds; None evaluates inline
+    sequence: int = 0
+    paths: tuple[str, ...] | None = None
+    expires: float = 0.0
+    pending: Future[tuple[str, ...]] | None = None
+
+    def is_fresh(self, now: float) -> bool:
+        return self.paths is not None and (self.ttl is None or now < self.expires)
+
+    def store(self, paths: tuple[str, ...], now: float) -> None:
+        global _providers_expire  # noqa: PLW0603
+        self.paths = paths
+        self.expires = now + (self.ttl or 0.0)
+        if self.ttl is not None:
+            _providers_expire = min(_providers_expire, self.expires)
+
+
+_providers_lock = threading.RLock()
+# Earliest expiry of a cached ttl result; PATH access refreshes providers
+# once it has passed (see _refresh_expired_providers())
+_providers_expire = float("inf")
+_provider_sequence = itertools.count()
+_provider_pool: ThreadPoolExecutor | None = None
+_PROVIDER_POOL_WORKERS = 4
+
+
+def register_path_provider(
+    provider: PathProvider,
+    *,
+    priority: int = 0,
+    ttl: float | None = None,
+    timeout: float | None = None,
+) -> None:
+    """
+    Register a custom path provider function.
+
+    Provider results are cached: clear_path_cache() reuses them, so a slow
+    provider (e.g. one that runs `brew --prefix`) is not re-run on every
+    PATH rebuild. Registering the same provider again updates its settings.
+
+    Args:
+        provider: Callable returning a list of directory paths
+        priority: Higher priorities are placed earlier in the PATH
+        ttl: Seconds before the cached result is refreshed on the next
+            PATH access (None: never)
+        timeout: Evaluate in a worker thread and wait at most this many
+            seconds. On timeout the previous result (or nothing) is used and
+            the fresh result is picked up once the provider finishes.
+    """
+    entry = _ProviderEntry(
+        provider=provider,
+        priority=priority,
+        ttl=ttl,
+        timeout=timeout,
+        sequence=next(_provider_sequence),
     )
-)
+    with _providers_lock:
+        _remove_provider_entry(provider)
+        _path_providers.append(entry)
+        _path_providers.sort(key=lambda e: (-e.priority, e.sequence))
+        # Splice the new segment into an already built PATH instead of
+        # rebuilding it; only this provider is evaluated
+        if _extended_path is not None:
+            ((_, paths),) = _provider_paths([entry])
+            index = len(_BASE_SEGMENTS) + _path_providers.index(entry)
+            _apply_path_change(_extended_path.insert(entry, paths, index))
+
+
+def unregister_path_provider(provider: PathProvider) -> bool:
+    """
+    Remove a previously registered path provider.
+
+    Returns:
+        bool: True if the provider was registered
+    """
+    with _providers_lock:
+        return _remove_provider_entry(provider)
+
+
+def _remove_provider_entry(provider: PathProvider) -> bool:
+    """
+    Drop the registry entry and PATH segment for provider.
+
+    Caller holds _providers_lock.
+    """
+    for index, entry in enumerate(_path_providers):
+        if entry.provider == provider:
+            del _path_providers[index]
+            if _extended_path is not None:
+                _apply_path_change(_extended_path.remove(entry))
+            return True
+    return False
+
+
+def clear_provider_cache(provider: PathProvider | None = None) -> None:
+    """
+    Forget cached provider results so they are re-evaluated.
+
+    Args:
+        provider: Only this provider, or all providers if None
+    """
+    with _providers_lock:
+        for entry in _path_providers:
+            if provider is None or entry.provider == provider:
+                entry.paths = None
+    clear_path_cache()
+
+
+def _call_provider(entry: _ProviderEntry) -> tuple[str, ...]:
+    """Run a provider, turning failures into an empty result."""
+    try:
+        return _normalize_dirs(entry.provider())
+    except Exception as e:
+        logging.debug(f"Path provider {entry.provider!r} failed: {e!s}")
+        return ()
+
+
+def _get_provider_pool() -> ThreadPoolExecutor:
+    """Return the shared worker pool for slow providers, creating it lazily."""
+    global _provider_pool  # noqa: PLW0603
+    with _providers_lock:
+        if _provider_pool is None:
+            _provider_pool = ThreadPoolExecutor(
+                max_workers=_PROVIDER_POOL_WORKERS,
+                thread_name_prefix="twat_ez_provider",
+            )
+        return _provider_pool
+
+
+def _on_provider_done(entry: _ProviderEntry, future: Future[tuple[str, ...]]) -> None:
+    """Store a background provider result and invalidate the cached PATH."""
+    with _providers_lock:
+        if entry.pending is not future:
+            return
+        entry.pending = None
+        paths = future.result()
+        changed = paths != entry.paths
+        entry.store(paths, time.monotonic())
+        if changed and _extended_path is not None:
+            _apply_path_change(_extended_path.replace(entry, paths))
+
+
+def _provider_paths(
+    entries: list[_ProviderEntry] | None = None,
+) -> list[tuple[_ProviderEntry, tuple[str, ...]]]:
+    """
+    Collect paths from registered providers, using cached results.
+
+    Stale providers with a timeout run concurrently in the worker pool while
+    inline providers are evaluated; each slow provider is then waited for
+    until its own deadline at most.
+
+    Args:
+        entries: Providers to evaluate; all registered providers if None
 
+    Returns:
+        list[tuple[_ProviderEntry, tuple[str, ...]]]: Paths per provider
+    """
+    now = time.monotonic()
+    with _providers_lock:
+        entries = list(_path_providers) if entries is None else entries
+        stale = [e for e in entries if not e.is_fresh(now)]
+        waits: list[tuple[_ProviderEntry, Future[tuple[str, ...]], float]] = []
+        for entry in stale:
+            if entry.timeout is None:
+                continue
+            if (future := entry.pending) is None:
+                future = _get_provider_pool().submit(_call_provider, entry)
+                entry.pending = future
+                # Runs inline (and clears pending) if it has already finished
+                future.add_done_callback(partial(_on_provider_done, entry))
+            waits.append((entry, future, now + entry.timeout))
+
+    for entry in stale:
+        if entry.timeout is None:
+            paths = _call_provider(entry)
+            with _providers_lock:
+                entry.store(paths, time.monotonic())
+
+    for entry, future, deadline in waits:
+        try:
+            future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            logging.debug(
+                f"Path provider {entry.provider!r} exceeded {entry.timeout}s; "
+                "using its previous result"
+            )
+        else:
+            _on_provider_done(entry, future)
+
+    return [(entry, entry.paths or ()) for entry in entries]
+
+
+def _refresh_expired_providers() -> None:
+    """
+    Re-run providers whose ttl has run out and splice in their new paths.
 
-def register_path_provider(provider: PathProvider) -> None:
-    """Register a custom path provider function."""
-    _path_providers.append(provider)
-    clear_path_cache()  # Invalidate cache when providers change
+    Called on every PATH access, so it is a single clock read until the
+    earliest cached result expires. Providers with a timeout run in the
+    worker pool and are spliced in by _on_provider_done().
+    """
+    global _providers_expire  # noqa: PLW0603
+    if time.monotonic() < _providers_expire:
+        return
+    with _providers_lock:
+        now = time.monotonic()
+        if _extended_path is not None:
+            expired = [
+                e
+                for e in _path_providers
+                if e.paths is not None and e.pending is None and not e.is_fresh(now)
+            ]
+            previous = [(e, e.paths) for e in expired if e.timeout is None]
+            _provider_paths(expired)
+            for entry, paths in previous:
+                if (fresh := entry.paths) is not None and fresh != paths:
+                    _apply_path_change(_extended_path.replace(entry, fresh))
+        # Entries still running are accounted for by store() when they finish
+        _providers_expire = min(
+            (
+                e.expires
+                for e in _path_providers
+                if e.ttl is not None and e.paths is not None and e.pending is None
+            ),
+            default=float("inf"),
+        )
 
 
 ####################################
@@ -132,6 +1011,36 @@ def get_xdg_paths() -> list[Path]:
     return paths
 
 
+def get_cache_dir() -> Path:
+    """
+    Get the directory used for twat-ez on-disk caches.
+
+    Honours XDG_CACHE_HOME, falls back to LOCALAPPDATA on Windows and to
+    ~/.cache elsewhere.
+
+    Returns:
+        Path: Cache directory (not created by this function)
+    """
+    if xdg_cache := os.environ.get("XDG_CACHE_HOME"):
+        return Path(xdg_cache) / "twat_ez"
+    if platform.system() == "Windows" and (local := os.environ.get("LOCALAPPDATA")):
+        return Path(local) / "twat_ez" / "cache"
+    return Path.home() / ".cache" / "twat_ez"
+
+
+def _cache_file_from_env(variable: str, default_name: str) -> Path | None:
+    """
+    Resolve an opt-in persistence setting: "1" means default_name under
+    get_cache_dir(), any other non-false value is an explicit file path.
+    """
+    value = os.environ.get(variable, "")
+    if not value or value.lower() in {"0", "false", "no"}:
+        return None
+    if value.lower() in {"1", "true", "yes"}:
+        return get_cache_dir() / default_name
+    return Path(value)
+
+
 ####################################
 ## SYSTEM-SPECIFIC PATH DISCOVERY
 ####################################
@@ -207,38 +1116,241 @@ Core utilities for system interaction including:
 ####################################
 ## EXECUTABLE SECURITY
 ####################################
-def verify_executable(path: str | Path) -> tuple[bool, str]:
+@dataclass(frozen=True)
+class ExecutablePolicy:
     """
-    Validate executable safety and permissions.
-
-    Args:
-        path: Path to the executable as string or Path object
+    Trust rules applied by verify_executable().
 
-    Returns:
-        tuple[bool, str]: (is_safe, reason) where is_safe is True if executable is safe to use
+    The default instance reproduces the historical check (regular, executable,
+    not world-writable). STRICT_EXECUTABLE_POLICY additionally checks
+    ownership, every ancestor directory and every hop of a symlink chain.
+    Directory verdicts are cached until clear_path_cache(), so strict checks
+    add one lstat() per candidate in the common, non-symlink case.
     """
-    path_obj = Path(path)
 
-    if not path_obj.exists():
-        return False, "File does not exist"
+    reject_world_writable: bool = True
+    require_executable_bit: bool = True
+    # Files and checked directories must be owned by root or the current user
+    check_owner: bool = False
+    # Reject if any ancestor directory is world-writable without the sticky bit
+    check_parent_dirs: bool = False
+    # Apply the directory checks to the directory of every symlink hop
+    resolve_symlinks: bool = False
+    # Executables under these prefixes skip the directory and symlink checks;
+    # the file itself, including its owner, is still checked
+    trusted_prefixes: tuple[str, ...] = ()
+
+
+STRICT_EXECUTABLE_POLICY = ExecutablePolicy(
+    check_owner=True, check_parent_dirs=True, resolve_symlinks=True
+)
 
-    if not path_obj.is_file():
-        return False, "Not a regular file"
+_executable_policy = ExecutablePolicy()
 
-    # Check if path is writable by others on Unix-like systems
-    if platform.system() != "Windows":
-        mode = path_obj.stat().st_mode
-        if mode & 0o002:  # World-writable
-            return False, "File is world-writable"
+# Verdicts keyed by file identity (st_dev, st_ino, st_mtime_ns, st_mode,
+# st_uid). Mode and owner are part of the key because chmod and chown do not
+# touch st_mtime. Cleared whenever the policy changes.
+_verdict_cache: dict[tuple[int, int, int, int, int], tuple[bool, str]] = {}
+_VERDICT_CACHE_MAX = 4096
+
+# Directory path -> verdict for the directory and all of its ancestors.
+# Lives as long as the PATH snapshot; cleared by clear_path_cache().
+_dir_verdict_cache: dict[str, tuple[bool, str]] = {}
+
+_MAX_SYMLINK_HOPS = 40
+
+
+def get_executable_policy() -> ExecutablePolicy:
+    """Return the policy used by verify_executable() and which()."""
+    return _executable_policy
+
+
+def set_executable_policy(policy: ExecutablePolicy) -> ExecutablePolicy:
+    """
+    Replace the policy used by verify_executable() and which().
+
+    Clears all cached verdicts, including which() results.
+
+    Args:
+        policy: New executable trust policy
+
+    Returns:
+        ExecutablePolicy: The previous policy
+    """
+    global _executable_policy
+    previous, _executable_policy = _executable_policy, policy
+    _verdict_cache.clear()
+    _dir_verdict_cache.clear()
+    which.cache_clear()
+    return previous
+
+
+def _owner_trusted(st: os.stat_result) -> bool:
+    """Check that a file is owned by root or by the current user."""
+    getuid = getattr(os, "getuid", None)
+    return getuid is None or st.st_uid in {0, getuid()}
+
+
+def _stat_verdict(
+    st: os.stat_result, policy: ExecutablePolicy | None = None
+) -> tuple[bool, str]:
+    """
+    Judge an executable from a single stat result, memoized by file identity.
+
+    Args:
+        st: Result of os.stat() on the candidate executable
+        policy: Policy to apply; defaults to the active policy
+
+    Returns:
+        tuple[bool, str]: (is_safe, reason), as for verify_executable()
+    """
+    policy = policy or _executable_policy
+    memoize = policy is _executable_policy
+    key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_mode, st.st_uid)
+    if memoize and (cached := _verdict_cache.get(key)) is not None:
+        return cached
+
+    mode = st.st_mode
+    if not stat.S_ISREG(mode):
+        verdict = (False, "Not a regular file")
+    elif platform.system() == "Windows":
+        # On Windows, we could add additional checks like:
+        # - Digital signature verification
+        # - Known paths validation
+        # But for now we'll keep it simple
+        verdict = (True, "OK")
+    elif policy.reject_world_writable and mode & stat.S_IWOTH:
+        verdict = (False, "File is world-writable")
+    elif policy.require_executable_bit and not mode & (
+        stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+    ):
+        verdict = (False, "File is not executable")
+    elif policy.check_owner and not _owner_trusted(st):
+        verdict = (False, "File is owned by another user")
+    else:
+        verdict = (True, "OK")
+
+    if memoize:
+        if len(_verdict_cache) >= _VERDICT_CACHE_MAX:
+            _verdict_cache.clear()
+        _verdict_cache[key] = verdict
+    return verdict
+
+
+def _dir_verdict(directory: str, policy: ExecutablePolicy) -> tuple[bool, str]:
+    """
+    Judge a directory and, recursively, its ancestors.
+
+    Each directory is stat'ed once per PATH snapshot; ancestors shared by
+    many PATH entries (/usr, /) are only checked the first time.
+    """
+    memoize = policy is _executable_policy
+    if memoize and (cached := _dir_verdict_cache.get(directory)) is not None:
+        return cached
+
+    try:
+        st = os.stat(directory)
+    except OSError:
+        verdict = (False, f"Directory {directory} is not accessible")
+    else:
+        writable_by_others = st.st_mode & stat.S_IWOTH
+        if writable_by_others and not st.st_mode & stat.S_ISVTX:
+            verdict = (False, f"Directory {directory} is world-writable")
+        elif policy.check_owner and not _owner_trusted(st):
+            verdict = (False, f"Directory {directory} is owned by another user")
+        elif (parent := os.path.dirname(directory)) and parent != directory:
+            verdict = _dir_verdict(parent, policy)
+        else:
+            verdict = (True, "OK")
+
+    if memoize:
+        _dir_verdict_cache[directory] = verdict
+    return verdict
+
+
+def _is_trusted_path(path: str, policy: ExecutablePolicy) -> bool:
+    """Check whether path lies under one of the policy's trusted prefixes."""
+    return any(
+        path == prefix or path.startswith(prefix.rstrip(os.sep) + os.sep)
+        for prefix in policy.trusted_prefixes
+    )
 
-    # On Windows, we could add additional checks like:
-    # - Digital signature verification
-    # - Known paths validation
-    # But for now we'll keep it simple
 
+def _chain_verdict(path: str, policy: ExecutablePolicy) -> tuple[bool, str]:
+    """Apply directory checks to the path and, optionally, its symlink chain."""
+    current = os.path.abspath(path)
+    for _ in range(_MAX_SYMLINK_HOPS):
+        if _is_trusted_path(current, policy):
+            break
+        if policy.check_parent_dirs:
+            is_safe, reason = _dir_verdict(os.path.dirname(current), policy)
+            if not is_safe:
+                return is_safe, reason
+        if not policy.resolve_symlinks:
+            break
+        try:
+            link_st = os.lstat(current)
+        except OSError:
+            return False, "File does not exist"
+        if not stat.S_ISLNK(link_st.st_mode):
+            break
+        if policy.check_owner and not _owner_trusted(link_st):
+            return False, f"Symlink {current} is owned by another user"
+        target = os.readlink(current)
+        current = os.path.normpath(os.path.join(os.path.dirname(current), target))
+    else:
+        return False, "Too many levels of symbolic links"
     return True, "OK"
 
 
+def verify_executable(
+    path: str | Path, policy: ExecutablePolicy | None = None
+) -> tuple[bool, str]:
+    """
+    Validate executable safety and permissions.
+
+    Uses a single os.stat() call; the file-type, world-writable, executable
+    and ownership checks all read from that result. Directory and symlink
+    checks (see ExecutablePolicy) reuse cached per-directory verdicts.
+
+    Args:
+        path: Path to the executable as string or Path object
+        policy: Policy to apply instead of the active one
+
+    Returns:
+        tuple[bool, str]: (is_safe, reason) where is_safe is True if executable is safe to use
+    """
+    policy = policy or _executable_policy
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return False, "File does not exist"
+    verdict = _stat_verdict(st, policy)
+    if (
+        verdict[0]
+        and (policy.check_parent_dirs or policy.resolve_symlinks)
+        and platform.system() != "Windows"
+    ):
+        return _chain_verdict(os.fspath(path), policy)
+    return verdict
+
+
+def verify_executables(
+    paths: Iterable[str | Path], policy: ExecutablePolicy | None = None
+) -> list[tuple[bool, str]]:
+    """
+    Validate many executables, one stat call each.
+
+    Args:
+        paths: Paths to the executables
+        policy: Policy to apply instead of the active one
+
+    Returns:
+        list[tuple[bool, str]]: One (is_safe, reason) verdict per path, in order
+    """
+    return [verify_executable(path, policy) for path in paths]
+
+
 ####################################
 ## DATA CONVERSION
 ####################################
@@ -269,7 +1381,8 @@ Network utilities for HTTP content retrieval with:
 ####################################
 ## CORE DOWNLOAD MECHANISMS
 ####################################
-@lru_cache(maxsize=20)
+@_timed("download_url_qt")
+@_lookup_cache(maxsize=20)
 def download_url_qt(
     url: str,
     mode: int = 1,
@@ -334,7 +1447,8 @@ def download_url_qt(
     raise RuntimeError(msg)
 
 
-@lru_cache(maxsize=20)
+@_timed("download_url_py")
+@_lookup_cache(maxsize=20)
 def download_url_py(
     url: str,
     mode: int = 1,
@@ -375,7 +1489,8 @@ def download_url_py(
         raise RuntimeError(msg) from e
 
 
-@lru_cache(maxsize=20)
+@_timed("download_url")
+@_lookup_cache(maxsize=20)
 def download_url(
     url: str,
     mode: int = 1,
@@ -398,17 +1513,750 @@ UV package manager lifecycle management:
 """
 
 
+####################################
+## STREAMED SUBPROCESSES
+####################################
+# Receives ("stdout" | "stderr", line) for every output line as it arrives
+LineCallback = Callable[[str, str], None]
+
+STREAM_TAIL_LINES = 200  # Output lines kept per stream for results and errors
+UV_INSTALL_TIMEOUT = 900.0  # Wall-clock seconds before an install is killed
+
+
+def _log_line(stream: str, line: str) -> None:
+    logging.debug(f"{stream}: {line}")
+
+
+def run_streamed(
+    cmd: list[str],
+    *,
+    timeout: float | None = None,
+    on_line: LineCallback | None = None,
+    check: bool = True,
+) -> subprocess.CompletedProcess[str]:
+    """
+    Run a command, handing each line of its output to on_line as it arrives.
+
+    Unlike subprocess.run(capture_output=True), output is never held in full:
+    only the last STREAM_TAIL_LINES lines of each stream are kept, for the
+    result and for CalledProcessError.
+
+    Args:
+        cmd: Command and arguments
+        timeout: Wall-clock seconds after which the process is killed
+        on_line: Line callback; defaults to debug logging
+        check: Raise CalledProcessError on a non-zero exit status
+
+    Returns:
+        subprocess.CompletedProcess[str]: Exit status and output tails
+
+    Raises:
+        subprocess.TimeoutExpired: If the process ran longer than timeout
+        subprocess.CalledProcessError: If check and the process failed
+    """
+    callback = on_line or _log_line
+    tails: dict[str, deque[str]] = {
+        "stdout": deque(maxlen=STREAM_TAIL_LINES),
+        "stderr": deque(maxlen=STREAM_TAIL_LINES),
+    }
+    process = subprocess.Popen(  # noqa: S603
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+
+    def pump(name: str, stream: Any) -> None:
+        with stream:
+            for raw in stream:
+                line = raw.rstrip("\r\n")
+                tails[name].append(line)
+                try:
+                    callback(name, line)
+                except Exception as e:
+                    logging.debug(f"Line callback failed: {e!s}")
+
+    readers = [
+        threading.Thread(target=pump, args=("stdout", process.stdout), daemon=True),
+        threading.Thread(target=pump, args=("stderr", process.stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        returncode = process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+        returncode = None
+    for reader in readers:
+        # Grandchildren may still hold the pipes open after a kill
+        reader.join(timeout=1.0)
+
+    stdout = "\n".join(tails["stdout"])
+    stderr = "\n".join(tails["stderr"])
+    if returncode is None:
+        raise subprocess.TimeoutExpired(cmd, timeout or 0.0, stdout, stderr)
+    if check and returncode:
+        raise subprocess.CalledProcessError(returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, returncode, stdout, stderr)
+
+
+_UV_SUMMARY = re.compile(
+    r"(Resolved|Prepared|Installed|Uninstalled|Audited) (\d+) packages? in (.+)"
+)
+_UV_CHANGE = re.compile(r"\s*([+~-]) (\S+)\s*")
+_UV_DURATION = re.compile(r"(?:(\d+)m\s*)?(\d+(?:\.\d+)?)(ms|s)")
+
+
+def _parse_uv_duration(text: str) -> float | None:
+    """Seconds from uv's duration format, e.g. "120ms", "1.20s", "1m 3s"."""
+    if not (match := _UV_DURATION.fullmatch(text.strip())):
+        return None
+    minutes, value, unit = match.groups()
+    seconds = float(value) / 1000 if unit == "ms" else float(value)
+    return seconds + 60 * int(minutes or 0)
+
+
+@dataclass(eq=False)
+class UvInstallReport:
+    """
+    What uv reported about one run, parsed from its output.
+
+    uv prints a summary per phase ("Installed 3 packages in 12ms") and one
+    line per changed package (" + fire==0.7.0").
+    """
+
+    phases: dict[str, tuple[int, float]] = field(default_factory=dict)
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    def feed(self, line: str) -> None:
+        """Parse one output line."""
+        if match := _UV_SUMMARY.fullmatch(line.strip()):
+            phase, count, duration = match.groups()
+            if (seconds := _parse_uv_duration(duration)) is not None:
+                self.phases[phase.lower()] = (int(count), seconds)
+                logging.info(f"uv: {line.strip()}")
+                return
+        if match := _UV_CHANGE.fullmatch(line):
+            sign, package = match.groups()
+            (self.removed if sign == "-" else self.added).append(package)
+        logging.debug(f"uv: {line}")
+
+    def emit(self) -> None:
+        """Report each phase to timing hooks as a "uv_<phase>" event."""
+        now = time.perf_counter()
+        for phase, (count, seconds) in self.phases.items():
+            target = " ".join(self.added) if phase == "installed" else f"{count}"
+            _emit_timing(f"uv_{phase}", now - seconds, target=target)
+
+
+####################################
+## TOOL RUNNER
+####################################
+TOOL_RUNNER_WORKERS = 8  # Default bound for ToolRunner.run_many()
+
+
+class ToolResult(NamedTuple):
+    """Outcome of one ToolRunner command."""
+
+    args: list[str]
+    returncode: int | None  # None if the command timed out
+    stdout: str
+    stderr: str
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+def _as_text(output: str | bytes | None) -> str:
+    if isinstance(output, bytes):
+        return output.decode("utf-8", "replace")
+    return output or ""
+
+
+class ToolRunner:
+    """
+    Run external tools repeatedly at the lowest per-call cost.
+
+    Everything that does not change between calls is done once per runner:
+    the environment is merged once, and each tool name is resolved with
+    which() once. Commands are then spawned with an absolute executable and
+    close_fds=False, which lets CPython use posix_spawn() (or vfork) instead
+    of fork+exec; file descriptors opened by Python are non-inheritable, so
+    nothing leaks into the child. Batches run on a bounded, reused thread
+    pool, and every call is reported to timing hooks as "tool_run".
+
+    Example:
+        >>> with ToolRunner() as runner:
+        ...     results = runner.run_many([["git", "--version"], ["uv", "-V"]])
+    """
+
+    def __init__(
+        self,
+        *,
+        env: dict[str, str] | None = None,
+        cwd: str | Path | None = None,
+        timeout: float | None = None,
+        max_workers: int = TOOL_RUNNER_WORKERS,
+    ) -> None:
+        """
+        Args:
+            env: Variables to set on top of os.environ, merged once here.
+                None inherits the live environment without copying it.
+            cwd: Working directory; note that CPython only uses posix_spawn()
+                when cwd is None
+            timeout: Default wall-clock seconds per command
+            max_workers: Upper bound on concurrent commands in run_many()
+        """
+        self.env = {**os.environ, **env} if env is not None else None
+        self.cwd = cwd
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self._executables: dict[str, str] = {}
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> ToolRunner:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Shut down the worker pool; the runner stays usable."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def resolve(self, tool: str) -> str:
+        """Absolute path of tool, looked up once per runner."""
+        if os.path.dirname(tool):
+            return tool
+        with self._lock:
+            if cached := self._executables.get(tool):
+                return cached
+        if (found := which(tool)) is None:
+            # Not cached: subprocess raises FileNotFoundError as usual, and a
+            # later install is picked up by the next call
+            return tool
+        with self._lock:
+            self._executables[tool] = str(found)
+        return str(found)
+
+    def run(
+        self,
+        cmd: list[str],
+        *,
+        input: str | None = None,  # noqa: A002
+        timeout: float | None = None,
+        check: bool = False,
+    ) -> ToolResult:
+        """
+        Run one command to completion and capture its output.
+
+        Args:
+            cmd: Tool name or path, followed by its arguments
+            input: Text sent to the command's stdin
+            timeout: Wall-clock seconds; defaults to the runner's timeout
+            check: Raise CalledProcessError on a non-zero exit status
+
+        Returns:
+            ToolResult: Exit status (None on timeout), output and duration
+
+        Raises:
+            FileNotFoundError: If the tool cannot be found
+            subprocess.CalledProcessError: If check and the command failed
+        """
+        argv = [self.resolve(cmd[0]), *cmd[1:]]
+        limit = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        try:
+            completed = subprocess.run(  # noqa: S603
+                argv,
+                input=input,
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                env=self.env,
+                cwd=self.cwd,
+                timeout=limit,
+                close_fds=False,
+                check=False,
+            )
+            returncode: int | None = completed.returncode
+            stdout, stderr = completed.stdout, completed.stderr
+        except subprocess.TimeoutExpired as e:
+            returncode, stdout, stderr = None, _as_text(e.stdout), _as_text(e.stderr)
+        seconds = time.perf_counter() - start
+        if returncode is None:
+            outcome = "timeout"
+        else:
+            outcome = "ok" if returncode == 0 else "error"
+        _emit_timing("tool_run", start, target=" ".join(argv), outcome=outcome)
+        if check and returncode != 0:
+            raise subprocess.CalledProcessError(returncode or -1, argv, stdout, stderr)
+        return ToolResult(argv, returncode, stdout, stderr, seconds)
+
+    def run_many(
+        self, cmds: Iterable[list[str]], *, timeout: float | None = None
+    ) -> list[ToolResult]:
+        """
+        Run commands concurrently, at most max_workers at a time.
+
+        Returns:
+            list[ToolResult]: One result per command, in input order
+
+        Raises:
+            FileNotFoundError: If any tool cannot be found
+        """
+        cmds = list(cmds)
+        if len(cmds) <= 1 or self.max_workers <= 1:
+            return [self.run(cmd, timeout=timeout) for cmd in cmds]
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="twat-ez-run"
+                )
+            pool = self._pool
+        return list(pool.map(lambda cmd: self.run(cmd, timeout=timeout), cmds))
+
+
+####################################
+## PERSISTED TOOL CACHE
+####################################
+# Set to "1" to persist which_uv()/which_pip() results under get_cache_dir(),
+# or to an explicit file path. Opt-in, like MODULE_CACHE_ENV: without it,
+# every process searches again (and a missing uv is not remembered)
+TOOL_CACHE_ENV = "TWAT_EZ_TOOL_CACHE"
+TOOL_MISS_BACKOFF = 300.0  # Seconds before a missing tool is searched for again
+TOOL_MISS_BACKOFF_MAX = 86400.0  # Cap for the doubling backoff
+TOOL_VERSION_TIMEOUT = 10.0
+
+_VERSION_PATTERN = re.compile(r"\d+(?:\.\d+)+")
+
+
+def _tool_cache_file() -> Path | None:
+    return _cache_file_from_env(TOOL_CACHE_ENV, "tools.json")
+
+
+# Serializes read-modify-write cycles on the tool cache file within a process
+_tool_cache_lock = threading.Lock()
+
+
+def _read_tool_cache(cache_file: Path) -> dict[str, dict[str, Any]]:
+    """Load the "tools" (name -> entry) and "versions" (path -> entry) sections."""
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+    return {
+        section: value if isinstance(value := data.get(section), dict) else {}
+        for section in ("tools", "versions")
+    }
+
+
+def _write_tool_cache(cache_file: Path, data: dict[str, dict[str, Any]]) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(data), encoding="utf-8")
+        tmp_file.replace(cache_file)
+    except OSError as e:
+        logging.debug(f"Could not persist tool cache: {e!s}")
+
+
+def _path_env_stamp() -> str:
+    """Entries are only valid for the PATH they were resolved under."""
+    path = os.environ.get("PATH", "")
+    return hashlib.blake2b(path.encode(), digest_size=8).hexdigest()
+
+
+def _tool_cache_get(tool: str) -> tuple[bool, Path | None]:
+    """
+    Look a tool up in the persisted cache.
+
+    Returns:
+        tuple[bool, Path | None]: (True, result) for a valid entry, whose
+            result is None for a tool known to be missing; (False, None) if
+            the tool must be searched for, including when the recorded
+            binary fails verify_executable()
+    """
+    if not (cache_file := _tool_cache_file()):
+        return False, None
+    entry = _read_tool_cache(cache_file)["tools"].get(tool)
+    if not isinstance(entry, dict) or entry.get("path_stamp") != _path_env_stamp():
+        return False, None
+    if entry.get("path") is None:
+        return time.time() < entry.get("retry_after", 0), None
+    path = Path(entry["path"])
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False, None
+    # chmod and chown leave the stamp unchanged, so re-check permissions too
+    stamp = (entry.get("ino"), entry.get("mtime_ns"))
+    if (st.st_ino, st.st_mtime_ns) != stamp or not verify_executable(path)[0]:
+        return False, None
+    return True, path
+
+
+def _tool_cache_put(tool: str, path: Path | None) -> None:
+    """Record a search result; misses back off exponentially."""
+    if not (cache_file := _tool_cache_file()):
+        return
+    entry: dict[str, Any]
+    if path is not None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        entry = {
+            "path": str(path),
+            "ino": st.st_ino,
+            "mtime_ns": st.st_mtime_ns,
+            "version": tool_version(path),
+        }
+    with _tool_cache_lock:
+        data = _read_tool_cache(cache_file)
+        previous = data["tools"].get(tool)
+        if path is None:
+            failures = 1
+            if isinstance(previous, dict) and previous.get("path") is None:
+                failures = int(previous.get("failures", 0)) + 1
+            delay = min(TOOL_MISS_BACKOFF * 2 ** (failures - 1), TOOL_MISS_BACKOFF_MAX)
+            entry = {
+                "path": None,
+                "failures": failures,
+                "retry_after": time.time() + delay,
+            }
+        entry["path_stamp"] = _path_env_stamp()
+        entry["checked"] = time.time()
+        data["tools"][tool] = entry
+        _write_tool_cache(cache_file, data)
+
+
+def cached_tool_version(tool: str) -> str | None:
+    """Version recorded for a tool in the persisted cache, if any."""
+    if not (cache_file := _tool_cache_file()):
+        return None
+    entry = _read_tool_cache(cache_file)["tools"].get(tool)
+    return entry.get("version") if isinstance(entry, dict) else None
+
+
+def clear_tool_cache() -> None:
+    """Forget resolved tools, in this process and on disk."""
+    which_uv.cache_clear()
+    which_pip.cache_clear()
+    if cache_file := _tool_cache_file():
+        try:
+            cache_file.unlink(missing_ok=True)
+        except OSError as e:
+            logging.debug(f"Could not remove tool cache: {e!s}")
+
+
+####################################
+## VERSION PROBING
+####################################
+@dataclass(frozen=True)
+class _VersionProbe:
+    args: tuple[str, ...]
+    pattern: re.Pattern[str]  # Group 1, if any, else the whole match
+
+
+_DEFAULT_VERSION_PROBE = _VersionProbe(("--version",), _VERSION_PATTERN)
+_version_probes: dict[str, _VersionProbe] = {}
+
+# Binary path -> (st_ino, st_mtime_ns, version)
+_version_cache: dict[str, tuple[int, int, str | None]] = {}
+
+VERSION_PROBE_WORKERS = 8
+_probe_runner = ToolRunner()
+
+
+def register_version_probe(
+    tool: str, pattern: str | re.Pattern[str], *, args: tuple[str, ...] = ("--version",)
+) -> None:
+    """
+    Teach tool_version() how to read a tool's version.
+
+    Args:
+        tool: Executable name, without any Windows extension
+        pattern: Regex applied to the probe's stdout and stderr; group 1 (or
+            the whole match) is the version
+        args: Arguments that make the tool print its version
+    """
+    _version_probes[tool] = _VersionProbe(tuple(args), re.compile(pattern))
+    _version_cache.clear()
+
+
+register_version_probe("git", r"git version (\d+(?:\.\d+)+)")
+register_version_probe("uv", r"uv (\d+(?:\.\d+)+)")
+register_version_probe("pip", r"pip (\d+(?:\.\d+)+)")
+register_version_probe("python", r"Python (\d+(?:\.\d+)+)")
+
+
+def _probe_for(path: str) -> _VersionProbe:
+    name = os.path.normcase(Path(path).name)
+    if platform.system() == "Windows":
+        name = os.path.splitext(name)[0]
+    if probe := _version_probes.get(name):
+        return probe
+    # python3.12 -> python, pip3 -> pip
+    return _version_probes.get(name.rstrip("0123456789."), _DEFAULT_VERSION_PROBE)
+
+
+def _run_version_probe(path: str) -> str | None:
+    probe = _probe_for(path)
+    try:
+        result = _probe_runner.run([path, *probe.args], timeout=TOOL_VERSION_TIMEOUT)
+    except OSError:
+        return None
+    if not (match := probe.pattern.search(f"{result.stdout}\n{result.stderr}")):
+        return None
+    return match.group(1) if match.re.groups else match.group()
+
+
+def tool_version(path: str | Path) -> str | None:
+    """
+    Version of the executable at path.
+
+    The probe (e.g. `git --version`) runs once per binary: results are
+    cached by path, inode and mtime, in memory and, with TWAT_EZ_TOOL_CACHE
+    set, on disk, so the subprocess cost is paid again only after the
+    binary is replaced.
+
+    Returns:
+        str | None: Version string, or None if it could not be determined
+    """
+    path = str(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (st.st_ino, st.st_mtime_ns)
+    if (cached := _version_cache.get(path)) and cached[:2] == stamp:
+        return cached[2]
+
+    cache_file = _tool_cache_file()
+    if cache_file:
+        entry = _read_tool_cache(cache_file)["versions"].get(path)
+        if isinstance(entry, dict) and stamp == (
+            entry.get("ino"),
+            entry.get("mtime_ns"),
+        ):
+            _version_cache[path] = (*stamp, entry.get("version"))
+            return entry.get("version")
+
+    version = _run_version_probe(path)
+    _version_cache[path] = (*stamp, version)
+    if cache_file:
+        with _tool_cache_lock:
+            data = _read_tool_cache(cache_file)
+            data["versions"][path] = {
+                "ino": stamp[0],
+                "mtime_ns": stamp[1],
+                "version": version,
+            }
+            _write_tool_cache(cache_file, data)
+    return version
+
+
+def _version_tuple(version: str | tuple[int, ...]) -> tuple[int, ...]:
+    if isinstance(version, tuple):
+        return version
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+
+def version_satisfies(version: str | None, minimum: str | tuple[int, ...]) -> bool:
+    """Whether a dotted version is at least minimum ("2.40" or (2, 40))."""
+    if version is None:
+        return False
+    found, wanted = _version_tuple(version), _version_tuple(minimum)
+    width = max(len(found), len(wanted))
+    return found + (0,) * (width - len(found)) >= wanted + (0,) * (width - len(wanted))
+
+
+def tool_versions(paths: list[Path]) -> list[str | None]:
+    """tool_version() for many binaries, probing uncached ones in parallel."""
+    if len(paths) <= 1:
+        return [tool_version(path) for path in paths]
+    workers = min(VERSION_PROBE_WORKERS, len(paths))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(tool_version, paths))
+
+
+####################################
+## STANDALONE UV BOOTSTRAP
+####################################
+# Where bootstrap_uv() gets uv from when no source is passed: a URL or a
+# local path to a uv release archive, and that archive's SHA-256
+UV_URL_ENV = "TWAT_EZ_UV_URL"
+UV_SHA256_ENV = "TWAT_EZ_UV_SHA256"
+
+_uv_bin_dirs: list[str] = []  # Directories bootstrap_uv() installed into
+
+
+def get_xdg_bin_dir() -> Path:
+    """Per-user executable directory: XDG_BIN_HOME, else ~/.local/bin."""
+    if xdg_bin := os.environ.get("XDG_BIN_HOME"):
+        return Path(xdg_bin)
+    return Path.home() / ".local" / "bin"
+
+
+def _bootstrapped_uv_dirs() -> list[str]:
+    """Path provider exposing the directories bootstrap_uv() installed into."""
+    return list(_uv_bin_dirs)
+
+
+def _extract_executable(archive: bytes, name: str) -> bytes:
+    """Return the file called name from a .tar.gz or .zip archive, or archive itself."""
+    import io  # noqa: PLC0415
+
+    if archive[:2] == b"\x1f\x8b":
+        import tarfile  # noqa: PLC0415
+
+        with tarfile.open(fileobj=io.BytesIO(archive), mode="r:gz") as tar:
+            for member in tar.getmembers():
+                if (
+                    member.isfile()
+                    and Path(member.name).name == name
+                    and (extracted := tar.extractfile(member))
+                ):
+                    return extracted.read()
+    elif archive[:4] == b"PK\x03\x04":
+        import zipfile  # noqa: PLC0415
+
+        with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+            for info in zip_file.infolist():
+                if not info.is_dir() and Path(info.filename).name == name:
+                    return zip_file.read(info)
+    else:
+        return archive  # A bare binary
+    msg = f"No {name} found in archive"
+    raise RuntimeError(msg)
+
+
+def _is_download_of(
+    url: str, args: tuple, kwargs: dict[str, Any], _result: Any
+) -> bool:
+    return kwargs.get("url", args[0] if args else None) == url
+
+
+def bootstrap_uv(
+    source: str | None = None,
+    sha256: str | None = None,
+    *,
+    bin_dir: Path | None = None,
+) -> Path:
+    """
+    Install a standalone uv binary without pip.
+
+    The archive (a uv release .tar.gz or .zip, or the bare binary) is
+    fetched with download_url() or read from a local path and checked
+    against its SHA-256 before anything is written. The binary is placed in
+    bin_dir, which is spliced into the extended PATH so that which("uv")
+    finds it straight away.
+
+    Args:
+        source: URL or local path; defaults to TWAT_EZ_UV_URL
+        sha256: Expected hex digest; defaults to TWAT_EZ_UV_SHA256.
+            Required for URLs.
+        bin_dir: Target directory; defaults to get_xdg_bin_dir()
+
+    Returns:
+        Path: The installed uv executable
+
+    Raises:
+        RuntimeError: If no source is configured, the checksum is missing
+            or wrong, or the archive has no uv binary
+    """
+    source = source or os.environ.get(UV_URL_ENV)
+    sha256 = sha256 or os.environ.get(UV_SHA256_ENV)
+    if not source:
+        msg = f"No uv source given and {UV_URL_ENV} is not set"
+        raise RuntimeError(msg)
+
+    is_url = "://" in source
+    if is_url and not sha256:
+        msg = f"Refusing to install uv from {source} without a SHA-256 checksum"
+        raise RuntimeError(msg)
+    if is_url:
+        data = download_url(source, mode=0)
+        # Do not keep a multi-megabyte archive in the download caches
+        for cached in (download_url, download_url_py, download_url_qt):
+            cached.invalidate(partial(_is_download_of, source))
+    else:
+        data = Path(source).read_bytes()
+    if not isinstance(data, bytes):
+        msg = f"Download of {source} returned {type(data).__name__}, not bytes"
+        raise RuntimeError(msg)  # noqa: TRY004 - documented as RuntimeError
+
+    if sha256:
+        if (digest := hashlib.sha256(data).hexdigest()) != sha256.strip().lower():
+            msg = f"Checksum mismatch for {source}: expected {sha256}, got {digest}"
+            raise RuntimeError(msg)
+    else:
+        logging.warning(f"Installing uv from {source} without checksum verification")
+
+    name = "uv.exe" if platform.system() == "Windows" else "uv"
+    binary = _extract_executable(data, name)
+    bin_dir = bin_dir or get_xdg_bin_dir()
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    destination = bin_dir / name
+    tmp = destination.with_name(f".{name}.{os.getpid()}.tmp")
+    tmp.write_bytes(binary)
+    tmp.chmod(0o755)
+    os.replace(tmp, destination)
+    logging.info(f"Installed standalone uv to {destination}")
+
+    directory = str(Path(bin_dir))
+    with _providers_lock:
+        if directory not in _uv_bin_dirs:
+            _uv_bin_dirs.append(directory)
+            # Re-registering re-evaluates the provider and splices its segment
+            register_path_provider(_bootstrapped_uv_dirs)
+        # The directory may have been on the PATH already, with "uv" cached as missing
+        which.invalidate(_is_miss)
+    which_uv.cache_clear()
+    _tool_cache_put("uv", destination)
+    return destination
+
+
 ####################################
 ## UV MANAGEMENT
 ####################################
-@lru_cache(maxsize=20)
+@_timed("which_uv")
+@_lookup_cache(maxsize=20)
 def which_uv() -> Path | None:
     """
-    Locate the uv executable in the system path.
+    Locate the uv executable in the system path, installing it if needed.
+
+    With TWAT_EZ_TOOL_CACHE set, the result is persisted across processes:
+    a found uv is reused after one stat, and a failed search and install is
+    only retried after a growing backoff. Persistence is opt-in; unset, the
+    result is cached for this process only.
 
     Returns:
         Path | None: Path to uv executable if found, None otherwise
     """
+    known, uv_cli = _tool_cache_get("uv")
+    if not known:
+        uv_cli = _find_or_install_uv()
+        _tool_cache_put("uv", uv_cli)
+    return uv_cli
+
+
+def _find_or_install_uv() -> Path | None:
+    """Search for uv, then try to install it."""
     try:
         uv_cli = which("uv")
         if uv_cli:
@@ -417,20 +2265,26 @@ def which_uv() -> Path | None:
         logging.warning(f"Error finding uv: {e!s}")
         return None
 
+    # A configured standalone binary is much faster to install than the wheel
+    if os.environ.get(UV_URL_ENV):
+        try:
+            return bootstrap_uv()
+        except Exception as e:
+            logging.warning(f"Standalone uv bootstrap failed: {e!s}")
+
     # If uv is not found, try to install it using pip
-    pip_cli = which_pip()
-    if pip_cli:
+    pip = resolve_pip()
+    if pip and pip.kind != "uv":
         try:
-            subprocess.run(  # noqa: S603
-                [str(pip_cli), "install", "--user", "uv"],
-                check=True,
-                capture_output=True,
+            run_streamed(
+                pip.command("install", "--user", "uv"), timeout=UV_INSTALL_TIMEOUT
             )
-            # Try finding uv again after installation
+            # Try finding uv again after installation, past the cached miss
+            which.invalidate(_is_miss)
             uv_cli = which("uv")
             if uv_cli:
                 return uv_cli
-        except subprocess.CalledProcessError as e:
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
             logging.warning(f"Error installing uv: {e!s}")
         except Exception as e:
             logging.warning(f"Unexpected error installing uv: {e!s}")
@@ -441,78 +2295,136 @@ def which_uv() -> Path | None:
 ####################################
 ## PIP MANAGEMENT
 ####################################
-@lru_cache(maxsize=20)
-def which_pip() -> Path | None:
+# Set to 1 to let resolve_pip() and which_pip() run ensurepip as a last resort
+PIP_BOOTSTRAP_ENV = "TWAT_EZ_ALLOW_PIP_BOOTSTRAP"
+
+
+@dataclass(frozen=True)
+class PipInvocation:
     """
-    Locate the pip executable. Tries `which()` first, then `ensurepip`.
+    How to run pip: the argv prefix that pip arguments are appended to.
 
-    Returns:
-        Path | None: Path to pip executable if found, None otherwise.
+    kind is "module" (python -m pip), "executable" (a pip script) or "uv"
+    (uv pip, which accepts the common pip subcommands).
     """
-    # Try to find pip using the extended which
-    pip_path = which("pip")
-    if pip_path and pip_path.exists():
-        return pip_path
 
-    # If not found, try to bootstrap pip using ensurepip
-    logging.info("pip not found via which(). Trying to ensure pip is available.")
+    argv: tuple[str, ...]
+    kind: str
+
+    def command(self, *args: str) -> list[str]:
+        """Full command line for the given pip arguments."""
+        return [*self.argv, *args]
+
+
+def _pip_bootstrap_allowed(*, allow_bootstrap: bool | None) -> bool:
+    if allow_bootstrap is not None:
+        return allow_bootstrap
+    return os.environ.get(PIP_BOOTSTRAP_ENV, "") not in ("", "0")
+
+
+def _bootstrap_pip() -> bool:
+    """Install pip with ensurepip. Slow (seconds); only run when allowed."""
+    logging.info("Bootstrapping pip with ensurepip")
     try:
         import ensurepip  # noqa: PLC0415
 
-        # Bootstrap pip. This will install pip if it's not already available.
-        # ensurepip.bootstrap() might add pip to a location that which() can find.
         ensurepip.bootstrap()
+    except Exception as e:
+        logging.warning(f"pip could not be bootstrapped via ensurepip: {e!s}")
+        return False
+    # pip is now importable and its script may be on the PATH
+    clear_module_cache()
+    which.invalidate(_is_miss)
+    return True
 
-        # After bootstrapping, try to find pip again.
-        # We also need to re-import pip if it was just bootstrapped.
-        if importlib.util.find_spec("pip") is None:
-            importlib.reload(site)  # Reload site to pick up new paths if any
 
-        # Attempt to import pip to confirm it's truly available
-        importlib.import_module("pip")
+@_timed("resolve_pip")
+@_lookup_cache(maxsize=4)
+def resolve_pip(*, allow_bootstrap: bool | None = None) -> PipInvocation | None:
+    """
+    Find the cheapest working way to run pip.
 
-        pip_path_after_bootstrap = which("pip")
-        if pip_path_after_bootstrap and pip_path_after_bootstrap.exists():
-            logging.info(f"pip found at {pip_path_after_bootstrap} after ensurepip.")
-            return pip_path_after_bootstrap
+    Tiers, in order: `sys.executable -m pip` if pip is importable (checked
+    with find_spec, without importing it), a pip executable on the extended
+    PATH, then `uv pip`. ensurepip runs only if allowed, as it takes seconds.
 
-        # As a last resort, try getting path from pip module if available
-        if (
-            pip_module_spec := importlib.util.find_spec("pip")
-        ) and pip_module_spec.origin:
-            # pip a_module.__file__ is usually an __init__.py, so go to parent dir for bin
-            pip_module_path = Path(pip_module_spec.origin).parent
-            # This heuristic might not always yield the pip executable directly
-            # e.g. pip_module_path could be .../site-packages/pip
-            # and executable could be .../bin/pip
-            # We rely on `which` being able to find it after bootstrap.
-            # This part is more of a fallback if `which` still fails.
-            if potential_pip_exe := shutil.which(
-                "pip", path=str(pip_module_path.parent / "bin")
-            ):
-                return Path(potential_pip_exe)
-            if potential_pip_exe := shutil.which("pip"):  # try global path again
-                return Path(potential_pip_exe)
-
-        logging.warning("pip could not be found or bootstrapped via ensurepip.")
-        return None
-    except ImportError:
-        logging.warning("ensurepip module not found. Cannot bootstrap pip.")
-        return None
-    except Exception as e:
-        logging.warning(f"Error during pip bootstrap or discovery: {e!s}")
+    Args:
+        allow_bootstrap: Permit ensurepip as a last resort. None defers to
+            the TWAT_EZ_ALLOW_PIP_BOOTSTRAP environment variable.
+
+    Returns:
+        PipInvocation | None: How to run pip, or None if no tier works
+    """
+    if module_available("pip"):
+        return PipInvocation((sys.executable, "-m", "pip"), "module")
+    if pip_cli := which("pip"):
+        return PipInvocation((str(pip_cli),), "executable")
+    if uv_cli := which("uv"):
+        return PipInvocation((str(uv_cli), "pip"), "uv")
+    if _pip_bootstrap_allowed(allow_bootstrap=allow_bootstrap) and _bootstrap_pip():
+        if module_available("pip"):
+            return PipInvocation((sys.executable, "-m", "pip"), "module")
+    logging.warning("No way to run pip was found")
+    return None
+
+
+@_timed("which_pip")
+@_lookup_cache(maxsize=20)
+def which_pip() -> Path | None:
+    """
+    Locate the pip executable.
+
+    Most callers should use resolve_pip(), which also works in environments
+    that only have `python -m pip`. ensurepip is run only if
+    TWAT_EZ_ALLOW_PIP_BOOTSTRAP is set. Results are persisted like
+    which_uv()'s.
+
+    Returns:
+        Path | None: Path to pip executable if found, None otherwise.
+    """
+    known, pip_path = _tool_cache_get("pip")
+    if not known:
+        pip_path = _find_pip()
+        _tool_cache_put("pip", pip_path)
+    return pip_path
+
+
+def _find_pip() -> Path | None:
+    """Search for pip, bootstrapping it if allowed."""
+    if pip_path := which("pip"):
+        return pip_path
+    if not _pip_bootstrap_allowed(allow_bootstrap=None) or not _bootstrap_pip():
         return None
+    # ensurepip installs next to the interpreter, which may not be on the PATH
+    return which("pip") or which("pip", path=str(Path(sys.executable).parent))
 
 
 ####################################
 ## EXECUTABLE SECURITY
 ####################################
-@lru_cache(maxsize=20)
+def _revalidate_which(_args: tuple, kwargs: dict[str, Any]) -> None:
+    """
+    Let a which(min_version=...) call see tools installed since its last miss.
+
+    Plain lookups rely on PATH change invalidation alone. A min_version miss
+    is a whole which_all() scan, so it is revalidated through the executable
+    index (at most every EXECUTABLE_INDEX_TTL seconds), whose rebuild drops
+    cached misses. Expired path providers are refreshed first, for all calls.
+    """
+    _refresh_expired_providers()
+    if kwargs.get("min_version") is not None:
+        executable_index()
+
+
+@_timed("which")
+@_lookup_cache(maxsize=20, revalidate=_revalidate_which)
 def which(
     cmd: str,
     mode: int = os.F_OK | os.X_OK,
     path: str | None = None,
     verify: bool = True,  # noqa: FBT001, FBT002
+    *,
+    min_version: str | tuple[int, ...] | None = None,
 ) -> Path | None:
     """
     Enhanced version of shutil.which that searches an extended set of paths.
@@ -520,33 +2432,209 @@ def which(
     Args:
         cmd: The command to search for
         mode: The mode to use when checking if a file is executable
-        path: Optional path string to use instead of building one
+        path: Optional path string to search instead of the extended PATH
         verify: Whether to perform security verification
+        min_version: Skip matches older than this, e.g. "2.40". All matches
+            are probed in parallel; see tool_version().
 
     Returns:
         Path | None: Full path to the command if found, None otherwise
     """
-    if path is None:
-        path = build_extended_path()
+    if min_version is not None:
+        # which_all() revalidates its directory snapshots on every call
+        candidates = [
+            match.path
+            for match in which_all(cmd, path)
+            if (match.safe or not verify) and os.access(match.path, mode)
+        ]
+        for candidate, version in zip(
+            candidates, tool_versions(candidates), strict=True
+        ):
+            if version_satisfies(version, min_version):
+                return candidate
+        return None
+
+    dirs = (
+        extended_path_entries()
+        if path is None
+        else _normalize_dirs(path.split(os.pathsep), remember=False)
+    )
 
-    if result := shutil.which(cmd, mode=mode, path=path):
+    if result := _find_executable(cmd, mode, dirs):
         result_path = Path(result)
 
+        # _find_executable() has already checked existence and access(); the
+        # verification stat is the only extra syscall on a hit
         if verify:
             is_safe, reason = verify_executable(result_path)
             if not is_safe:
                 if os.environ.get("CLIFIND_DEBUG"):
-                    pass
+                    logging.debug(f"Rejected {result_path}: {reason}")
                 return None
 
-        if result_path.exists():
-            return result_path
+        return result_path
 
     return None
 
 
-@lru_cache(maxsize=20)
-def build_extended_path() -> str:
+class _ExtendedPath:
+    """
+    The extended PATH as ordered segments plus their de-duplicated union.
+
+    Segments (the environment PATH, XDG, system and default paths, then one
+    per provider) can be inserted, replaced or removed without re-running the
+    other segments' sources. Directory existence checks are memoized, so a
+    change costs no syscalls for directories already seen. Appending a
+    segment, the common case for new providers, is O(new paths).
+
+    dirs is a tuple of interned strings. It is replaced, never mutated, so
+    callers may hold on to it and compare it by identity.
+    """
+
+    def __init__(self, segments: list[tuple[object, tuple[str, ...]]]) -> None:
+        self.segments = segments
+        self._is_dir: dict[str, bool] = {}
+        self.dirs = self._union()
+
+    def _exists(self, directory: str) -> bool:
+        if (known := self._is_dir.get(directory)) is None:
+            known = self._is_dir[directory] = os.path.isdir(directory)
+        return known
+
+    def _union(self) -> tuple[str, ...]:
+        seen: set[str] = set()
+        dirs = []
+        for _, paths in self.segments:
+            for path in paths:
+                if path not in seen:
+                    seen.add(path)
+                    if self._exists(path):
+                        dirs.append(path)
+        return tuple(dirs)
+
+    def _index(self, key: object) -> int | None:
+        for index, (segment_key, _) in enumerate(self.segments):
+            if segment_key is key:
+                return index
+        return None
+
+    def insert(
+        self, key: object, paths: tuple[str, ...], index: int
+    ) -> tuple[str, ...]:
+        """Insert a segment at index. Returns the previous directory list."""
+        old_dirs = self.dirs
+        self.segments.insert(index, (key, paths))
+        if index == len(self.segments) - 1:
+            present = set(old_dirs)
+            added = tuple(
+                path
+                for path in dict.fromkeys(paths)
+                if path not in present and self._exists(path)
+            )
+            self.dirs = old_dirs + added
+        else:
+            self.dirs = self._union()
+        return old_dirs
+
+    def remove(self, key: object) -> tuple[str, ...]:
+        """Remove a segment if present. Returns the previous directory list."""
+        old_dirs = self.dirs
+        if (index := self._index(key)) is not None:
+            del self.segments[index]
+            self.dirs = self._union()
+        return old_dirs
+
+    def replace(self, key: object, paths: tuple[str, ...]) -> tuple[str, ...]:
+        """Swap a segment's paths in place. Returns the previous directory list."""
+        old_dirs = self.dirs
+        if (index := self._index(key)) is not None:
+            self.segments[index] = (key, paths)
+            self.dirs = self._union()
+        return old_dirs
+
+
+# Names of the segments that precede provider segments
+_BASE_SEGMENTS = ("env", "xdg", "system", "defpath")
+
+# The current extended PATH, built lazily by build_extended_path()
+_extended_path: _ExtendedPath | None = None
+
+
+# Raw PATH entry -> its normalized, interned form. Emptied by
+# clear_path_cache() and whenever it reaches _NORMALIZED_DIRS_MAX entries.
+_normalized_dirs: dict[str, str] = {}
+_NORMALIZED_DIRS_MAX = 1024
+
+
+def _normalize_dir(entry: str | Path) -> str:
+    raw = os.fspath(entry)
+    if (normalized := _normalized_dirs.get(raw)) is None:
+        if len(_normalized_dirs) >= _NORMALIZED_DIRS_MAX:
+            _normalized_dirs.clear()
+        normalized = _normalized_dirs[raw] = sys.intern(str(Path(raw)))
+    return normalized
+
+
+def _normalize_dirs(
+    paths: Iterable[str | Path], *, remember: bool = True
+) -> tuple[str, ...]:
+    """
+    Normalize directory entries the way Path() does, dropping empty ones.
+
+    Each distinct PATH entry is normalized once and interned, so rebuilding
+    the PATH allocates no Path objects for entries seen before and equal
+    directories share one string. One-off entries, such as a path=
+    argument, are passed with remember=False and do not grow the table.
+    """
+    if not remember:
+        return tuple(str(Path(p)) for p in paths if p)
+    return tuple(_normalize_dir(p) for p in paths if p)
+
+
+def _base_segments() -> list[tuple[object, tuple[str, ...]]]:
+    """Evaluate the built-in PATH segments."""
+    return [
+        ("env", _normalize_dirs(os.environ.get("PATH", "").split(os.pathsep))),
+        ("xdg", _normalize_dirs(get_xdg_paths())),
+        ("system", _normalize_dirs(get_system_specific_paths())),
+        ("defpath", _normalize_dirs(os.defpath.split(os.pathsep))),
+    ]
+
+
+def _apply_path_change(old_dirs: tuple[str, ...]) -> None:
+    """
+    Propagate an incremental PATH change to the caches that depend on it.
+
+    Cached which() results are kept unless the change can affect them: a
+    hit stays valid while its directory is still present and no directory
+    moved ahead of it; misses are dropped on any change.
+    """
+    if _extended_path is None or (new_dirs := _extended_path.dirs) == old_dirs:
+        return
+    build_extended_path.cache_clear()
+    old_pos = {d: i for i, d in enumerate(old_dirs)}
+    new_pos = {d: i for i, d in enumerate(new_dirs)}
+
+    def stale(args: tuple, kwargs: dict[str, Any], result: Path | None) -> bool:
+        explicit_path = args[2] if len(args) > 2 else kwargs.get("path")  # noqa: PLR2004
+        if explicit_path is not None:
+            return False
+        if result is None:
+            return True
+        directory = os.path.dirname(os.fspath(result))
+        if directory not in new_pos or directory not in old_pos:
+            return True
+        before_old, before_new = old_pos[directory], new_pos[directory]
+        return any(
+            old_pos.get(d, before_old) >= before_old for d in new_dirs[:before_new]
+        )
+
+    which.invalidate(stale)
+
+
+@_timed("build_extended_path")
+@_lookup_cache(maxsize=20, revalidate=lambda _a, _k: _refresh_expired_providers())
+def build_extended_path() -> str:
     """
     Build a comprehensive PATH string combining:
     1. Current PATH
@@ -555,64 +2643,732 @@ def build_extended_path() -> str:
     4. Default Python paths
     5. Custom provider paths
 
+    The underlying structure is kept between calls; registering or removing
+    a provider updates it incrementally. clear_path_cache() discards it.
+
     Returns:
         str: os.pathsep-separated path string
+
+    extended_path_entries() returns the same directories without the join.
+    """
+    with _providers_lock:
+        return os.pathsep.join(_ensure_extended_path().dirs)
+
+
+def _ensure_extended_path() -> _ExtendedPath:
+    """Return the extended PATH, building it if needed. Hold _providers_lock."""
+    global _extended_path  # noqa: PLW0603
+    if _extended_path is None:
+        segments = _base_segments()
+        segments.extend(_provider_paths())
+        _extended_path = _ExtendedPath(segments)
+    return _extended_path
+
+
+def clear_path_cache() -> None:
+    """
+    Clear the cached PATH. Call this if environment variables change.
+
+    The PATH is rebuilt on next use (provider results stay cached, see
+    register_path_provider()); cached which() results are dropped.
+    """
+    global _extended_path  # noqa: PLW0603
+    with _providers_lock:
+        _extended_path = None
+        _normalized_dirs.clear()
+    build_extended_path.cache_clear()
+    which.cache_clear()
+    _dir_verdict_cache.clear()
+
+
+def extended_path_entries() -> tuple[str, ...]:
+    """
+    Get the directories of the extended PATH, in search order.
+
+    This is the structure build_extended_path() joins: existing directories
+    only, de-duplicated, as interned strings. The tuple is shared and
+    replaced whenever the PATH changes, so a PATH change does not alter a
+    tuple already handed out.
+
+    Returns:
+        tuple[str, ...]: Directory paths
+    """
+    _refresh_expired_providers()
+    if (current := _extended_path) is not None:
+        return current.dirs
+    with _providers_lock:
+        return _ensure_extended_path().dirs
+
+
+####################################
+## EXECUTABLE INDEX
+####################################
+@dataclass(frozen=True)
+class _DirSnapshot:
+    """Executable names found in one directory at a given mtime."""
+
+    mtime_ns: int
+    names: tuple[str, ...]  # Sorted
+
+    def __contains__(self, name: object) -> bool:
+        if not isinstance(name, str):
+            return False
+        position = bisect_left(self.names, name)
+        return position < len(self.names) and self.names[position] == name
+
+
+# Directory path -> last scan; reused while the directory's mtime is unchanged
+_dir_snapshots: dict[str, _DirSnapshot] = {}
+
+_executable_index: ExecutableIndex | None = None
+# Snapshots the index was built from, one per directory, and when their
+# directories' mtimes were last checked
+_executable_index_snapshots: tuple[_DirSnapshot | None, ...] = ()
+_executable_index_checked = 0.0
+
+EXECUTABLE_INDEX_TTL = 1.0  # Seconds before directory mtimes are checked again
+
+_DEFAULT_PATHEXT = ".COM;.EXE;.BAT;.CMD"
+
+
+def _pathext() -> list[str]:
+    """Lower-cased executable extensions from PATHEXT, in priority order."""
+    exts = os.environ.get("PATHEXT", _DEFAULT_PATHEXT).split(os.pathsep)
+    return list(dict.fromkeys(ext.lower() for ext in exts if ext))
+
+
+def _scan_directory(directory: str) -> _DirSnapshot | None:
+    """
+    List the executables in a directory, reusing the previous scan if the
+    directory's mtime has not changed.
+
+    Note that chmod on a file does not change its directory's mtime; use
+    clear_executable_index() after changing permissions in place.
+    """
+    try:
+        dir_mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+    cached = _dir_snapshots.get(directory)
+    if cached is not None and cached.mtime_ns == dir_mtime:
+        return cached
+
+    windows = platform.system() == "Windows"
+    pathext = set(_pathext())
+    names = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if windows:
+                        name = os.path.normcase(entry.name)
+                        if os.path.splitext(name)[1] in pathext:
+                            names.append(sys.intern(name))
+                        continue
+                    mode = entry.stat().st_mode
+                except OSError:
+                    continue
+                if stat.S_ISREG(mode) and mode & 0o111:
+                    names.append(sys.intern(entry.name))
+    except OSError:
+        return None
+    names.sort()
+    snapshot = _DirSnapshot(dir_mtime, tuple(names))
+    _dir_snapshots[directory] = snapshot
+    return snapshot
+
+
+def _version_key(name: str, base: str) -> tuple[int, ...]:
+    """Numeric sort key for the version suffix of name, e.g. python3.11."""
+    return tuple(int(part) for part in re.findall(r"\d+", name[len(base) :]))
+
+
+class ExecutableIndex:
+    """
+    Compact index of every executable name across the extended PATH.
+
+    Names are held once, interned, in a sorted list; the directories that
+    provide each name are stored as small integers in packed arrays, in
+    PATH precedence order, so the first entry is the one which() picks.
+    Lookups and prefix queries are binary searches.
+    """
+
+    def __init__(self, dirs: tuple[str, ...], names_per_dir: list[tuple[str, ...]]):
+        providers: dict[str, list[int]] = {}
+        for dir_id, names in enumerate(names_per_dir):
+            for name in names:
+                providers.setdefault(name, []).append(dir_id)
+
+        self.dirs = dirs
+        self._names = sorted(providers)
+        self._offsets = array("I", [0])
+        self._dir_ids = array("H" if len(dirs) <= 0xFFFF else "I")  # noqa: PLR2004
+        for name in self._names:
+            self._dir_ids.extend(providers[name])
+            self._offsets.append(len(self._dir_ids))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._find(name) is not None
+
+    def _find(self, name: str) -> int | None:
+        position = bisect_left(self._names, name)
+        if position < len(self._names) and self._names[position] == name:
+            return position
+        return None
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        start = bisect_left(self._names, prefix)
+        end = start
+        while end < len(self._names) and self._names[end].startswith(prefix):
+            end += 1
+        return start, end
+
+    def _providers_of(self, name: str) -> list[int]:
+        if (position := self._find(name)) is None:
+            return []
+        return list(
+            self._dir_ids[self._offsets[position] : self._offsets[position + 1]]
+        )
+
+    def locate(self, name: str) -> Path | None:
+        """Return the winning (first) location of name, or None."""
+        if (position := self._find(name)) is None:
+            return None
+        return Path(self.dirs[self._dir_ids[self._offsets[position]]], name)
+
+    def locate_all(self, name: str) -> list[Path]:
+        """Return every location of name, in PATH precedence order."""
+        return [Path(self.dirs[dir_id], name) for dir_id in self._providers_of(name)]
+
+    def prefix(self, prefix: str) -> list[str]:
+        """Return all executable names starting with prefix, sorted."""
+        start, end = self._range(prefix)
+        return self._names[start:end]
+
+    def glob(self, pattern: str) -> list[str]:
+        """Return all executable names matching a shell-style pattern, sorted."""
+        literal = re.split(r"[*?\[]", pattern, maxsplit=1)[0]
+        start, end = self._range(literal)
+        return fnmatch.filter(self._names[start:end], pattern)
+
+    def versions(self, base: str) -> list[str]:
+        """
+        Return base and its versioned variants, oldest first.
+
+        versions("python3") gives e.g. ["python3", "python3.11", "python3.12"].
+        """
+        pattern = re.compile(re.escape(base) + r"(?:[.-]?\d+)*")
+        matches = [name for name in self.prefix(base) if pattern.fullmatch(name)]
+        return sorted(matches, key=lambda name: _version_key(name, base))
+
+
+def executable_index(*, refresh: bool = False) -> ExecutableIndex:
+    """
+    Get the index of executables on the extended PATH.
+
+    The index is reused while the extended PATH is unchanged. At most every
+    EXECUTABLE_INDEX_TTL seconds, an access stats each directory and
+    rescans those whose mtime changed; the index is rebuilt only if a
+    directory's contents did change.
+
+    Args:
+        refresh: Check directory mtimes now, regardless of the TTL
+
+    Returns:
+        ExecutableIndex: Index for the current extended PATH
+    """
+    global _executable_index, _executable_index_snapshots  # noqa: PLW0603
+    global _executable_index_checked  # noqa: PLW0603
+    with _providers_lock:
+        dirs = extended_path_entries()
+        now = time.monotonic()
+        index = _executable_index
+        if index is not None and index.dirs is not dirs:
+            index = None
+        if (
+            index is not None
+            and not refresh
+            and now - _executable_index_checked < EXECUTABLE_INDEX_TTL
+        ):
+            return index
+        snapshots = tuple(_scan_directory(directory) for directory in dirs)
+        if index is None or any(
+            new is not old
+            for new, old in zip(snapshots, _executable_index_snapshots, strict=True)
+        ):
+            index = _executable_index = ExecutableIndex(
+                dirs,
+                [snapshot.names if snapshot else () for snapshot in snapshots],
+            )
+            _executable_index_snapshots = snapshots
+            # A directory gained or lost executables: a cached miss may be wrong
+            which.invalidate(_is_miss)
+        _executable_index_checked = now
+        return index
+
+
+def clear_executable_index() -> None:
+    """Drop the executable index and all directory snapshots."""
+    global _executable_index, _executable_index_snapshots  # noqa: PLW0603
+    with _providers_lock:
+        _dir_snapshots.clear()
+        _executable_index = None
+        _executable_index_snapshots = ()
+
+
+class WhichMatch(NamedTuple):
+    """One location of a command, with its verification verdict."""
+
+    path: Path
+    safe: bool
+    reason: str
+
+
+def _command_names(cmd: str) -> list[str]:
+    """Names cmd may have on disk: itself, or with each PATHEXT suffix on Windows."""
+    if platform.system() != "Windows":
+        return [cmd]
+    cmd = os.path.normcase(cmd)
+    pathext = _pathext()
+    if os.path.splitext(cmd)[1] in pathext:
+        return [cmd]
+    return [cmd + ext for ext in pathext]
+
+
+def _find_executable(cmd: str, mode: int, dirs: Iterable[str]) -> str | None:
     """
-    # Start with current PATH
-    current_path = [Path(p) for p in os.environ.get("PATH", "").split(os.pathsep) if p]
+    Search dirs for cmd with the checks shutil.which() makes.
 
-    # Collect all potential paths
-    all_paths: list[Path] = []
-    all_paths.extend(current_path)
-    all_paths.extend(get_xdg_paths())  # Now returns Path objects directly
-    all_paths.extend(get_system_specific_paths())  # Now returns Path objects directly
-    all_paths.extend(Path(p) for p in os.defpath.split(os.pathsep) if p)
+    A miss costs one stat() per directory and name. On Windows each PATHEXT
+    suffix is tried; unlike shutil.which(), the current directory is only
+    searched if it is one of dirs.
 
-    # Add paths from custom providers
-    for provider in _path_providers:
+    Returns:
+        str | None: Path of the first match
+    """
+    names = _command_names(cmd)
+    candidates: Iterable[str] = names
+    if not os.path.dirname(cmd):
+        candidates = (os.path.join(d, name) for d in dirs for name in names)
+    for candidate in candidates:
         try:
-            all_paths.extend(Path(p) for p in provider())
-        except Exception:
-            if os.environ.get("CLIFIND_DEBUG"):
-                pass
+            st_mode = os.stat(candidate).st_mode
+        except (OSError, ValueError):
+            continue
+        if not stat.S_ISDIR(st_mode) and os.access(candidate, mode):
+            return candidate
+    return None
 
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_paths = []
-    for path in all_paths:
-        if path and str(path) not in seen and path.is_dir():
-            seen.add(str(path))
-            unique_paths.append(path)
 
-    return os.pathsep.join(str(p) for p in unique_paths)
+@_timed("which_all")
+def which_all(cmd: str, path: str | None = None) -> list[WhichMatch]:
+    """
+    Find every location of a command, including the ones which() would skip.
 
+    Matches come from the same directory snapshots as executable_index(),
+    revalidated on every call, and are checked with verify_executables().
+    Repeated audits stat each directory, rescan only those whose mtime
+    changed, and stat each match once.
 
-def clear_path_cache() -> None:
-    """Clear the cached PATH. Call this if environment variables change."""
-    build_extended_path.cache_clear()
+    Args:
+        cmd: The command to search for
+        path: Optional path string to use instead of the extended PATH
+
+    Returns:
+        list[WhichMatch]: Every match in precedence order; the first safe
+            one is what which() returns
+    """
+    names = _command_names(cmd)
+    found: list[Path] = []
+    if os.path.dirname(cmd):
+        found = [Path(cmd)] if os.path.isfile(cmd) else []
+    elif path is None:
+        index = executable_index(refresh=True)
+        ranked = sorted(
+            (dir_id, order, name)
+            for order, name in enumerate(names)
+            for dir_id in index._providers_of(name)
+        )
+        found = [Path(index.dirs[dir_id], name) for dir_id, _, name in ranked]
+    else:
+        dirs = _normalize_dirs(path.split(os.pathsep), remember=False)
+        for directory in dict.fromkeys(dirs):
+            snapshot = _scan_directory(directory)
+            if snapshot is not None:
+                found.extend(
+                    Path(directory, name) for name in names if name in snapshot
+                )
+
+    verdicts = verify_executables(found)
+    return [
+        WhichMatch(match, safe, reason)
+        for match, (safe, reason) in zip(found, verdicts, strict=True)
+    ]
 
 
 ###############################
-## DECORATORS & MAIN FUNCTION
+## MODULE AVAILABILITY
 ###############################
 """
-Application entry points and dependency management decorators:
-- needs(): Auto-install decorator
-- main(): CLI entry point
+Cached module discovery for the needs() decorator:
+- sys.path fingerprinting
+- Optional persistence across runs
 """
 
+# Set to "1" to persist under get_cache_dir(), or to an explicit file path
+MODULE_CACHE_ENV = "TWAT_EZ_MODULE_CACHE"
 
-def _install_with_uv(missing: list[str], target: bool) -> None:
+# Module name -> availability, valid only for _module_cache_fingerprint
+_module_cache: dict[str, bool] = {}
+_module_cache_fingerprint: str | None = None
+_module_cache_loaded = False
+
+
+def _sys_path_fingerprint() -> str:
     """
-    Install missing packages using UV package manager.
+    Fingerprint the interpreter, sys.path and the mtimes of its directories.
+
+    Installing or removing a top-level package changes the mtime of the
+    directory it lives in, so the fingerprint moves whenever the answer of
+    find_spec() for a top-level name could have changed.
+
+    Returns:
+        str: Hex digest identifying the current import environment
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{sys.executable}\0{sys.version}".encode())
+    for entry in sys.path:
+        try:
+            mtime = os.stat(entry or os.curdir).st_mtime_ns
+        except OSError:
+            mtime = -1
+        digest.update(f"\n{entry}\0{mtime}".encode(errors="surrogateescape"))
+    return digest.hexdigest()
+
+
+def _module_cache_file() -> Path | None:
+    """Return the persistence file for the module cache, if enabled."""
+    return _cache_file_from_env(MODULE_CACHE_ENV, "modules.json")
+
+
+def _load_module_cache(fingerprint: str) -> None:
+    """Populate the in-memory module cache from disk if it matches."""
+    global _module_cache_loaded  # noqa: PLW0603
+    _module_cache_loaded = True
+    if not (cache_file := _module_cache_file()):
+        return
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return
+    if isinstance(data, dict) and data.get("fingerprint") == fingerprint:
+        modules = data.get("modules", {})
+        _module_cache.update({str(k): bool(v) for k, v in modules.items()})
+
+
+def _save_module_cache(fingerprint: str) -> None:
+    """Write the in-memory module cache to disk if persistence is enabled."""
+    if not (cache_file := _module_cache_file()):
+        return
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(
+            json.dumps({"fingerprint": fingerprint, "modules": _module_cache}),
+            encoding="utf-8",
+        )
+        tmp_file.replace(cache_file)
+    except OSError as e:
+        logging.debug(f"Could not persist module cache: {e!s}")
+
+
+def modules_available(modules: list[str]) -> dict[str, bool]:
+    """
+    Check whether modules can be imported, using the availability cache.
+
+    Already-imported modules are answered from sys.modules. Everything else
+    is looked up with importlib.util.find_spec() once per sys.path
+    fingerprint; the fingerprint is computed once per call.
 
     Args:
-        missing: List of package names to install
-        target: If True, install to UV_INSTALL_TARGET path, otherwise to Python environment
+        modules: Module names to check
+
+    Returns:
+        dict[str, bool]: Availability per module name
+    """
+    global _module_cache_fingerprint  # noqa: PLW0603
+    result: dict[str, bool] = {}
+    pending = []
+    for mod in modules:
+        if sys.modules.get(mod) is not None:
+            result[mod] = True
+        else:
+            pending.append(mod)
+    if not pending:
+        return result
+
+    fingerprint = _sys_path_fingerprint()
+    if fingerprint != _module_cache_fingerprint:
+        _module_cache.clear()
+        _module_cache_fingerprint = fingerprint
+        _load_module_cache(fingerprint)
+    elif not _module_cache_loaded:
+        _load_module_cache(fingerprint)
+
+    dirty = False
+    for mod in pending:
+        if mod not in _module_cache:
+            try:
+                _module_cache[mod] = bool(importlib.util.find_spec(mod))
+            except (ImportError, ValueError):
+                _module_cache[mod] = False
+            dirty = True
+        result[mod] = _module_cache[mod]
+
+    if dirty:
+        _save_module_cache(fingerprint)
+    return result
+
+
+def module_available(mod: str) -> bool:
+    """Check whether a single module can be imported. See modules_available()."""
+    return modules_available([mod])[mod]
+
+
+def clear_module_cache() -> None:
+    """Forget cached module availability. Call this after installing packages."""
+    global _module_cache_fingerprint, _module_cache_loaded  # noqa: PLW0603
+    _module_cache.clear()
+    _module_cache_fingerprint = None
+    _module_cache_loaded = False
+    if cache_file := _module_cache_file():
+        try:
+            cache_file.unlink(missing_ok=True)
+        except OSError as e:
+            logging.debug(f"Could not remove module cache: {e!s}")
+    importlib.invalidate_caches()
+
+
+####################################
+## INSTALL LOCK
+####################################
+INSTALL_LOCK_TIMEOUT = 600.0  # Seconds to wait for another process's install
+INSTALL_LOCK_STALE_AFTER = 1800.0  # Seconds after which any lock is abandoned
+_INSTALL_LOCK_POLL = 0.1
+
+
+def _install_lock_path(target: bool) -> Path:  # noqa: FBT001
+    """Lock file guarding installs into one destination."""
+    destination = str(get_install_target()) if target else sys.executable
+    digest = hashlib.blake2b(destination.encode(), digest_size=8).hexdigest()
+    return get_cache_dir() / "locks" / f"install-{digest}.lock"
+
+
+def _pid_alive(pid: int) -> bool:
+    """Whether a local process exists. Unknown means alive."""
+    if pid <= 0:
+        return False
+    if platform.system() == "Windows":
+        # os.kill() would terminate the process; rely on the lock's age
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _lock_is_stale(fd: int, stale_after: float) -> bool:
+    """A lock is stale if it is too old or its holder died on this host."""
+    age = time.time() - os.fstat(fd).st_mtime
+    try:
+        owner = json.loads(os.read(fd, 4096))
+    except (OSError, ValueError):
+        # Being written right now, or corrupt: only age can tell
+        owner = {}
+    if not isinstance(owner, dict):
+        owner = {}
+    if age > stale_after:
+        return True
+    return owner.get("host") == platform.node() and not _pid_alive(
+        int(owner.get("pid", 0))
+    )
+
+
+def _remove_stale_lock(path: Path, stale_after: float) -> None:
+    """
+    Remove the lock file at path if it is stale.
+
+    On POSIX, holders keep their lock file flock()ed, so the staleness check
+    runs under flock() and only unlinks the file it checked: two waiters
+    cannot both break one stale lock, and neither can remove the fresh lock
+    that replaced it. On Windows, a holder's open handle makes the unlink
+    fail.
+    """
+    windows = platform.system() == "Windows"
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        if not windows:
+            import fcntl  # noqa: PLC0415
+
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return  # Held by a live process
+        if not _lock_is_stale(fd, stale_after):
+            return
+        if os.stat(path).st_ino != os.fstat(fd).st_ino:
+            return  # Replaced since it was opened
+        logging.warning(f"Removing stale install lock {path}")
+        if not windows:
+            os.unlink(path)
+            return
+    except OSError:
+        return
+    finally:
+        os.close(fd)
+    # Windows cannot delete a file while it is open, including by us
+    with contextlib.suppress(OSError):
+        os.unlink(path)
+
+
+def _try_install_lock(path: Path, stale_after: float) -> int | None:
+    """
+    Try once to create the lock file, removing a stale one.
+
+    Returns:
+        int | None: Descriptor of the held lock file, to pass to
+            _release_install_lock(); None if the lock is taken
+    """
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_RDWR, 0o644)
+    except FileExistsError:
+        _remove_stale_lock(path, stale_after)
+        return None
+    if platform.system() != "Windows":
+        import fcntl  # noqa: PLC0415
+
+        # Blocks only while a waiter inspects the new file
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    owner = {"pid": os.getpid(), "host": platform.node(), "time": time.time()}
+    os.write(fd, json.dumps(owner).encode())
+    return fd
+
+
+def _release_install_lock(path: Path, fd: int) -> None:
+    """Remove the lock file, then close it; on Windows, the other way round."""
+    windows = platform.system() == "Windows"
+    if windows:
+        os.close(fd)
+    with contextlib.suppress(FileNotFoundError):
+        path.unlink()
+    if not windows:
+        os.close(fd)
+
+
+def _install_lock_timeout(path: Path, start: float, timeout: float) -> TimeoutError:
+    """Report a timed out lock wait and build the error to raise."""
+    _emit_timing("install_lock_wait", start, target=str(path), outcome="timeout")
+    msg = f"Timed out after {timeout}s waiting for install lock {path}"
+    return TimeoutError(msg)
+
+
+@contextlib.contextmanager
+def install_lock(
+    path: Path,
+    *,
+    timeout: float = INSTALL_LOCK_TIMEOUT,
+    stale_after: float = INSTALL_LOCK_STALE_AFTER,
+) -> Iterator[float]:
+    """
+    Hold an exclusive, cross-process lock file for the duration of an install.
+
+    The lock is a file created with O_EXCL and holding the owner's pid, host
+    and start time; on POSIX the holder also keeps it flock()ed. Locks left
+    behind by dead processes on this host, or older than stale_after, are
+    removed, but never while another process still holds the flock(). The
+    wait is reported to timing hooks as an "install_lock_wait" event.
+
+    Args:
+        path: Lock file path
+        timeout: Seconds to wait before giving up
+        stale_after: Seconds after which a lock is considered abandoned
+
+    Yields:
+        float: Seconds spent waiting for the lock; 0.0 if it was free
 
     Raises:
-        RuntimeError: If UV installation fails
+        TimeoutError: If the lock is not acquired within timeout
     """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    contended = False
+    while (fd := _try_install_lock(path, stale_after)) is None:
+        contended = True
+        if time.monotonic() >= deadline:
+            raise _install_lock_timeout(path, start, timeout)
+        time.sleep(_INSTALL_LOCK_POLL)
+    waited = time.perf_counter() - start if contended else 0.0
+    _emit_timing("install_lock_wait", start, target=str(path))
+    try:
+        yield waited
+    finally:
+        _release_install_lock(path, fd)
+
+
+@contextlib.asynccontextmanager
+async def async_install_lock(
+    path: Path,
+    *,
+    timeout: float = INSTALL_LOCK_TIMEOUT,
+    stale_after: float = INSTALL_LOCK_STALE_AFTER,
+) -> AsyncIterator[float]:
+    """
+    Asynchronous install_lock(): waiting yields to the event loop.
+
+    Uses the same lock file as install_lock(), so sync and async callers in
+    any process exclude each other.
+    """
+    import asyncio  # noqa: PLC0415
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    deadline = time.monotonic() + timeout
+    contended = False
+    while (fd := _try_install_lock(path, stale_after)) is None:
+        contended = True
+        if time.monotonic() >= deadline:
+            raise _install_lock_timeout(path, start, timeout)
+        await asyncio.sleep(_INSTALL_LOCK_POLL)
+    waited = time.perf_counter() - start if contended else 0.0
+    _emit_timing("install_lock_wait", start, target=str(path))
+    try:
+        yield waited
+    finally:
+        _release_install_lock(path, fd)
+
+
+###############################
+## DECORATORS & MAIN FUNCTION
+###############################
+"""
+Application entry points and dependency management decorators:
+- needs(): Auto-install decorator
+- main(): CLI entry point
+"""
+
+
+def _uv_install_command(missing: list[str], target: bool) -> list[str]:  # noqa: FBT001
+    """Build the uv command installing missing packages."""
     uv_cli = which_uv()
     if not uv_cli:
         msg = "UV package manager not found and could not be installed"
@@ -620,17 +3376,114 @@ def _install_with_uv(missing: list[str], target: bool) -> None:
 
     cmd = [str(uv_cli), "pip", "install"]
     if target:
-        cmd.extend(["--target", str(UV_INSTALL_TARGET)])
+        cmd.extend(["--target", str(get_install_target())])
     else:
         cmd.extend(["--python", sys.executable])
     cmd.extend(missing)
+    return cmd
 
-    result = subprocess.run(cmd, check=True, capture_output=True, text=True)  # noqa: S603
 
-    if result.stdout:
-        logging.debug(f"UV install output: {result.stdout}")
+@_timed("_install_with_uv")
+def _install_with_uv(missing: list[str], target: bool) -> None:
+    """
+    Install missing packages using UV package manager.
+
+    Args:
+        missing: List of package names to install
+        target: If True, install to UV_INSTALL_TARGET path, otherwise to Python environment
+
+    Raises:
+        RuntimeError: If UV installation fails
+    """
+    cmd = _uv_install_command(missing, target)
+    report = UvInstallReport()
+    run_streamed(
+        cmd, timeout=UV_INSTALL_TIMEOUT, on_line=lambda _, line: report.feed(line)
+    )
+    report.emit()
 
+    # New distributions invalidate both our cache and the path finders' caches
+    clear_module_cache()
 
+
+async def _stop_process(
+    process: asyncio.subprocess.Process, readers: asyncio.Future[Any]
+) -> None:
+    """Kill a subprocess, wait for it and discard its output readers."""
+    import asyncio  # noqa: PLC0415
+
+    readers.cancel()
+    if process.returncode is None:
+        process.kill()
+    await process.wait()
+    with contextlib.suppress(asyncio.CancelledError, Exception):
+        await readers
+
+
+async def _install_with_uv_async(missing: list[str], target: bool) -> None:  # noqa: FBT001
+    """
+    Install missing packages with uv without blocking the event loop.
+
+    uv's output is parsed and logged line by line as it arrives.
+
+    Raises:
+        RuntimeError: If uv is not available
+        subprocess.CalledProcessError: If uv fails
+        subprocess.TimeoutExpired: If uv runs longer than UV_INSTALL_TIMEOUT
+    """
+    import asyncio  # noqa: PLC0415
+
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        # which_uv() may itself install uv, so keep it off the event loop
+        cmd = await asyncio.to_thread(_uv_install_command, missing, target)
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        report = UvInstallReport()
+        stderr_tail: deque[str] = deque(maxlen=STREAM_TAIL_LINES)
+
+        async def pump(stream: asyncio.StreamReader, tail: deque[str] | None) -> None:
+            async for raw in stream:
+                line = raw.decode(errors="replace").rstrip("\r\n")
+                report.feed(line)
+                if tail is not None:
+                    tail.append(line)
+
+        assert process.stdout is not None  # noqa: S101
+        assert process.stderr is not None  # noqa: S101
+        readers = asyncio.gather(
+            pump(process.stdout, None), pump(process.stderr, stderr_tail)
+        )
+        try:
+            try:
+                await asyncio.wait_for(readers, UV_INSTALL_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise subprocess.TimeoutExpired(
+                    cmd, UV_INSTALL_TIMEOUT, stderr="\n".join(stderr_tail)
+                ) from None
+            returncode = await process.wait()
+        except BaseException:
+            # Also on cancellation: uv must be gone before the caller
+            # releases the install lock
+            await _stop_process(process, readers)
+            raise
+        if returncode:
+            raise subprocess.CalledProcessError(
+                returncode, cmd, stderr="\n".join(stderr_tail)
+            )
+        report.emit()
+    except BaseException as e:
+        outcome = f"error:{type(e).__name__}"
+        raise
+    finally:
+        _emit_timing("_install_with_uv", start, outcome=outcome)
+
+    clear_module_cache()
+
+
+@_timed("_import_modules")
 def _import_modules(modules: list[str]) -> None:
     """
     Import modules, raising clear errors if imports fail.
@@ -649,10 +3502,88 @@ def _import_modules(modules: list[str]) -> None:
             raise RuntimeError(msg) from e
 
 
+def _missing_modules(mods: list[str]) -> list[str]:
+    available = modules_available(mods)
+    return [m for m in mods if not available[m]]
+
+
+def _unlocked_install(error: OSError) -> float:
+    """Report that the install lock cannot be used; installs proceed without it."""
+    logging.warning(f"Installing without the install lock: {error}")
+    return 0.0
+
+
+def _enter_install_lock(stack: contextlib.ExitStack, *, target: bool) -> float:
+    """Hold the install lock until stack closes; seconds waited for it."""
+    try:
+        return stack.enter_context(install_lock(_install_lock_path(target)))
+    except TimeoutError:
+        raise
+    except OSError as e:
+        return _unlocked_install(e)
+
+
+async def _enter_install_lock_async(
+    stack: contextlib.AsyncExitStack, *, target: bool
+) -> float:
+    """Asynchronous _enter_install_lock()."""
+    try:
+        return await stack.enter_async_context(
+            async_install_lock(_install_lock_path(target))
+        )
+    except TimeoutError:
+        raise
+    except OSError as e:
+        return _unlocked_install(e)
+
+
+def _ensure_modules(mods: list[str], target: bool) -> None:  # noqa: FBT001
+    """
+    Install and import whichever of mods are missing.
+
+    The install runs under the install lock; if the lock file cannot be
+    created (an unusable cache directory), it runs without it.
+    """
+    if not (missing := _missing_modules(mods)):
+        return
+    with contextlib.ExitStack() as stack:
+        waited = _enter_install_lock(stack, target=target)
+        if waited:
+            # Another process may have installed them meanwhile
+            clear_module_cache()
+        if still_missing := _missing_modules(missing):
+            _install_with_uv(still_missing, target)
+    _import_modules(missing)
+
+
+async def _ensure_modules_async(mods: list[str], target: bool) -> None:  # noqa: FBT001
+    """Asynchronous _ensure_modules(), sharing its lock and module cache."""
+    if not (missing := _missing_modules(mods)):
+        return
+    async with contextlib.AsyncExitStack() as stack:
+        waited = await _enter_install_lock_async(stack, target=target)
+        if waited:
+            clear_module_cache()
+        if still_missing := _missing_modules(missing):
+            await _install_with_uv_async(still_missing, target)
+    _import_modules(missing)
+
+
+def _install_error(e: Exception) -> RuntimeError:
+    """Wrap an installation failure for @needs callers."""
+    if isinstance(e, subprocess.CalledProcessError):
+        return RuntimeError(f"UV installation failed: {e.stderr}")
+    return RuntimeError(f"Unexpected error during installation: {e!s}")
+
+
 def needs(mods: list[str], *, target: bool = False) -> Callable:
     """
     Decorator to auto-install missing dependencies using uv.
 
+    Coroutine functions get an async wrapper: uv runs as an asyncio
+    subprocess and waiting for another installer does not block the event
+    loop. Both variants share the install lock and module cache.
+
     Args:
         mods: List of module names to ensure are installed
         target: If True, install to UV_INSTALL_TARGET path, otherwise to Python environment
@@ -665,19 +3596,24 @@ def needs(mods: list[str], *, target: bool = False) -> Callable:
     """
 
     def decorator(f: Callable) -> Callable:
-        @wraps(f)
-        def wrapper(*args, **kwargs):
-            missing = [m for m in mods if not importlib.util.find_spec(m)]
-            if missing:
+        if inspect.iscoroutinefunction(f):
+
+            @wraps(f)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
                 try:
-                    _install_with_uv(missing, target)
-                    _import_modules(missing)
-                except subprocess.CalledProcessError as e:
-                    msg = f"UV installation failed: {e.stderr}"
-                    raise RuntimeError(msg) from e
+                    await _ensure_modules_async(mods, target)
                 except Exception as e:
-                    msg = f"Unexpected error during installation: {e!s}"
-                    raise RuntimeError(msg) from e
+                    raise _install_error(e) from e
+                return await f(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(f)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                _ensure_modules(mods, target)
+            except Exception as e:
+                raise _install_error(e) from e
             return f(*args, **kwargs)
 
         return wrapper
@@ -685,12 +3621,104 @@ def needs(mods: list[str], *, target: bool = False) -> Callable:
     return decorator
 
 
-@needs(["fire", "pydantic"], target=False)
+####################################
+## BUILT-IN CACHES
+####################################
+def _providers_stats() -> CacheStats:
+    with _providers_lock:
+        cached = [entry.paths for entry in _path_providers if entry.paths is not None]
+    return CacheStats("path_providers", len(cached), sum(map(_approx_size, cached)))
+
+
+def _executable_index_stats() -> CacheStats:
+    with _providers_lock:
+        index, snapshots = _executable_index, list(_dir_snapshots.values())
+    size = sum(_approx_size(snapshot.names) for snapshot in snapshots)
+    if index is not None:
+        size += _approx_size(index._names)
+        size += sys.getsizeof(index._offsets) + sys.getsizeof(index._dir_ids)
+    return CacheStats("executable_index", len(index or ()), size)
+
+
+def _verdicts_stats() -> CacheStats:
+    entries = len(_verdict_cache) + len(_dir_verdict_cache)
+    size = _approx_size(_verdict_cache) + _approx_size(_dir_verdict_cache)
+    return CacheStats("executable_verdicts", entries, size, maxsize=_VERDICT_CACHE_MAX)
+
+
+def _clear_verdicts() -> None:
+    _verdict_cache.clear()
+    _dir_verdict_cache.clear()
+
+
+def _tool_cache_stats() -> CacheStats:
+    if not (cache_file := _tool_cache_file()):
+        return CacheStats("tool_cache", 0, 0)
+    data = _read_tool_cache(cache_file)
+    try:
+        size = cache_file.stat().st_size
+    except OSError:
+        size = 0
+    return CacheStats("tool_cache", len(data["tools"]) + len(data["versions"]), size)
+
+
+register_cache("which", which)
+register_cache("which_uv", which_uv)
+register_cache("which_pip", which_pip)
+register_cache("resolve_pip", resolve_pip)
+register_cache(
+    "build_extended_path",
+    build_extended_path,
+    clear=clear_path_cache,
+    warm=build_extended_path,
+)
+register_cache("download_url", download_url)
+register_cache("download_url_py", download_url_py)
+register_cache("download_url_qt", download_url_qt)
+register_cache("path_providers", stats=_providers_stats, clear=clear_provider_cache)
+register_cache(
+    "executable_index",
+    stats=_executable_index_stats,
+    clear=clear_executable_index,
+    warm=executable_index,
+)
+register_cache("executable_verdicts", stats=_verdicts_stats, clear=_clear_verdicts)
+register_cache(
+    "modules",
+    stats=lambda: CacheStats(
+        "modules", len(_module_cache), _approx_size(_module_cache)
+    ),
+    clear=clear_module_cache,
+)
+register_cache(
+    "tool_versions",
+    stats=lambda: CacheStats(
+        "tool_versions", len(_version_cache), _approx_size(_version_cache)
+    ),
+    clear=_version_cache.clear,
+)
+register_cache("tool_cache", stats=_tool_cache_stats, clear=clear_tool_cache)
+register_cache(
+    "host",
+    stats=lambda: CacheStats("host", int(_host_detected), _approx_size(_detected_host)),
+    clear=clear_host_cache,
+    warm=detect_host,
+)
+register_cache("fontlab_site_packages", _fontlab_site_packages_for)
+
+
 def main() -> None:
+    """
+    Expose this module's functions on the command line with fire.
+
+    fire is declared in the script metadata above, so `uv run py_needs.py`
+    provides it. For the faster argparse CLI, which needs no extra
+    packages, use `python -m twat_ez` (see twat_ez.cli).
+    """
     import fire  # noqa: PLC0415
 
-    logging.info(repr(fire))
-    return fire
+    logging.basicConfig(level=logging.DEBUG, format="%(levelname)s: %(message)s")
+    fire.Fire(sys.modules[__name__])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,380 @@
+"""Tests for the repository maintenance script, cleanup.py."""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import cleanup
+
+
+@pytest.fixture(autouse=True)
+def log_file(tmp_path, monkeypatch):
+    path = tmp_path / "llms.txt"
+    monkeypatch.setattr(cleanup, "LOG_FILE", path)
+    return path
+
+
+def python_step(name, code, *, after=()):
+    return cleanup.Step(name, [sys.executable, "-c", code], after=after)
+
+
+def appender(order_file, name, *, delay=0.0, exit_code=0):
+    return (
+        f"import sys, time; time.sleep({delay}); "
+        f"open({str(order_file)!r}, 'a').write({name!r} + '\\n'); sys.exit({exit_code})"
+    )
+
+
+class TestRunSteps:
+    def test_dependents_start_after_their_dependencies(self, tmp_path):
+        order = tmp_path / "order"
+        steps = [
+            python_step("slow", appender(order, "slow", delay=0.2)),
+            python_step("after-slow", appender(order, "after-slow"), after=("slow",)),
+            python_step("independent", appender(order, "independent")),
+        ]
+        results = cleanup.run_steps(steps)
+        assert [r.name for r in results] == ["slow", "after-slow", "independent"]
+        assert all(r.returncode == 0 for r in results)
+        assert order.read_text().split() == ["independent", "slow", "after-slow"]
+
+    def test_failed_step_does_not_block_dependents(self, tmp_path):
+        order = tmp_path / "order"
+        steps = [
+            python_step("fails", appender(order, "fails", exit_code=3)),
+            python_step("next", appender(order, "next"), after=("fails",)),
+        ]
+        results = cleanup.run_steps(steps)
+        assert [(r.name, r.returncode) for r in results] == [("fails", 3), ("next", 0)]
+        assert order.read_text().split() == ["fails", "next"]
+
+    def test_output_is_logged_with_step_name(self, log_file):
+        (result,) = cleanup.run_steps([python_step("hello", "print('hi there')")])
+        assert result.returncode == 0
+        assert "[hello] hi there" in log_file.read_text()
+
+    def test_unknown_dependency(self):
+        with pytest.raises(ValueError, match="unknown steps"):
+            cleanup.run_steps([python_step("a", "pass", after=("missing",))])
+
+    def test_cycle(self):
+        steps = [
+            python_step("a", "pass", after=("b",)),
+            python_step("b", "pass", after=("a",)),
+        ]
+        with pytest.raises(ValueError, match="cycle"):
+            cleanup.run_steps(steps)
+
+    def test_command_that_cannot_start(self):
+        step = cleanup.Step("missing", ["/nonexistent/command"])
+        (result,) = cleanup.run_steps([step])
+        assert result.returncode == 127
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    root = tmp_path / "repo"
+    (root / "src").mkdir(parents=True)
+    (root / "tests").mkdir()
+    (root / "src" / "pkg.py").write_text("x = 1\n")
+    (root / "src" / "other.py").write_text("y = 2\n")
+    (root / "tests" / "test_pkg.py").write_text("def test(): pass\n")
+    (root / "pyproject.toml").write_text("[project]\nname = 'pkg'\n")
+    subprocess.run(["git", "init", "-q", str(root)], check=True)  # noqa: S603, S607
+    monkeypatch.chdir(root)
+    return root
+
+
+PY = ("src/*.py", "tests/*.py", "pyproject.toml")
+LINT = cleanup.Step("lint", ["lint"], targets=("src",), inputs=PY, scoped=True)
+TYPES = cleanup.Step("types", ["types"], targets=("src",), inputs=PY)
+DOCS = cleanup.Step("docs", ["docs"], inputs=("docs/*",))
+
+
+def scanned_manifest(*steps):
+    manifest = cleanup.Manifest.load()
+    manifest.scan()
+    for step in steps:
+        manifest.record(step.name, manifest.inputs(step.inputs))
+    return manifest
+
+
+class TestManifest:
+    @pytest.mark.usefixtures("repo")
+    def test_unchanged_tree_skips_everything_without_rehashing(self):
+        scanned_manifest(LINT, TYPES).save()
+        manifest = cleanup.Manifest.load()
+        with mock.patch("cleanup._file_digest") as digest:
+            manifest.scan()
+        digest.assert_not_called()
+        assert cleanup.plan_steps([LINT, TYPES], manifest) == []
+
+    @pytest.mark.usefixtures("repo")
+    def test_step_without_matching_inputs_always_runs(self):
+        manifest = scanned_manifest(DOCS)
+        assert cleanup.plan_steps([DOCS], manifest) == [DOCS]
+
+    def test_edited_python_file_scopes_fixers(self, repo):
+        manifest = scanned_manifest(LINT, TYPES)
+        (repo / "src" / "pkg.py").write_text("x = 10\n")
+        manifest.scan()
+        lint, types = cleanup.plan_steps([LINT, TYPES], manifest)
+        assert lint.command == ["lint", "src/pkg.py"]
+        assert types.command == ["types", "src"]
+
+    def test_edited_config_runs_fixers_on_everything(self, repo):
+        manifest = scanned_manifest(LINT)
+        (repo / "pyproject.toml").write_text("[project]\nname = 'renamed'\n")
+        manifest.scan()
+        (lint,) = cleanup.plan_steps([LINT], manifest)
+        assert lint.command == ["lint", "src"]
+
+    def test_deleted_file_is_recorded_for_fixers_and_rechecked_by_others(self, repo):
+        manifest = scanned_manifest(LINT, TYPES)
+        (repo / "src" / "other.py").unlink()
+        manifest.scan()
+        assert "src/other.py" not in manifest.hashes
+        assert cleanup.plan_steps([LINT, TYPES], manifest) == [TYPES]
+        assert manifest.is_fresh("lint", manifest.inputs(PY))
+
+    @pytest.mark.usefixtures("repo")
+    def test_dependency_on_skipped_step_is_dropped(self):
+        manifest = scanned_manifest(LINT)
+        after_lint = cleanup.Step("types", ["types"], after=("lint",), inputs=PY)
+        (planned,) = cleanup.plan_steps([LINT, after_lint], manifest)
+        assert planned.after == ()
+
+    def test_fixer_is_recorded_with_its_rewrite(self, repo, monkeypatch):
+        fixer = cleanup.Step(
+            "fix",
+            [sys.executable, "-c", "open('src/pkg.py', 'a').write('z = 3\\n')"],
+            inputs=PY,
+            rewrites=True,
+        )
+        checker = cleanup.Step(
+            "check", [sys.executable, "-c", "pass"], after=("fix",), inputs=PY
+        )
+        monkeypatch.setattr(cleanup, "CHECK_STEPS", [fixer, checker])
+        cleanup.Cleanup()._run_checks()
+
+        manifest = cleanup.Manifest.load()
+        manifest.scan()
+        assert (repo / "src" / "pkg.py").read_text().endswith("z = 3\n")
+        # The checker saw the pre-fix inputs recorded, so it runs again
+        assert cleanup.plan_steps([fixer, checker], manifest) == [
+            cleanup.replace(checker, after=())
+        ]
+
+
+IGNORE_CASES = {
+    "negation": (
+        ["*.log", "!keep.log"],
+        ["a.log", "keep.log", "sub/b.log", "sub/keep.log", "notes.txt"],
+    ),
+    "anchored": (["/anchored"], ["anchored", "sub/anchored"]),
+    "inner-slash": (["doc/*.txt"], ["doc/x.txt", "doc/sub/y.txt", "other/doc/x.txt"]),
+    "double-star-middle": (["a/**/b"], ["a/b", "a/x/b", "a/x/y/b", "c/a/x/b"]),
+    "double-star-leading": (
+        ["**/cache"],
+        ["cache", "x/cache", "x/y/cache", "x/cached"],
+    ),
+    "directory-only": (["build/"], ["build/", "sub/build/", "lib/build", "build.txt"]),
+    "character-class": (
+        ["[abc].py", "*.py[!c]"],
+        ["a.py", "d.py", "sub/b.py", "x.pyc", "x.pyo"],
+    ),
+    "question-mark": (["?.md"], ["a.md", "ab.md", "sub/c.md"]),
+    "re-include-in-dir": (["/sub/*", "!/sub/keep"], ["sub/drop", "sub/keep", "keep"]),
+}
+
+
+def git_ignored(root, paths):
+    """Of paths (relative to root), those git check-ignore reports ignored."""
+    result = subprocess.run(  # noqa: S603
+        ["git", "-C", str(root), "check-ignore", "--stdin"],  # noqa: S607
+        input="\n".join(paths),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return set(result.stdout.split())
+
+
+def make_tree(root, paths):
+    for path in paths:
+        target = root / path
+        if path.endswith("/"):
+            target.mkdir(parents=True, exist_ok=True)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(f"{path}\n")
+
+
+class TestIgnoreRules:
+    @pytest.mark.parametrize(
+        ("patterns", "paths"), IGNORE_CASES.values(), ids=IGNORE_CASES
+    )
+    def test_matches_git_check_ignore(self, repo, patterns, paths):
+        (repo / ".gitignore").write_text("\n".join(patterns) + "\n")
+        make_tree(repo, paths)
+        rules = cleanup.IgnoreRules(patterns)
+        ours = {
+            path.rstrip("/")
+            for path in paths
+            if rules.match(path.rstrip("/"), is_dir=path.endswith("/"))
+        }
+        assert ours == git_ignored(repo, [path.rstrip("/") for path in paths])
+
+    def test_walk_repo_agrees_with_git_across_nested_gitignores(self, repo):
+        (repo / ".gitignore").write_text("*.log\nbuild/\n/top-only\n")
+        make_tree(
+            repo,
+            [
+                "app.log",
+                "top-only",
+                "build/out.py",
+                "pkg/top-only",
+                "pkg/.gitignore",
+                "pkg/keep.log",
+                "pkg/data/raw.csv",
+                "pkg/data/clean.csv",
+                "pkg/data/build/x.py",
+                "deep/a/b/c.tmp",
+            ],
+        )
+        (repo / "pkg" / ".gitignore").write_text("!keep.log\ndata/raw.*\n")
+        walked = {
+            entry.path
+            for entry in cleanup.walk_repo(ignore_patterns=[".git"])
+            if not entry.is_dir
+        }
+        untracked = subprocess.run(
+            ["git", "ls-files", "--others", "--exclude-standard"],  # noqa: S607
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        assert walked == set(untracked)
+
+
+@pytest.mark.parametrize(
+    ("size", "expected"),
+    [
+        (0, "   0"),
+        (1023, "1023"),
+        (1024, "1.0K"),
+        (40 * 1024, " 40K"),
+        (5 << 20, "5.0M"),
+    ],
+)
+def test_human_size(size, expected):
+    assert cleanup._human_size(size) == expected
+
+
+GOLDEN_TREE = """\
+---
+description: File tree of the project
+globs: \n---
+[size]  .
+├── [size]  .gitignore
+├── [size]  data.json
+├── [size]  image.bin
+├── [size]  pyproject.toml
+├── [size]  src
+│   ├── [size]  other.py
+│   └── [size]  pkg.py
+└── [size]  tests
+    └── [size]  test_pkg.py
+
+2 directories, 7 files
+"""
+
+GOLDEN_BUNDLE_FILES = """\
+================================================================
+Directory Structure
+================================================================
+.gitignore
+pyproject.toml
+src/
+  other.py
+  pkg.py
+tests/
+  test_pkg.py
+
+================================================================
+Files
+================================================================
+
+================
+File: .gitignore
+================
+*.log
+
+================
+File: pyproject.toml
+================
+[project]
+name = 'pkg'
+
+================
+File: src/other.py
+================
+y = 2
+
+================
+File: src/pkg.py
+================
+x = 1
+# end
+
+================
+File: tests/test_pkg.py
+================
+def test(): pass
+
+================================================================
+End of Codebase
+================================================================
+"""
+
+
+def test_snapshot_golden(repo):
+    (repo / ".gitignore").write_text("*.log\n")
+    (repo / "debug.log").write_text("ignored\n")
+    (repo / "data.json").write_text("{}\n")
+    (repo / "image.bin").write_bytes(b"\x89PNG\0\0")
+    (repo / "src" / "pkg.py").write_text("x = 1   \n\n\n# end\n")
+    # The second run must leave out the first run's outputs
+    for _ in range(2):
+        cleanup.snapshot_repo(
+            tree_file=Path("tree.mdc"), bundle_file=Path("bundle.txt")
+        )
+    tree = re.sub(r"\[[ \d.KMGT]{4}\]", "[size]", Path("tree.mdc").read_text())
+    assert tree == GOLDEN_TREE
+    bundle = Path("bundle.txt").read_text()
+    assert bundle.startswith(cleanup.BUNDLE_HEADER.split("{ignored}")[0])
+    assert "- Trailing whitespace has been removed\n" in bundle
+    assert bundle.endswith(GOLDEN_BUNDLE_FILES)
+
+
+def test_tree_shows_the_files_its_freshness_check_hashes(repo):
+    for generated in cleanup.GENERATED_FILES:
+        (repo / generated).parent.mkdir(parents=True, exist_ok=True)
+        (repo / generated).write_text("rewritten on every run\n")
+    cleanup.snapshot_repo(bundle_file=None)
+    manifest = cleanup.Manifest.load()
+    manifest.scan()
+    shown = {
+        line.rsplit("  ", 1)[-1]
+        for line in cleanup.TREE_FILE.read_text().splitlines()
+        if "── [" in line
+    }
+    listed = {name.rsplit("/", 1)[-1] for name in manifest.listing()}
+    assert listed <= shown
+    assert not shown & {Path(name).name for name in cleanup.GENERATED_FILES}
@@ -1,17 +1,25 @@
 """Test suite for twat_ez and its py_needs module."""
 
+import asyncio
+import hashlib
+import json
 import os
+import platform
 import subprocess
 import sys
+import tarfile
+import threading
+import time
 from pathlib import Path
 from unittest import mock
 
 import pytest
 
-from urllib.error import HTTPError # For test_download_url_py_http_error
+from urllib.error import HTTPError  # For test_download_url_py_http_error
 
 # Attempt to import py_needs from twat_ez, handling potential import errors
-import twat_ez # For test_version
+import twat_ez  # For test_version
+from twat_ez import cli
 
 try:
     from twat_ez import py_needs
@@ -22,7 +30,7 @@ except ImportError as e:
 
 # Conditional import for PythonQt, skip Qt tests if not available
 try:
-    from PythonQt import QtNetwork # QtCore was unused
+    from PythonQt import QtNetwork  # QtCore was unused
 
     HAS_PYTHONQT = True
 except ImportError:
@@ -37,34 +45,34 @@ def clear_py_needs_caches():
         py_needs.download_url,
         py_needs.which_uv,
         py_needs.which_pip,
+        py_needs.resolve_pip,
         py_needs.which,
         py_needs.build_extended_path,
     ]
     for func in functions_with_cache:
         func.cache_clear()
-    # Also clear the module-level cache for _get_fontlab_site_packages if it's patched or memoized
-    if hasattr(py_needs._get_fontlab_site_packages, "cache_clear"):
-        py_needs._get_fontlab_site_packages.cache_clear()
+    py_needs._fontlab_site_packages_for.cache_clear()
+    py_needs.clear_host_cache()
+    py_needs.clear_module_cache()
+    py_needs._verdict_cache.clear()
+    py_needs._dir_verdict_cache.clear()
+    py_needs.clear_executable_index()
+    py_needs._version_cache.clear()
 
 
 @pytest.fixture(autouse=True)
 def reset_caches_and_providers():
     """Clear all lru_caches and reset global path providers before each test."""
     clear_py_needs_caches()
-    # Reset global path providers list
+    # Reset global path providers list and the PATH built from them
     py_needs._path_providers.clear()
+    py_needs._uv_bin_dirs.clear()
+    py_needs.clear_path_cache()
     # Reset UV_INSTALL_TARGET to its default logic by removing it from environ
     if "UV_INSTALL_TARGET" in os.environ:
         del os.environ["UV_INSTALL_TARGET"]
-    # Force re-evaluation of UV_INSTALL_TARGET by reloading parts of the module or specific variables
-    # This is a bit tricky; direct re-assignment is simpler if the variable is accessible.
-    # For this setup, we'll re-evaluate its default based on current mocks.
-    py_needs.UV_INSTALL_TARGET = Path(
-        os.environ.get(
-            "UV_INSTALL_TARGET",
-            str(py_needs.get_site_packages_path()),
-        )
-    )
+    # Drop any value a test assigned, so UV_INSTALL_TARGET is computed lazily again
+    vars(py_needs).pop("UV_INSTALL_TARGET", None)
 
 
 def test_version():
@@ -97,10 +105,15 @@ class TestPathProviders:
         assert py_needs.get_site_packages_path() == Path("/test/user/site-packages")
 
     @mock.patch("twat_ez.py_needs.site.getusersitepackages")
-    @mock.patch("twat_ez.py_needs.Path.exists", return_value=True) # This mock is used by Path() in tested code
+    @mock.patch(
+        "twat_ez.py_needs.Path.exists", return_value=True
+    )  # This mock is used by Path() in tested code
     @mock.patch("twat_ez.py_needs.sys.path", new_callable=list)
     def test_get_site_packages_path_fontlab(
-        self, mock_sys_path, mock_path_exists_arg, mock_getusersitepackages # mock_path_exists_arg is the mock for Path.exists
+        self,
+        mock_sys_path,
+        mock_path_exists_arg,
+        mock_getusersitepackages,  # mock_path_exists_arg is the mock for Path.exists
     ):
         # mock_path_exists_arg is not directly used in the test body, but the patch is needed.
         mock_fontlab = mock.MagicMock()
@@ -122,6 +135,32 @@ class TestPathProviders:
             assert result == Path(fontlab_site_path)
         mock_getusersitepackages.assert_not_called()
 
+    @mock.patch("twat_ez.py_needs.importlib.util.find_spec")
+    @mock.patch("twat_ez.py_needs.sys.path", new_callable=list)
+    def test_fontlab_detected_from_sys_path_without_import(
+        self, mock_sys_path, mock_find_spec
+    ):
+        python_version = f"{sys.version_info.major}.{sys.version_info.minor}"
+        fontlab_site_path = f"/fontlab/data/python/{python_version}/site-packages"
+        mock_sys_path.extend(["/usr/lib/python", fontlab_site_path])
+        with mock.patch.dict(sys.modules):
+            sys.modules.pop("fontlab", None)
+            assert py_needs._get_fontlab_site_packages() == Path(fontlab_site_path)
+            assert py_needs._get_fontlab_site_packages() == Path(fontlab_site_path)
+            assert "fontlab" not in sys.modules
+        mock_find_spec.assert_called_once_with("fontlab")
+
+    @mock.patch("twat_ez.py_needs.importlib.util.find_spec")
+    @mock.patch("twat_ez.py_needs.sys.path", new_callable=list)
+    def test_fontlab_not_probed_without_matching_sys_path(
+        self, mock_sys_path, mock_find_spec
+    ):
+        mock_sys_path.append("/usr/lib/python3/dist-packages")
+        with mock.patch.dict(sys.modules):
+            sys.modules.pop("fontlab", None)
+            assert py_needs._get_fontlab_site_packages() is None
+        mock_find_spec.assert_not_called()
+
     @mock.patch.dict(
         os.environ,
         {"XDG_BIN_HOME": "/custom/xdg_bin", "XDG_DATA_HOME": "/custom/xdg_data"},
@@ -207,12 +246,15 @@ class TestPathProviders:
     @mock.patch("twat_ez.py_needs.get_system_specific_paths")
     @mock.patch("twat_ez.py_needs.os.defpath", "/def/path1:/def/path2", create=True)
     @mock.patch(
-        "twat_ez.py_needs.Path.is_dir", return_value=True
+        "twat_ez.py_needs.os.path.isdir", return_value=True
     )  # Assume all paths are dirs
     def test_build_extended_path(
-        self, mock_is_dir, mock_get_system_specific_paths, mock_get_xdg_paths # mock_is_dir was missing
+        self,
+        mock_is_dir,
+        mock_get_system_specific_paths,
+        mock_get_xdg_paths,  # mock_is_dir was missing
     ):
-        # mock_is_dir is passed by the @mock.patch decorator for Path.is_dir
+        # mock_is_dir is passed by the @mock.patch decorator for os.path.isdir
         mock_get_xdg_paths.return_value = [Path("/xdg/path")]
         mock_get_system_specific_paths.return_value = [Path("/sys/path")]
 
@@ -222,8 +264,8 @@ class TestPathProviders:
 
         py_needs.register_path_provider(custom_provider)
 
-        # The decorator @mock.patch("twat_ez.py_needs.Path.is_dir", return_value=True)
-        # already ensures that any call to Path(...).is_dir() will return True.
+        # The decorator @mock.patch("twat_ez.py_needs.os.path.isdir", return_value=True)
+        # already ensures that any call to os.path.isdir() will return True.
         # No need for mock_is_dir_param.side_effect here.
 
         py_needs.build_extended_path.cache_clear()  # This is fine as build_extended_path IS cached
@@ -255,50 +297,451 @@ class TestPathProviders:
         assert "/custom/provider/path" in extended_path
 
 
+@mock.patch("twat_ez.py_needs.os.path.isdir", return_value=True)
+@mock.patch("twat_ez.py_needs.get_system_specific_paths", return_value=[])
+@mock.patch("twat_ez.py_needs.get_xdg_paths", return_value=[])
+@mock.patch.dict(os.environ, {"PATH": ""})
+class TestPathProviderRegistry:
+    def _parts(self):
+        return py_needs.build_extended_path().split(os.pathsep)
+
+    def test_priority_order(self, *mocks):
+        py_needs.register_path_provider(lambda: ["/low"])
+        py_needs.register_path_provider(lambda: ["/high"], priority=10)
+        parts = self._parts()
+        assert parts.index("/high") < parts.index("/low")
+
+    def test_results_survive_path_cache_clear(self, *mocks):
+        provider = mock.Mock(return_value=["/provided"])
+        py_needs.register_path_provider(provider)
+        assert "/provided" in self._parts()
+        py_needs.clear_path_cache()
+        assert "/provided" in self._parts()
+        provider.assert_called_once()
+        py_needs.clear_provider_cache()
+        self._parts()
+        assert provider.call_count == 2
+
+    @mock.patch("twat_ez.py_needs.time.monotonic")
+    def test_ttl_expiry(self, mock_monotonic, *mocks):
+        mock_monotonic.return_value = 100.0
+        provider = mock.Mock(return_value=["/old"])
+        py_needs.register_path_provider(provider, ttl=60)
+        assert "/old" in self._parts()
+        provider.return_value = ["/new"]
+        mock_monotonic.return_value = 150.0
+        assert "/old" in self._parts()
+        assert provider.call_count == 1
+        mock_monotonic.return_value = 161.0
+        parts = self._parts()
+        assert "/new" in parts
+        assert "/old" not in parts
+        assert "/new" in py_needs.extended_path_entries()
+        assert provider.call_count == 2
+
+    @mock.patch("twat_ez.py_needs.time.monotonic")
+    def test_ttl_expiry_reaches_cached_which(self, mock_monotonic, *mocks):
+        mock_monotonic.return_value = 100.0
+        provider = mock.Mock(return_value=["/old"])
+        py_needs.register_path_provider(provider, ttl=60, timeout=5)
+        with mock.patch("twat_ez.py_needs._find_executable", return_value=None) as find:
+            assert py_needs.which("sometool") is None
+            provider.return_value = ["/new"]
+            mock_monotonic.return_value = 161.0
+            assert py_needs.which("sometool") is None
+        assert provider.call_count == 2
+        assert "/new" in find.call_args.args[2]
+
+    def test_slow_provider_does_not_stall(self, *mocks):
+        release = threading.Event()
+
+        def slow_provider():
+            release.wait(5)
+            return ["/slow"]
+
+        py_needs.register_path_provider(slow_provider, timeout=0.01)
+        py_needs.register_path_provider(lambda: ["/fast"])
+        parts = self._parts()
+        assert "/fast" in parts
+        assert "/slow" not in parts
+
+        pending = py_needs._path_providers[0].pending
+        release.set()
+        pending.result(timeout=5)
+        assert "/slow" in self._parts()
+
+    def test_unregister(self, *mocks):
+        def provider():
+            return ["/provided"]
+
+        py_needs.register_path_provider(provider)
+        assert "/provided" in self._parts()
+        assert py_needs.unregister_path_provider(provider)
+        assert "/provided" not in self._parts()
+        assert not py_needs.unregister_path_provider(provider)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX executables")
+@mock.patch("twat_ez.py_needs.get_system_specific_paths", return_value=[])
+@mock.patch("twat_ez.py_needs.get_xdg_paths", return_value=[])
+class TestIncrementalPath:
+    @pytest.fixture
+    def bins(self, tmp_path):
+        dirs = []
+        for name in ("a", "b", "c"):
+            directory = tmp_path / name
+            directory.mkdir()
+            dirs.append(directory)
+        for directory, tool in (
+            (dirs[0], "tool"),
+            (dirs[2], "tool"),
+            (dirs[2], "extra"),
+        ):
+            exe = directory / tool
+            exe.write_text("#!/bin/sh\n")
+            exe.chmod(0o755)
+        with mock.patch.dict(os.environ, {"PATH": str(dirs[0])}):
+            yield dirs
+
+    def test_register_does_not_rebuild(self, mock_xdg, mock_system, bins):
+        py_needs.build_extended_path()
+        py_needs.register_path_provider(lambda: [str(bins[1])])
+        assert py_needs.build_extended_path().split(os.pathsep)[-1] == str(bins[1])
+        mock_xdg.assert_called_once()
+        mock_system.assert_called_once()
+
+    def test_append_keeps_hits_and_drops_misses(self, mock_xdg, mock_system, bins):
+        assert py_needs.which("tool") == bins[0] / "tool"
+        assert py_needs.which("extra") is None
+        py_needs.register_path_provider(lambda: [str(bins[2])])
+        assert py_needs.which.cache_info().currsize == 1  # "tool" hit kept
+        assert py_needs.which("tool") == bins[0] / "tool"
+        assert py_needs.which("extra") == bins[2] / "extra"
+
+    def test_higher_priority_segment_invalidates_shadowed_hits(
+        self, mock_xdg, mock_system, bins
+    ):
+        py_needs.register_path_provider(lambda: [str(bins[2])])
+        assert py_needs.which("extra") == bins[2] / "extra"
+        assert py_needs.which("tool") == bins[0] / "tool"
+        # bins[1] lands after the environment PATH but before bins[2]
+        py_needs.register_path_provider(lambda: [str(bins[1])], priority=5)
+        assert py_needs.which.cache_info().currsize == 1
+        parts = py_needs.build_extended_path().split(os.pathsep)
+        assert [p for p in parts if p in map(str, bins)] == list(map(str, bins))
+
+    def test_entries_are_shared_interned_tuple(self, mock_xdg, mock_system, bins):
+        entries = py_needs.extended_path_entries()
+        assert isinstance(entries, tuple)
+        assert entries[0] == str(bins[0])
+        assert py_needs.extended_path_entries() is entries
+        assert entries[0] is sys.intern(str(bins[0]))
+        py_needs.register_path_provider(lambda: [str(bins[2]) + os.sep])
+        assert py_needs.extended_path_entries() == (*entries, str(bins[2]))
+        assert str(bins[2]) not in entries  # Handed-out tuple is unchanged
+
+    def test_normalized_entries_table_stays_bounded(
+        self, mock_xdg, mock_system, bins, tmp_path
+    ):
+        py_needs.extended_path_entries()
+        assert str(bins[0]) in py_needs._normalized_dirs
+        remembered = len(py_needs._normalized_dirs)
+        for i in range(50):
+            py_needs.which("tool", path=str(tmp_path / f"once-{i}"))
+            py_needs.which_all("tool", path=str(tmp_path / f"once-{i}"))
+        assert len(py_needs._normalized_dirs) == remembered
+
+        with mock.patch.object(py_needs, "_NORMALIZED_DIRS_MAX", remembered + 2):
+            py_needs._normalize_dirs([str(tmp_path / f"p{i}") for i in range(5)])
+            assert len(py_needs._normalized_dirs) <= remembered + 2
+
+        py_needs.clear_path_cache()
+        assert not py_needs._normalized_dirs
+
+    def test_lookup_skips_directories_and_non_executables(
+        self, mock_xdg, mock_system, bins
+    ):
+        (bins[0] / "sub").mkdir()
+        (bins[2] / "sub").write_text("#!/bin/sh\n")
+        (bins[2] / "sub").chmod(0o755)
+        (bins[0] / "plain").write_text("")
+        py_needs.register_path_provider(lambda: [str(bins[2])])
+        assert py_needs.which("sub", verify=False) == bins[2] / "sub"
+        assert py_needs.which("plain", verify=False) is None
+        assert py_needs.which(str(bins[2] / "extra"), verify=False) == bins[2] / "extra"
+
+    def test_unregister_drops_hits_in_removed_dirs(self, mock_xdg, mock_system, bins):
+        def provider():
+            return [str(bins[2])]
+
+        py_needs.register_path_provider(provider)
+        assert py_needs.which("extra") == bins[2] / "extra"
+        assert py_needs.which("tool") == bins[0] / "tool"
+        py_needs.unregister_path_provider(provider)
+        assert py_needs.which.cache_info().currsize == 1
+        assert py_needs.which("extra") is None
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX executables")
+@mock.patch("twat_ez.py_needs.get_system_specific_paths", return_value=[])
+@mock.patch("twat_ez.py_needs.get_xdg_paths", return_value=[])
+class TestExecutableIndex:
+    @pytest.fixture
+    def bins(self, tmp_path):
+        layout = {
+            "a": ["python3", "python3.12", "tool", "readme.txt"],
+            "b": ["python3.9", "python3.11", "python3-config", "tool"],
+        }
+        dirs = []
+        for name, entries in layout.items():
+            directory = tmp_path / name
+            directory.mkdir()
+            dirs.append(directory)
+            for entry in entries:
+                path = directory / entry
+                path.write_text("#!/bin/sh\n")
+                if not entry.endswith(".txt"):
+                    path.chmod(0o755)
+        path = os.pathsep.join(map(str, dirs))
+        with mock.patch.dict(os.environ, {"PATH": path}):
+            yield dirs
+
+    def test_queries(self, mock_xdg, mock_system, bins):
+        index = py_needs.executable_index()
+        assert "tool" in index
+        assert "readme.txt" not in index
+        assert index.versions("python3") == [
+            "python3",
+            "python3.9",
+            "python3.11",
+            "python3.12",
+        ]
+        assert "python3-config" in index.prefix("python3")
+        assert index.glob("python3.1?") == ["python3.11", "python3.12"]
+        assert index.locate("tool") == bins[0] / "tool"
+        assert index.locate_all("tool") == [bins[0] / "tool", bins[1] / "tool"]
+        assert index.locate("missing") is None
+
+    def test_reused_until_path_changes(self, mock_xdg, mock_system, bins, tmp_path):
+        index = py_needs.executable_index()
+        assert py_needs.executable_index() is index
+        extra = tmp_path / "extra"
+        extra.mkdir()
+        (extra / "newtool").write_text("")
+        (extra / "newtool").chmod(0o755)
+        py_needs.register_path_provider(lambda: [str(extra)])
+        rebuilt = py_needs.executable_index()
+        assert rebuilt is not index
+        assert rebuilt.locate("newtool") == extra / "newtool"
+
+    def test_new_file_in_path_dir_seen_after_ttl(self, mock_xdg, mock_system, bins):
+        with mock.patch("twat_ez.py_needs.time.monotonic", return_value=100.0):
+            index = py_needs.executable_index()
+        added = bins[1] / "added"
+        added.write_text("")
+        added.chmod(0o755)
+        os.utime(bins[1], ns=(0, 1))  # Guarantee an mtime change
+        with mock.patch("twat_ez.py_needs.time.monotonic", return_value=100.5):
+            assert py_needs.executable_index() is index  # Within the TTL
+        later = 100.0 + py_needs.EXECUTABLE_INDEX_TTL
+        with mock.patch("twat_ez.py_needs.time.monotonic", return_value=later):
+            assert py_needs.executable_index().locate("added") == added
+            unchanged = py_needs.executable_index(refresh=True)
+            assert py_needs.executable_index(refresh=True) is unchanged
+
+    def test_refresh_rescans_only_changed_dirs(self, mock_xdg, mock_system, bins):
+        py_needs.executable_index()
+        unchanged = py_needs._dir_snapshots[str(bins[1])]
+        added = bins[0] / "added"
+        added.write_text("")
+        added.chmod(0o755)
+        os.utime(bins[0], ns=(0, 1))  # Guarantee an mtime change
+        index = py_needs.executable_index(refresh=True)
+        assert index.locate("added") == added
+        assert py_needs._dir_snapshots[str(bins[1])] is unchanged
+
+    def test_which_all_sees_tool_added_to_path_dir(self, mock_xdg, mock_system, bins):
+        assert py_needs.which_all("zzfoo") == []
+        added = bins[1] / "zzfoo"
+        added.write_text("#!/bin/sh\n")
+        added.chmod(0o755)
+        os.utime(bins[1], ns=(0, 1))  # Guarantee an mtime change
+        assert [match.path for match in py_needs.which_all("zzfoo")] == [added]
+
+    def test_which_all_lists_shadowed_matches_with_verdicts(
+        self, mock_xdg, mock_system, bins
+    ):
+        (bins[1] / "tool").chmod(0o777)
+        matches = py_needs.which_all("tool")
+        assert matches == [
+            py_needs.WhichMatch(bins[0] / "tool", True, "OK"),
+            py_needs.WhichMatch(bins[1] / "tool", False, "File is world-writable"),
+        ]
+        assert py_needs.which("tool") == matches[0].path
+        assert py_needs.which_all("tool", path=str(bins[1])) == matches[1:]
+        assert py_needs.which_all("missing") == []
+
+
 class TestVerifyExecutable:
-    @mock.patch("twat_ez.py_needs.Path.exists")
-    def test_verify_executable_not_exists(self, mock_exists):
-        mock_exists.return_value = False
-        is_safe, reason = py_needs.verify_executable(Path("/test/nonexistent"))
+    def test_verify_executable_not_exists(self, tmp_path):
+        is_safe, reason = py_needs.verify_executable(tmp_path / "nonexistent")
         assert not is_safe
         assert reason == "File does not exist"
 
-    @mock.patch("twat_ez.py_needs.Path.exists", return_value=True)
-    @mock.patch("twat_ez.py_needs.Path.is_file")
-    def test_verify_executable_not_a_file(self, mock_is_file, mock_exists):
-        mock_is_file.return_value = False
-        is_safe, reason = py_needs.verify_executable(Path("/test/directory"))
+    def test_verify_executable_not_a_file(self, tmp_path):
+        is_safe, reason = py_needs.verify_executable(tmp_path)
         assert not is_safe
         assert reason == "Not a regular file"
 
-    @mock.patch("twat_ez.py_needs.Path.exists", return_value=True)
-    @mock.patch("twat_ez.py_needs.Path.is_file", return_value=True)
-    @mock.patch("twat_ez.py_needs.platform.system")
-    @mock.patch("twat_ez.py_needs.Path.stat")
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+    @mock.patch("twat_ez.py_needs.platform.system", return_value="Linux")
     def test_verify_executable_world_writable_unix(
-        self, mock_stat, mock_platform_system, mock_is_file, mock_exists
+        self, mock_platform_system, tmp_path
     ):
-        mock_platform_system.return_value = "Linux"
-        mock_stat.return_value.st_mode = 0o777  # rwxrwxrwx
-        is_safe, reason = py_needs.verify_executable(Path("/test/worldwritable"))
+        exe = tmp_path / "tool"
+        exe.write_text("#!/bin/sh\n")
+        exe.chmod(0o777)  # rwxrwxrwx
+        is_safe, reason = py_needs.verify_executable(exe)
         assert not is_safe
         assert reason == "File is world-writable"
 
-        mock_stat.return_value.st_mode = 0o775  # rwxrwxr-x
-        is_safe, reason = py_needs.verify_executable(Path("/test/notworldwritable"))
+        exe.chmod(0o775)  # rwxrwxr-x
+        is_safe, reason = py_needs.verify_executable(exe)
         assert is_safe
         assert reason == "OK"
 
-    @mock.patch("twat_ez.py_needs.Path.exists", return_value=True)
-    @mock.patch("twat_ez.py_needs.Path.is_file", return_value=True)
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+    @mock.patch("twat_ez.py_needs.platform.system", return_value="Linux")
+    def test_verify_executable_not_executable(self, mock_platform_system, tmp_path):
+        data = tmp_path / "data.txt"
+        data.write_text("")
+        data.chmod(0o644)
+        assert py_needs.verify_executable(data) == (False, "File is not executable")
+
     @mock.patch("twat_ez.py_needs.platform.system", return_value="Windows")
-    def test_verify_executable_windows(
-        self, mock_platform_system, mock_is_file, mock_exists
-    ):
-        is_safe, reason = py_needs.verify_executable(Path("C:\\test\\safe.exe"))
+    def test_verify_executable_windows(self, mock_platform_system, tmp_path):
+        exe = tmp_path / "safe.exe"
+        exe.write_bytes(b"MZ")
+        exe.chmod(0o666)
+        is_safe, reason = py_needs.verify_executable(exe)
         assert is_safe
         assert reason == "OK"
 
+    def test_verify_executable_single_stat(self, tmp_path):
+        exe = tmp_path / "tool"
+        exe.write_text("")
+        exe.chmod(0o755)
+        with mock.patch("twat_ez.py_needs.os.stat", wraps=os.stat) as mock_stat:
+            py_needs.verify_executable(exe)
+        mock_stat.assert_called_once_with(exe)
+
+    @mock.patch("twat_ez.py_needs.platform.system", return_value="Linux")
+    def test_verdict_memoized_by_identity(self, mock_platform_system, tmp_path):
+        exe = tmp_path / "tool"
+        exe.write_text("")
+        exe.chmod(0o755)
+        py_needs.verify_executable(exe)
+        py_needs.verify_executable(exe)
+        assert mock_platform_system.call_count == 1  # Second verdict came from cache
+
+    def test_verify_executables_batch(self, tmp_path):
+        exe = tmp_path / "tool"
+        exe.write_text("")
+        exe.chmod(0o755)
+        verdicts = py_needs.verify_executables([exe, tmp_path / "missing"])
+        assert verdicts[0] == (True, "OK")
+        assert verdicts[1] == (False, "File does not exist")
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+class TestExecutablePolicy:
+    @pytest.fixture
+    def exe_dir(self, tmp_path):
+        directory = tmp_path / "bin"
+        directory.mkdir()
+        directory.chmod(0o755)
+        exe = directory / "tool"
+        exe.write_text("")
+        exe.chmod(0o755)
+        return directory
+
+    def test_strict_rejects_world_writable_parent(self, exe_dir):
+        exe_dir.chmod(0o777)
+        exe = exe_dir / "tool"
+        assert py_needs.verify_executable(exe) == (True, "OK")
+        is_safe, reason = py_needs.verify_executable(
+            exe, py_needs.STRICT_EXECUTABLE_POLICY
+        )
+        assert not is_safe
+        assert "world-writable" in reason
+
+    def test_sticky_parent_is_allowed(self, exe_dir):
+        exe_dir.chmod(0o1777)
+        assert py_needs.verify_executable(
+            exe_dir / "tool", py_needs.STRICT_EXECUTABLE_POLICY
+        ) == (True, "OK")
+
+    def test_symlink_chain_through_unsafe_dir(self, exe_dir, tmp_path):
+        unsafe = tmp_path / "unsafe"
+        unsafe.mkdir()
+        unsafe.chmod(0o777)
+        (unsafe / "hop").symlink_to(exe_dir / "tool")
+        safe_link_dir = tmp_path / "links"
+        safe_link_dir.mkdir()
+        (safe_link_dir / "tool").symlink_to(unsafe / "hop")
+
+        is_safe, reason = py_needs.verify_executable(
+            safe_link_dir / "tool", py_needs.STRICT_EXECUTABLE_POLICY
+        )
+        assert not is_safe
+        assert str(unsafe) in reason
+
+    def test_trusted_prefix_skips_directory_checks(self, exe_dir):
+        exe_dir.chmod(0o777)
+        policy = py_needs.ExecutablePolicy(
+            check_parent_dirs=True, trusted_prefixes=(str(exe_dir),)
+        )
+        assert py_needs.verify_executable(exe_dir / "tool", policy) == (True, "OK")
+
+    @pytest.mark.skipif(
+        not hasattr(os, "geteuid") or os.geteuid() != 0, reason="chown needs root"
+    )
+    @mock.patch("twat_ez.py_needs.os.getuid", return_value=4321)
+    def test_owner_check(self, mock_getuid, exe_dir):
+        exe = exe_dir / "tool"
+        os.chown(exe, 1234, -1)
+        policy = py_needs.ExecutablePolicy(check_owner=True)
+        assert py_needs.verify_executable(exe, policy) == (
+            False,
+            "File is owned by another user",
+        )
+
+    @pytest.mark.skipif(
+        not hasattr(os, "geteuid") or os.geteuid() != 0, reason="chown needs root"
+    )
+    @mock.patch("twat_ez.py_needs.os.getuid", return_value=4321)
+    def test_trusted_prefix_still_checks_owner(self, mock_getuid, exe_dir):
+        os.chown(exe_dir / "tool", 1234, -1)
+        policy = py_needs.ExecutablePolicy(
+            check_owner=True, check_parent_dirs=True, trusted_prefixes=(str(exe_dir),)
+        )
+        assert py_needs.verify_executable(exe_dir / "tool", policy) == (
+            False,
+            "File is owned by another user",
+        )
+
+    def test_directory_verdicts_cached_until_path_cache_clear(self, exe_dir):
+        previous = py_needs.set_executable_policy(py_needs.STRICT_EXECUTABLE_POLICY)
+        try:
+            assert py_needs.verify_executable(exe_dir / "tool")[0]
+            assert str(exe_dir) in py_needs._dir_verdict_cache
+            assert "/" in py_needs._dir_verdict_cache  # Ancestors cached too
+            py_needs.clear_path_cache()
+            assert not py_needs._dir_verdict_cache
+        finally:
+            py_needs.set_executable_policy(previous)
+        assert py_needs.get_executable_policy() is previous
+
 
 class TestDownloadUrlPy:
     @mock.patch("urllib.request.build_opener")  # Patched at global level
@@ -370,8 +813,8 @@ class TestDownloadUrlQt:
     def test_download_url_qt_redirect(self, mock_qurl, mock_qeventloop, mock_qnam):
         mock_reply_redirect = mock.MagicMock()
         # Simulate redirect
-        mock_reply_redirect.attribute.side_effect = (
-            lambda attr: 301
+        mock_reply_redirect.attribute.side_effect = lambda attr: (
+            301
             if attr == QtNetwork.QNetworkRequest.HttpStatusCodeAttribute
             else (
                 mock.MagicMock(isValid=lambda: True)
@@ -439,33 +882,31 @@ class TestDownloadUrl:
 
 
 class TestWhichFunctionality:
-    @mock.patch("twat_ez.py_needs.shutil.which")
-    @mock.patch("twat_ez.py_needs.build_extended_path")
+    @mock.patch("twat_ez.py_needs._find_executable")
+    @mock.patch("twat_ez.py_needs.extended_path_entries")
     @mock.patch("twat_ez.py_needs.verify_executable", return_value=(True, "OK"))
     @mock.patch("twat_ez.py_needs.Path.exists", return_value=True)
     def test_which_found_verified(
-        self, mock_path_exists, mock_verify_exec, mock_build_ext_path, mock_shutil_which
+        self, mock_path_exists, mock_verify_exec, mock_entries, mock_find
     ):
-        mock_build_ext_path.return_value = "/test/path1:/test/path2"
-        mock_shutil_which.return_value = "/test/path1/mycmd"
+        mock_entries.return_value = ("/test/path1", "/test/path2")
+        mock_find.return_value = "/test/path1/mycmd"
 
         py_needs.which.cache_clear()
         result = py_needs.which("mycmd")
 
         assert result == Path("/test/path1/mycmd")
-        mock_shutil_which.assert_called_once_with(
-            "mycmd", mode=os.F_OK | os.X_OK, path="/test/path1:/test/path2"
+        mock_find.assert_called_once_with(
+            "mycmd", os.F_OK | os.X_OK, ("/test/path1", "/test/path2")
         )
         mock_verify_exec.assert_called_once_with(Path("/test/path1/mycmd"))
 
-    @mock.patch("twat_ez.py_needs.shutil.which")
-    @mock.patch("twat_ez.py_needs.build_extended_path")
+    @mock.patch("twat_ez.py_needs._find_executable")
+    @mock.patch("twat_ez.py_needs.extended_path_entries")
     @mock.patch("twat_ez.py_needs.verify_executable", return_value=(False, "Not safe"))
-    def test_which_found_not_verified(
-        self, mock_verify_exec, mock_build_ext_path, mock_shutil_which
-    ):
-        mock_build_ext_path.return_value = "/test/path"
-        mock_shutil_which.return_value = "/test/path/mycmd"
+    def test_which_found_not_verified(self, mock_verify_exec, mock_entries, mock_find):
+        mock_entries.return_value = ("/test/path",)
+        mock_find.return_value = "/test/path/mycmd"
 
         py_needs.which.cache_clear()
         result = py_needs.which("mycmd", verify=True)
@@ -473,19 +914,19 @@ class TestWhichFunctionality:
         assert result is None
         mock_verify_exec.assert_called_once_with(Path("/test/path/mycmd"))
 
-    @mock.patch("twat_ez.py_needs.shutil.which", return_value=None)
-    @mock.patch("twat_ez.py_needs.build_extended_path")
-    def test_which_not_found(self, mock_build_ext_path, mock_shutil_which):
-        mock_build_ext_path.return_value = "/test/path"
+    @mock.patch("twat_ez.py_needs._find_executable", return_value=None)
+    @mock.patch("twat_ez.py_needs.extended_path_entries")
+    def test_which_not_found(self, mock_entries, mock_find):
+        mock_entries.return_value = ("/test/path",)
         py_needs.which.cache_clear()
         assert py_needs.which("mycmd") is None
 
     @mock.patch("twat_ez.py_needs.which")
-    @mock.patch("twat_ez.py_needs.which_pip")
-    @mock.patch("twat_ez.py_needs.subprocess.run")
+    @mock.patch("twat_ez.py_needs.resolve_pip")
+    @mock.patch("twat_ez.py_needs.run_streamed")
     def test_which_uv_found_directly(
         self, mock_subprocess_run, mock_wp, mock_w
-    ):  # mock_wp is which_pip, mock_w is which
+    ):  # mock_wp is resolve_pip, mock_w is which
         mock_w.return_value = Path("/path/to/uv")
         py_needs.which_uv.cache_clear()
         assert py_needs.which_uv() == Path("/path/to/uv")
@@ -493,16 +934,15 @@ class TestWhichFunctionality:
         mock_subprocess_run.assert_not_called()
 
     @mock.patch("twat_ez.py_needs.which")
-    @mock.patch("twat_ez.py_needs.which_pip")
-    @mock.patch("twat_ez.py_needs.subprocess.run")
+    @mock.patch("twat_ez.py_needs.resolve_pip")
+    @mock.patch("twat_ez.py_needs.run_streamed")
     def test_which_uv_install_attempt(
         self, mock_subprocess_run, mock_which_pip, mock_which
     ):
         # First call to which("uv") returns None, second (after install) returns path
         mock_which.side_effect = [None, Path("/path/to/uv_after_install")]
-        mock_which_pip.return_value = Path("/path/to/pip")
-        mock_subprocess_run.return_value = mock.MagicMock(
-            returncode=0, stdout="Installed uv", stderr=""
+        mock_which_pip.return_value = py_needs.PipInvocation(
+            (str(Path("/path/to/pip")),), "executable"
         )
 
         py_needs.which_uv.cache_clear()
@@ -512,8 +952,7 @@ class TestWhichFunctionality:
         mock_which_pip.assert_called_once()
         mock_subprocess_run.assert_called_once_with(
             [str(Path("/path/to/pip")), "install", "--user", "uv"],
-            check=True,
-            capture_output=True,
+            timeout=py_needs.UV_INSTALL_TIMEOUT,
         )
         assert mock_which.call_count == 2  # Once before install, once after
 
@@ -523,7 +962,9 @@ class TestWhichFunctionality:
     @mock.patch("ensurepip.bootstrap")
     @mock.patch("twat_ez.py_needs.importlib.util")
     @mock.patch("twat_ez.py_needs.site")
-    @pytest.mark.xfail(reason="Complex mocking interaction with which_pip and lru_cache not fully resolved")
+    @pytest.mark.xfail(
+        reason="Complex mocking interaction with which_pip and lru_cache not fully resolved"
+    )
     def test_which_pip_found_directly(
         self,
         mock_shutil_which_global,
@@ -541,7 +982,7 @@ class TestWhichFunctionality:
         mock_pip_path.__str__.return_value = (
             "/path/to/pip"  # Configure return_value of __str__
         )
-        type(mock_pip_path).__bool__ = lambda _: True # Changed self_val to _
+        type(mock_pip_path).__bool__ = lambda _: True  # Changed self_val to _
 
         mock_internal_which.return_value = mock_pip_path
 
@@ -558,7 +999,9 @@ class TestWhichFunctionality:
     @mock.patch("twat_ez.py_needs.importlib.import_module")
     @mock.patch("twat_ez.py_needs.importlib.util")
     @mock.patch("twat_ez.py_needs.site")
-    @pytest.mark.xfail(reason="Complex mocking interaction with which_pip and lru_cache not fully resolved")
+    @pytest.mark.xfail(
+        reason="Complex mocking interaction with which_pip and lru_cache not fully resolved"
+    )
     def test_which_pip_via_ensurepip(
         self,
         mock_shutil_which_global,
@@ -573,13 +1016,15 @@ class TestWhichFunctionality:
 
         mock_pip_path_after_bootstrap = mock.MagicMock(spec=Path)
         mock_pip_path_after_bootstrap.exists.return_value = True
-        mock_pip_path_after_bootstrap.__fspath__ = (
-            lambda: "/path/to/pip_after_bootstrap"
+        mock_pip_path_after_bootstrap.__fspath__ = lambda: (
+            "/path/to/pip_after_bootstrap"
         )
         mock_pip_path_after_bootstrap.__str__.return_value = (
             "/path/to/pip_after_bootstrap"
         )
-        type(mock_pip_path_after_bootstrap).__bool__ = lambda _: True # Changed self_val to _
+        type(mock_pip_path_after_bootstrap).__bool__ = lambda _: (
+            True
+        )  # Changed self_val to _
 
         mock_internal_which.side_effect = [None, mock_pip_path_after_bootstrap]
         mock_importlib_util.find_spec.return_value = True
@@ -593,7 +1038,284 @@ class TestWhichFunctionality:
         assert mock_internal_which.call_count == 2
 
 
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX executables")
+@mock.patch("twat_ez.py_needs.get_system_specific_paths", return_value=[])
+@mock.patch("twat_ez.py_needs.get_xdg_paths", return_value=[])
+class TestBootstrapUv:
+    @pytest.fixture
+    def archive(self, tmp_path):
+        binary = tmp_path / "uv"
+        binary.write_text("#!/bin/sh\necho uv 0.0.0\n")
+        path = tmp_path / "uv-x86_64-unknown-linux-gnu.tar.gz"
+        with tarfile.open(path, "w:gz") as tar:
+            tar.add(binary, arcname="uv-x86_64-unknown-linux-gnu/uv")
+        binary.unlink()
+        return path, hashlib.sha256(path.read_bytes()).hexdigest()
+
+    def test_installs_verified_binary_and_which_finds_it(
+        self, mock_xdg, mock_system, archive, tmp_path
+    ):
+        path, digest = archive
+        bin_dir = tmp_path / "bin"
+        with mock.patch.dict(os.environ, {"PATH": ""}):
+            assert py_needs.which("uv") is None
+            installed = py_needs.bootstrap_uv(str(path), digest, bin_dir=bin_dir)
+            assert installed == bin_dir / "uv"
+            assert os.access(installed, os.X_OK)
+            assert py_needs.which("uv") == installed
+        mock_xdg.assert_called_once()  # Spliced in, not rebuilt
+
+    def test_checksum_mismatch_writes_nothing(
+        self, mock_xdg, mock_system, archive, tmp_path
+    ):
+        path, _ = archive
+        with pytest.raises(RuntimeError, match="Checksum mismatch"):
+            py_needs.bootstrap_uv(str(path), "0" * 64, bin_dir=tmp_path / "bin")
+        assert not (tmp_path / "bin").exists()
+
+    def test_url_requires_checksum(self, mock_xdg, mock_system):
+        with pytest.raises(RuntimeError, match="without a SHA-256"):
+            py_needs.bootstrap_uv("https://example.invalid/uv.tar.gz")
+
+    @mock.patch("urllib.request.build_opener")
+    def test_url_download_drops_only_its_own_cache_entries(
+        self, mock_build_opener, mock_xdg, mock_system, archive, tmp_path
+    ):
+        path, digest = archive
+        opened = mock_build_opener.return_value.open.return_value.__enter__
+        opened.return_value.read.return_value = path.read_bytes()
+        py_needs.download_url("https://example.invalid/other", mode=0)
+
+        url = "https://example.invalid/uv.tar.gz"
+        installed = py_needs.bootstrap_uv(url, digest, bin_dir=tmp_path / "bin")
+        assert installed == tmp_path / "bin" / "uv"
+        assert py_needs.download_url.cache_info().currsize == 1
+        assert py_needs.download_url_py.cache_info().currsize == 1
+
+    @mock.patch("twat_ez.py_needs.download_url", return_value="<html>")
+    def test_url_download_must_be_bytes(
+        self, mock_download, mock_xdg, mock_system, tmp_path
+    ):
+        with pytest.raises(RuntimeError, match="returned str, not bytes"):
+            py_needs.bootstrap_uv(
+                "https://example.invalid/uv.tar.gz", "0" * 64, bin_dir=tmp_path
+            )
+
+    @mock.patch("twat_ez.py_needs.resolve_pip")
+    @mock.patch("twat_ez.py_needs.which", return_value=None)
+    def test_which_uv_prefers_configured_binary(
+        self, mock_which, mock_resolve_pip, mock_xdg, mock_system, archive, tmp_path
+    ):
+        path, digest = archive
+        env = {
+            "TWAT_EZ_UV_URL": str(path),
+            "TWAT_EZ_UV_SHA256": digest,
+            "XDG_BIN_HOME": str(tmp_path / "xdg-bin"),
+        }
+        with mock.patch.dict(os.environ, env):
+            assert py_needs.which_uv() == tmp_path / "xdg-bin" / "uv"
+        mock_resolve_pip.assert_not_called()
+
+
+class TestToolCache:
+    @pytest.fixture
+    def cache_file(self, tmp_path):
+        path = tmp_path / "tools.json"
+        with mock.patch.dict(os.environ, {"TWAT_EZ_TOOL_CACHE": str(path)}):
+            yield path
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX executables")
+    @mock.patch("twat_ez.py_needs._find_or_install_uv")
+    def test_found_tool_reused_until_binary_changes(
+        self, mock_find, cache_file, tmp_path
+    ):
+        uv = tmp_path / "uv"
+        uv.write_text("#!/bin/sh\necho 'uv 0.4.1 (abc 2024-01-01)'\n")
+        uv.chmod(0o755)
+        mock_find.return_value = uv
+        assert py_needs.which_uv() == uv
+        assert py_needs.cached_tool_version("uv") == "0.4.1"
+
+        py_needs.which_uv.cache_clear()  # As in a new process
+        assert py_needs.which_uv() == uv
+        assert mock_find.call_count == 1
+
+        os.utime(uv, ns=(0, 1))
+        py_needs.which_uv.cache_clear()
+        assert py_needs.which_uv() == uv
+        assert mock_find.call_count == 2
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+    @mock.patch("twat_ez.py_needs._find_or_install_uv")
+    def test_hit_rejected_once_binary_becomes_unsafe(
+        self, mock_find, cache_file, tmp_path
+    ):
+        uv = tmp_path / "uv"
+        uv.write_text("#!/bin/sh\necho 'uv 0.4.1 (abc 2024-01-01)'\n")
+        uv.chmod(0o755)
+        mock_find.return_value = uv
+        assert py_needs.which_uv() == uv
+
+        uv.chmod(0o777)  # Leaves st_ino and st_mtime_ns unchanged
+        mock_find.return_value = None
+        py_needs.which_uv.cache_clear()
+        assert py_needs.which_uv() is None
+        assert mock_find.call_count == 2
+
+    @mock.patch("twat_ez.py_needs._find_or_install_uv", return_value=None)
+    def test_missing_tool_backs_off(self, mock_find, cache_file):
+        assert py_needs.which_uv() is None
+        py_needs.which_uv.cache_clear()
+        assert py_needs.which_uv() is None
+        assert mock_find.call_count == 1
+
+        entry = json.loads(cache_file.read_text())["tools"]["uv"]
+        later = entry["retry_after"] + 1
+        with mock.patch("twat_ez.py_needs.time.time", return_value=later):
+            py_needs.which_uv.cache_clear()
+            assert py_needs.which_uv() is None
+        assert mock_find.call_count == 2
+        retried = json.loads(cache_file.read_text())["tools"]["uv"]
+        assert retried["failures"] == 2
+        assert retried["retry_after"] - later == 2 * py_needs.TOOL_MISS_BACKOFF
+
+    @mock.patch("twat_ez.py_needs._find_or_install_uv", return_value=None)
+    def test_path_change_invalidates(self, mock_find, cache_file):
+        py_needs.which_uv()
+        py_needs.which_uv.cache_clear()
+        with mock.patch.dict(os.environ, {"PATH": "/somewhere/else"}):
+            py_needs.which_uv()
+        assert mock_find.call_count == 2
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX executables")
+@mock.patch("twat_ez.py_needs.get_system_specific_paths", return_value=[])
+@mock.patch("twat_ez.py_needs.get_xdg_paths", return_value=[])
+class TestVersionProbing:
+    @pytest.fixture
+    def gits(self, tmp_path):
+        dirs = []
+        for name, version in (("old", "2.34.1"), ("new", "2.43.0")):
+            directory = tmp_path / name
+            directory.mkdir()
+            git = directory / "git"
+            git.write_text(f"#!/bin/sh\necho 'git version {version}'\n")
+            git.chmod(0o755)
+            dirs.append(directory)
+        with mock.patch.dict(os.environ, {"PATH": os.pathsep.join(map(str, dirs))}):
+            yield dirs
+
+    def test_min_version_skips_older_shadowing_binary(
+        self, mock_xdg, mock_system, gits
+    ):
+        assert py_needs.which("git") == gits[0] / "git"
+        assert py_needs.which("git", min_version="2.40") == gits[1] / "git"
+        assert py_needs.which("git", min_version=(3,)) is None
+
+    def test_min_version_sees_new_tool_and_honours_mode(
+        self, mock_xdg, mock_system, gits
+    ):
+        with mock.patch("twat_ez.py_needs.time.monotonic", return_value=100.0):
+            assert py_needs.which("zzfoo", min_version="1.0") is None
+        tool = gits[1] / "zzfoo"
+        tool.write_text("#!/bin/sh\necho 'zzfoo 1.2'\n")
+        tool.chmod(0o755)
+        os.utime(gits[1], ns=(0, 1))  # Guarantee an mtime change
+        with mock.patch("twat_ez.py_needs.time.monotonic", return_value=100.5):
+            # The miss is cached until the index is next checked
+            assert py_needs.which("zzfoo", min_version="1.0") is None
+        later = 100.0 + py_needs.EXECUTABLE_INDEX_TTL
+        with mock.patch("twat_ez.py_needs.time.monotonic", return_value=later):
+            assert py_needs.which("zzfoo", min_version="1.0") == tool
+        with mock.patch("twat_ez.py_needs.os.access", return_value=False) as access:
+            assert py_needs.which("zzfoo", mode=os.R_OK, min_version="1.0") is None
+        access.assert_called_with(tool, os.R_OK)
+
+    def test_probe_runs_once_per_binary(self, mock_xdg, mock_system, gits):
+        with mock.patch(
+            "twat_ez.py_needs._run_version_probe", return_value="2.43.0"
+        ) as probe:
+            py_needs.tool_version(gits[1] / "git")
+            py_needs.tool_version(gits[1] / "git")
+            assert probe.call_count == 1
+            os.utime(gits[1] / "git", ns=(0, 1))  # "Upgraded"
+            py_needs.tool_version(gits[1] / "git")
+            assert probe.call_count == 2
+
+    def test_versions_persisted_across_processes(
+        self, mock_xdg, mock_system, gits, tmp_path
+    ):
+        cache = tmp_path / "tools.json"
+        with mock.patch.dict(os.environ, {"TWAT_EZ_TOOL_CACHE": str(cache)}):
+            assert py_needs.tool_version(gits[0] / "git") == "2.34.1"
+            py_needs._version_cache.clear()  # As in a new process
+            with mock.patch("twat_ez.py_needs._run_version_probe") as probe:
+                assert py_needs.tool_version(gits[0] / "git") == "2.34.1"
+            probe.assert_not_called()
+
+    def test_custom_probe_pattern(self, mock_xdg, mock_system, tmp_path):
+        tool = tmp_path / "mytool"
+        tool.write_text('#!/bin/sh\necho "build 7 release $1"\n')
+        tool.chmod(0o755)
+        py_needs.register_version_probe("mytool", r"release (\S+)", args=("1.2.3",))
+        try:
+            assert py_needs.tool_version(tool) == "1.2.3"
+        finally:
+            del py_needs._version_probes["mytool"]
+
+    def test_version_satisfies(self, mock_xdg, mock_system):
+        assert py_needs.version_satisfies("0.4.0", "0.4")
+        assert py_needs.version_satisfies("0.10.1", (0, 4))
+        assert not py_needs.version_satisfies("0.3.9", "0.4")
+        assert not py_needs.version_satisfies(None, "0.1")
+
+
+class TestResolvePip:
+    @mock.patch("twat_ez.py_needs.which")
+    @mock.patch("twat_ez.py_needs.module_available", return_value=True)
+    def test_prefers_python_m_pip(self, mock_module_available, mock_which):
+        pip = py_needs.resolve_pip()
+        assert pip.command("install", "x") == [
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            "x",
+        ]
+        mock_which.assert_not_called()
+
+    @mock.patch("ensurepip.bootstrap")
+    @mock.patch("twat_ez.py_needs.which")
+    @mock.patch("twat_ez.py_needs.module_available", return_value=False)
+    def test_falls_back_to_uv_pip_without_bootstrap(
+        self, mock_module_available, mock_which, mock_bootstrap
+    ):
+        mock_which.side_effect = lambda cmd: Path("/bin/uv") if cmd == "uv" else None
+        assert py_needs.resolve_pip() == py_needs.PipInvocation(
+            (str(Path("/bin/uv")), "pip"), "uv"
+        )
+        mock_bootstrap.assert_not_called()
+
+    @mock.patch("ensurepip.bootstrap")
+    @mock.patch("twat_ez.py_needs.which", return_value=None)
+    @mock.patch("twat_ez.py_needs.module_available", return_value=False)
+    def test_bootstrap_only_when_allowed(
+        self, mock_module_available, mock_which, mock_bootstrap
+    ):
+        assert py_needs.resolve_pip() is None
+        mock_bootstrap.assert_not_called()
+        mock_module_available.side_effect = [False, True]
+        pip = py_needs.resolve_pip(allow_bootstrap=True)
+        assert pip.kind == "module"
+        mock_bootstrap.assert_called_once()
+
+
 class TestNeedsDecorator:
+    @pytest.fixture(autouse=True)
+    def cache_home(self, tmp_path):
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(tmp_path)}):
+            yield tmp_path
+
     @mock.patch("twat_ez.py_needs.importlib.util.find_spec")
     def test_needs_deps_present(self, mock_find_spec):
         mock_find_spec.return_value = True  # All dependencies found
@@ -622,7 +1344,9 @@ class TestNeedsDecorator:
         assert my_func() == "done"
         mock_find_spec.assert_any_call("dep1")
         mock_find_spec.assert_any_call("dep2")
-        mock_install_uv.assert_called_once_with(["dep1"], True) # target is positional in _install_with_uv
+        mock_install_uv.assert_called_once_with(
+            ["dep1"], True
+        )  # target is positional in _install_with_uv
         mock_import_modules.assert_called_once_with(["dep1"])
 
     @mock.patch(
@@ -642,13 +1366,590 @@ class TestNeedsDecorator:
             RuntimeError, match="UV installation failed: Install failed"
         ):
             my_func()
-        mock_install_uv.assert_called_once_with(["dep1"], False) # target is positional in _install_with_uv
+        mock_install_uv.assert_called_once_with(
+            ["dep1"], False
+        )  # target is positional in _install_with_uv
+
+    @mock.patch("twat_ez.py_needs.importlib.util.find_spec")
+    @mock.patch("twat_ez.py_needs._install_with_uv")
+    @mock.patch("twat_ez.py_needs._import_modules")
+    def test_waiting_process_rechecks_instead_of_installing(
+        self, mock_import_modules, mock_install_uv, mock_find_spec
+    ):
+        installed = threading.Event()
+        mock_find_spec.side_effect = lambda mod: installed.is_set()
+        holding = threading.Event()
+
+        def other_installer():
+            with py_needs.install_lock(py_needs._install_lock_path(target=False)):
+                holding.set()
+                time.sleep(0.3)
+                installed.set()
+
+        thread = threading.Thread(target=other_installer)
+        thread.start()
+        holding.wait()
+
+        @py_needs.needs(["dep1"])
+        def my_func():
+            return "done"
+
+        assert my_func() == "done"
+        thread.join()
+        mock_install_uv.assert_not_called()
+        mock_import_modules.assert_called_once_with(["dep1"])
+
+    @mock.patch("twat_ez.py_needs.importlib.util.find_spec", return_value=None)
+    @mock.patch("twat_ez.py_needs._install_with_uv_async")
+    @mock.patch("twat_ez.py_needs._install_with_uv")
+    @mock.patch("twat_ez.py_needs._import_modules")
+    def test_unusable_cache_dir_installs_without_lock(
+        self,
+        mock_import_modules,
+        mock_install,
+        mock_install_async,
+        mock_find_spec,
+        cache_home,
+        caplog,
+    ):
+        not_a_dir = cache_home / "file"
+        not_a_dir.write_text("")
+
+        @py_needs.needs(["dep1"])
+        def sync_func():
+            return "sync"
+
+        @py_needs.needs(["dep2"])
+        async def async_func():
+            return "async"
+
+        with mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(not_a_dir)}):
+            assert sync_func() == "sync"
+            assert asyncio.run(async_func()) == "async"
+        mock_install.assert_called_once_with(["dep1"], False)
+        mock_install_async.assert_awaited_once_with(["dep2"], False)
+        assert caplog.text.count("Installing without the install lock") == 2
+
+    @mock.patch("twat_ez.py_needs.importlib.util.find_spec", return_value=None)
+    @mock.patch("twat_ez.py_needs._import_modules")
+    @mock.patch("twat_ez.py_needs._uv_install_command")
+    def test_async_install_does_not_block_event_loop(
+        self, mock_command, mock_import_modules, mock_find_spec
+    ):
+        mock_command.return_value = [
+            sys.executable,
+            "-c",
+            "import time; time.sleep(0.3); print('Installed 1 package')",
+        ]
+
+        @py_needs.needs(["dep1"])
+        async def my_func():
+            return "done"
+
+        async def scenario():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticking = asyncio.create_task(ticker())
+            result = await my_func()
+            ticking.cancel()
+            return result, ticks
+
+        result, ticks = asyncio.run(scenario())
+        assert result == "done"
+        assert ticks > 5
+        mock_import_modules.assert_called_once_with(["dep1"])
+
+    @mock.patch("twat_ez.py_needs.importlib.util.find_spec", return_value=None)
+    @mock.patch("twat_ez.py_needs._uv_install_command")
+    def test_async_install_failure(self, mock_command, mock_find_spec):
+        mock_command.return_value = [
+            sys.executable,
+            "-c",
+            "import sys; sys.stderr.write('boom\\n'); sys.exit(2)",
+        ]
+
+        @py_needs.needs(["dep1"])
+        async def my_func():
+            return "done"
+
+        with pytest.raises(RuntimeError, match="UV installation failed: boom"):
+            asyncio.run(my_func())
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX process check")
+    @mock.patch("twat_ez.py_needs.importlib.util.find_spec", return_value=None)
+    @mock.patch("twat_ez.py_needs._install_lock_path")
+    @mock.patch("twat_ez.py_needs._uv_install_command")
+    def test_cancelled_install_kills_uv_before_unlocking(
+        self, mock_command, mock_lock_path, mock_find_spec, tmp_path
+    ):
+        lock = tmp_path / "install.lock"
+        pid_file = tmp_path / "pid"
+        mock_lock_path.return_value = lock
+        mock_command.return_value = [
+            sys.executable,
+            "-c",
+            f"import os, time; open({str(pid_file)!r}, 'w').write(str(os.getpid()));"
+            " time.sleep(30)",
+        ]
+
+        @py_needs.needs(["dep1"])
+        async def my_func():
+            return "done"
+
+        async def scenario():
+            task = asyncio.create_task(my_func())
+            while not pid_file.exists() or not pid_file.read_text():
+                await asyncio.sleep(0.01)
+            assert lock.exists()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+        assert not lock.exists()
+        with pytest.raises(ProcessLookupError):
+            os.kill(int(pid_file.read_text()), 0)
+
+
+class TestInstallLock:
+    def test_stale_lock_of_dead_process_is_recovered(self, tmp_path):
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        lock = tmp_path / "install.lock"
+        lock.write_text(
+            json.dumps({"pid": dead.pid, "host": platform.node(), "time": 0})
+        )
+        with py_needs.install_lock(lock, timeout=1) as waited:
+            assert json.loads(lock.read_text())["pid"] == os.getpid()
+            assert waited < 1
+        assert not lock.exists()
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="flock()")
+    def test_lock_of_live_holder_is_never_removed(self, tmp_path):
+        lock = tmp_path / "install.lock"
+        with py_needs.install_lock(lock):
+            os.utime(lock, (0, 0))  # Older than any stale_after
+            py_needs._remove_stale_lock(lock, stale_after=1)
+            assert lock.exists()
+
+    def test_waiters_breaking_a_stale_lock_never_overlap(self, tmp_path):
+        lock = tmp_path / "install.lock"
+        lock.write_text(json.dumps({"pid": 0, "host": platform.node(), "time": 0}))
+        inside, overlaps = [], []
+
+        def waiter():
+            with py_needs.install_lock(lock, timeout=10):
+                inside.append(1)
+                if len(inside) > 1:
+                    overlaps.append(1)
+                time.sleep(0.02)
+                inside.pop()
+
+        threads = [threading.Thread(target=waiter) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not overlaps
+        assert not lock.exists()
+
+    def test_timeout_reports_metric(self, tmp_path):
+        lock = tmp_path / "install.lock"
+        lock.write_text(json.dumps({"pid": os.getpid(), "host": platform.node()}))
+        with py_needs.TimingRecorder() as recorder:
+            with pytest.raises(TimeoutError):
+                with py_needs.install_lock(lock, timeout=0.05):
+                    pass
+        (event,) = [e for e in recorder.events if e.name == "install_lock_wait"]
+        assert event.outcome == "timeout"
+        assert event.duration >= 0.05
+        assert lock.exists()  # Not ours to remove
+
+
+class TestModuleAvailability:
+    @mock.patch("twat_ez.py_needs.importlib.util.find_spec", return_value=True)
+    def test_find_spec_cached_per_fingerprint(self, mock_find_spec):
+        assert py_needs.module_available("not_imported_mod")
+        assert py_needs.module_available("not_imported_mod")
+        mock_find_spec.assert_called_once_with("not_imported_mod")
+
+    @mock.patch("twat_ez.py_needs.importlib.util.find_spec", return_value=None)
+    @mock.patch("twat_ez.py_needs._sys_path_fingerprint")
+    def test_fingerprint_change_invalidates(self, mock_fingerprint, mock_find_spec):
+        mock_fingerprint.return_value = "a"
+        assert not py_needs.module_available("not_imported_mod")
+        mock_fingerprint.return_value = "b"
+        assert not py_needs.module_available("not_imported_mod")
+        assert mock_find_spec.call_count == 2
+
+    @mock.patch("twat_ez.py_needs.importlib.util.find_spec")
+    def test_imported_modules_skip_find_spec(self, mock_find_spec):
+        assert py_needs.modules_available(["os", "sys"]) == {"os": True, "sys": True}
+        mock_find_spec.assert_not_called()
+
+    def test_persistence_across_runs(self, tmp_path):
+        cache_file = tmp_path / "modules.json"
+        with (
+            mock.patch.dict(os.environ, {py_needs.MODULE_CACHE_ENV: str(cache_file)}),
+            mock.patch(
+                "twat_ez.py_needs.importlib.util.find_spec", return_value=True
+            ) as mock_find_spec,
+        ):
+            assert py_needs.module_available("not_imported_mod")
+            assert cache_file.exists()
+            # Simulate a fresh process: in-memory state is gone, disk remains
+            py_needs._module_cache.clear()
+            py_needs._module_cache_fingerprint = None
+            py_needs._module_cache_loaded = False
+            assert py_needs.module_available("not_imported_mod")
+            mock_find_spec.assert_called_once()
+
+    @mock.patch("twat_ez.py_needs.run_streamed")
+    @mock.patch("twat_ez.py_needs.which_uv", return_value=Path("/path/to/uv"))
+    def test_install_invalidates_cache(self, mock_which_uv, mock_run):
+        py_needs._module_cache["dep1"] = False
+        py_needs._install_with_uv(["dep1"], False)
+        assert "dep1" not in py_needs._module_cache
+
+
+class TestStreamedSubprocess:
+    def test_lines_are_streamed_and_tails_kept(self):
+        lines = []
+        script = "import sys\nfor i in range(3): print(i)\nsys.stderr.write('warn\\n')"
+        result = py_needs.run_streamed(
+            [sys.executable, "-c", script],
+            on_line=lambda stream, line: lines.append((stream, line)),
+        )
+        assert [line for line in lines if line[0] == "stdout"] == [
+            ("stdout", "0"),
+            ("stdout", "1"),
+            ("stdout", "2"),
+        ]
+        assert ("stderr", "warn") in lines
+        assert result.stdout == "0\n1\n2"
+        assert result.stderr == "warn"
+
+    @mock.patch("twat_ez.py_needs.STREAM_TAIL_LINES", 2)
+    def test_failure_carries_bounded_stderr_tail(self):
+        script = (
+            "import sys\nfor i in range(5): sys.stderr.write(f'e{i}\\n')\nsys.exit(3)"
+        )
+        with pytest.raises(subprocess.CalledProcessError) as excinfo:
+            py_needs.run_streamed([sys.executable, "-c", script])
+        assert excinfo.value.returncode == 3
+        assert excinfo.value.stderr == "e3\ne4"
+
+    def test_timeout_kills_process(self):
+        start = time.monotonic()
+        with pytest.raises(subprocess.TimeoutExpired):
+            py_needs.run_streamed(
+                [sys.executable, "-c", "import time; time.sleep(10)"], timeout=0.2
+            )
+        assert time.monotonic() - start < 5
+
+    def test_uv_report_parsing_and_events(self):
+        report = py_needs.UvInstallReport()
+        for line in [
+            "Resolved 3 packages in 120ms",
+            "Prepared 2 packages in 1.50s",
+            "Uninstalled 1 package in 2ms",
+            "Installed 2 packages in 1m 2s",
+            " - six==1.15.0",
+            " + fire==0.7.0",
+            " + six==1.16.0",
+        ]:
+            report.feed(line)
+        assert report.phases == {
+            "resolved": (3, 0.12),
+            "prepared": (2, 1.5),
+            "uninstalled": (1, 0.002),
+            "installed": (2, 62.0),
+        }
+        assert report.added == ["fire==0.7.0", "six==1.16.0"]
+        assert report.removed == ["six==1.15.0"]
+        with py_needs.TimingRecorder() as recorder:
+            report.emit()
+        installed = next(e for e in recorder.events if e.name == "uv_installed")
+        assert installed.target == "fire==0.7.0 six==1.16.0"
+        assert installed.duration == pytest.approx(62.0, abs=0.1)
+
+
+class TestToolRunner:
+    def test_run_captures_output_and_merges_env(self):
+        runner = py_needs.ToolRunner(env={"TWAT_EZ_RUNNER_TEST": "yes"})
+        script = "import os, sys; print(os.environ['TWAT_EZ_RUNNER_TEST']); sys.exit(2)"
+        with py_needs.TimingRecorder() as recorder:
+            result = runner.run([sys.executable, "-c", script])
+        assert result.returncode == 2
+        assert not result.ok
+        assert result.stdout.strip() == "yes"
+        assert result.seconds > 0
+        assert [(e.name, e.outcome) for e in recorder.events] == [("tool_run", "error")]
+        assert "TWAT_EZ_RUNNER_TEST" not in os.environ
+
+    def test_tool_resolved_once_per_runner(self):
+        runner = py_needs.ToolRunner()
+        with mock.patch(
+            "twat_ez.py_needs.which", return_value=Path(sys.executable)
+        ) as mock_which:
+            first = runner.run(["python", "-c", "print(1)"])
+            second = runner.run(["python", "-c", "print(2)"])
+        mock_which.assert_called_once_with("python")
+        assert first.args[0] == second.args[0] == sys.executable
+        assert (first.stdout, second.stdout) == ("1\n", "2\n")
+
+    def test_missing_tool_raises(self):
+        with mock.patch("twat_ez.py_needs.which", return_value=None):
+            with pytest.raises(FileNotFoundError):
+                py_needs.ToolRunner().run(["twat-ez-no-such-tool"])
+
+    def test_timeout_and_check(self):
+        runner = py_needs.ToolRunner(timeout=0.2)
+        result = runner.run([sys.executable, "-c", "import time; time.sleep(10)"])
+        assert result.returncode is None
+        assert result.seconds < 5
+        with pytest.raises(subprocess.CalledProcessError) as excinfo:
+            runner.run([sys.executable, "-c", "raise SystemExit(4)"], check=True)
+        assert excinfo.value.returncode == 4
+
+    def test_run_many_is_bounded_and_ordered(self):
+        script = "import sys, time; time.sleep(0.2); print(sys.argv[1])"
+        cmds = [[sys.executable, "-c", script, str(i)] for i in range(4)]
+        with py_needs.ToolRunner(max_workers=2) as runner:
+            results = runner.run_many(cmds)
+            assert runner._pool._max_workers == 2
+        assert [r.stdout.strip() for r in results] == ["0", "1", "2", "3"]
+        assert all(r.ok for r in results)
+        assert runner._pool is None
+
+
+class TestInstrumentation:
+    @mock.patch("twat_ez.py_needs._find_executable", return_value=None)
+    @mock.patch("twat_ez.py_needs.extended_path_entries", return_value=("/test/path",))
+    def test_recorder_captures_cache_hits(self, mock_entries, mock_find):
+        with py_needs.TimingRecorder() as recorder:
+            py_needs.which("mycmd")
+            py_needs.which("mycmd")
+        events = [e for e in recorder.events if e.name == "which"]
+        assert [e.cache for e in events] == ["miss", "hit"]
+        assert all(e.target == "mycmd" and e.outcome == "none" for e in events)
+        assert recorder.summary()["which"]["count"] == 2
+        assert not py_needs._timing_hooks
+
+    def test_errors_are_reported_and_reraised(self):
+        recorder = py_needs.TimingRecorder()
+        py_needs.add_timing_hook(recorder)
+        try:
+            with (
+                mock.patch("twat_ez.py_needs.which_uv", return_value=None),
+                pytest.raises(RuntimeError),
+            ):
+                py_needs._install_with_uv(["dep1"], False)
+        finally:
+            py_needs.remove_timing_hook(recorder)
+        assert recorder.events[-1].name == "_install_with_uv"
+        assert recorder.events[-1].outcome == "error:RuntimeError"
+
+    def test_chrome_trace_export(self):
+        with py_needs.TimingRecorder() as recorder:
+            py_needs.bin_or_str(b"")  # Not instrumented
+            py_needs._import_modules(["os"])
+        trace = json.loads(recorder.to_chrome_trace())
+        assert [e["name"] for e in trace["traceEvents"]] == ["_import_modules"]
+        assert trace["traceEvents"][0]["ph"] == "X"
+        assert json.loads(recorder.to_json())[0]["name"] == "_import_modules"
+
+
+class TestCacheRegistry:
+    @pytest.fixture(autouse=True)
+    def restore_registry(self):
+        saved = dict(py_needs._cache_registry)
+        yield
+        py_needs._cache_registry.clear()
+        py_needs._cache_registry.update(saved)
+
+    def test_builtin_caches_are_registered(self):
+        names = {stats.name for stats in py_needs.cache_stats()}
+        assert {
+            "which",
+            "which_uv",
+            "which_pip",
+            "build_extended_path",
+            "download_url",
+            "download_url_py",
+            "download_url_qt",
+            "executable_index",
+            "modules",
+        } <= names
+
+    def test_lookup_cache_stats_count_hits_and_bytes(self):
+        with (
+            mock.patch(
+                "twat_ez.py_needs.download_url_qt", side_effect=RuntimeError("no Qt")
+            ),
+            mock.patch("twat_ez.py_needs.download_url_py", return_value=b"x" * 10_000),
+        ):
+            py_needs.download_url("https://example.com/a", mode=0)
+            py_needs.download_url("https://example.com/a", mode=0)
+        (stats,) = py_needs.cache_stats(["download_url"])
+        assert (stats.entries, stats.hits, stats.misses) == (1, 1, 1)
+        assert stats.hit_rate == 0.5
+        assert stats.bytes > 10_000
+
+    def test_clear_warm_and_export(self):
+        calls = []
+        store: dict[str, int] = {}
+        py_needs.register_cache(
+            "custom",
+            stats=lambda: py_needs.CacheStats("custom", len(store), 0),
+            clear=store.clear,
+            warm=lambda: store.update(answer=42),
+        )
+        py_needs.register_cache(
+            "broken",
+            stats=lambda: py_needs.CacheStats("broken", 0, 0),
+            clear=lambda: calls.append("clear"),
+            warm=lambda: 1 / 0,
+        )
+        timings = py_needs.warm_caches(["custom", "broken"])
+        assert list(timings) == ["custom"]
+        assert py_needs.cache_stats(["custom"])[0].entries == 1
+
+        assert py_needs.clear_caches(["custom", "broken"]) == ["custom", "broken"]
+        assert store == {}
+        assert calls == ["clear"]
+
+        exported = json.loads(py_needs.export_caches(["custom"]))
+        assert exported["caches"] == [
+            {
+                "name": "custom",
+                "entries": 0,
+                "bytes": 0,
+                "hits": None,
+                "misses": None,
+                "maxsize": None,
+                "hit_rate": None,
+            }
+        ]
+        with pytest.raises(KeyError):
+            py_needs.clear_caches(["missing"])
+        with pytest.raises(ValueError):
+            py_needs.register_cache("incomplete", clear=store.clear)
+
+
+class TestCli:
+    def test_which(self, capsys):
+        with mock.patch(
+            "twat_ez.py_needs.which", return_value=Path("/usr/bin/git")
+        ) as mock_which:
+            assert cli.main(["which", "git", "--min-version", "2.40"]) == 0
+        mock_which.assert_called_once_with("git", verify=True, min_version="2.40")
+        assert capsys.readouterr().out == "/usr/bin/git\n"
+
+        with mock.patch("twat_ez.py_needs.which", return_value=None):
+            assert cli.main(["which", "nope"]) == 1
+        assert "nope: not found" in capsys.readouterr().err
+
+    def test_which_all_marks_rejected_matches(self, capsys):
+        matches = [
+            py_needs.WhichMatch(Path("/tmp/x/git"), False, "world-writable file"),
+            py_needs.WhichMatch(Path("/usr/bin/git"), True, "OK"),
+        ]
+        with mock.patch("twat_ez.py_needs.which_all", return_value=matches):
+            assert cli.main(["which-all", "git"]) == 0
+        assert capsys.readouterr().out.splitlines() == [
+            "/tmp/x/git  # rejected: world-writable file",
+            "/usr/bin/git",
+        ]
+
+    def test_download_to_file(self, tmp_path):
+        output = tmp_path / "page.html"
+        with mock.patch("twat_ez.py_needs.download_url", return_value=b"<html>"):
+            assert cli.main(["download", "https://example.com", "-o", str(output)]) == 0
+        assert output.read_bytes() == b"<html>"
+
+    def test_download_failure_is_reported(self, capsys, tmp_path):
+        output = tmp_path / "x.bin"
+        with mock.patch(
+            "twat_ez.py_needs.download_url",
+            side_effect=RuntimeError("Download failed: connection refused"),
+        ):
+            assert (
+                cli.main(["download", "http://127.0.0.1:9/x", "-o", str(output)]) == 1
+            )
+        assert capsys.readouterr().err == "Download failed: connection refused\n"
+        assert not output.exists()
+
+    def test_install_reports_failure(self, capsys):
+        with mock.patch(
+            "twat_ez.py_needs._ensure_modules",
+            side_effect=RuntimeError("uv exploded"),
+        ) as mock_ensure:
+            assert cli.main(["install", "fire", "--target"]) == 1
+        mock_ensure.assert_called_once_with(["fire"], True)
+        assert "uv exploded" in capsys.readouterr().err
+
+    def test_cache_commands(self, capsys, tmp_path):
+        assert cli.main(["cache", "info", "which", "host"]) == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split()[0] for line in lines] == ["cache", "which", "host"]
+
+        py_needs._module_cache["twat_ez_cli_probe"] = True
+        assert cli.main(["cache", "clear", "modules"]) == 0
+        assert "twat_ez_cli_probe" not in py_needs._module_cache
+        assert capsys.readouterr().out == "Cleared 1 caches: modules\n"
+
+        output = tmp_path / "caches.json"
+        assert cli.main(["cache", "export", "which", "-o", str(output)]) == 0
+        assert [c["name"] for c in json.loads(output.read_text())["caches"]] == [
+            "which"
+        ]
 
+        assert cli.main(["cache", "info", "no-such-cache"]) == 2
+        assert "Unknown caches: no-such-cache" in capsys.readouterr().err
+
+    def test_help_does_not_import_py_needs(self):
+        script = (
+            "import sys, contextlib, io\n"
+            "from twat_ez import cli\n"
+            "with contextlib.suppress(SystemExit), contextlib.redirect_stdout(io.StringIO()):\n"
+            "    cli.main(['--help'])\n"
+            "print('twat_ez.py_needs' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "False"
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX permissions")
+    def test_debug_logging_only_with_verbose_and_on_stderr(self, tmp_path):
+        tool = tmp_path / "zztool"
+        tool.write_text("#!/bin/sh\n")
+        tool.chmod(0o777)  # Rejected, with a debug message
+        env = {**os.environ, "PATH": str(tmp_path), "CLIFIND_DEBUG": "1"}
+
+        def run(*args):
+            return subprocess.run(  # noqa: S603
+                [sys.executable, "-m", "twat_ez", *args, "which", "zztool"],
+                capture_output=True,
+                text=True,
+                env=env,
+                check=False,
+            )
 
-# It's good practice to also test the main function if it has significant logic,
-# but here it's mostly about the @needs decorator and `fire` integration,
-# which is harder to unit test without more complex mocking of `fire`.
-# For now, we'll assume `fire` works as expected.
+        quiet = run()
+        assert quiet.returncode == 1
+        assert quiet.stdout == ""
+        assert "DEBUG" not in quiet.stderr
+        verbose = run("-v")
+        assert verbose.stdout == ""
+        assert "DEBUG: Rejected" in verbose.stderr
 
 
 # Test bin_or_str
@@ -663,6 +1964,51 @@ def test_bin_or_str():
         py_needs.bin_or_str(b"\xff\xfe", mode=2)  # Forces decode
 
 
+class TestHostDetection:
+    @pytest.fixture(autouse=True)
+    def restore_detectors(self):
+        saved = list(py_needs._host_detectors)
+        yield
+        py_needs._host_detectors[:] = saved
+        py_needs.clear_host_cache()
+
+    def test_registered_detector_sets_install_target(self):
+        detector = mock.Mock(return_value=Path("/embedded/site-packages"))
+        py_needs.register_host_detector("embedded", detector, priority=10)
+        assert py_needs.detect_host() == ("embedded", Path("/embedded/site-packages"))
+        assert py_needs.get_install_target() == Path("/embedded/site-packages")
+        assert py_needs.UV_INSTALL_TARGET == Path("/embedded/site-packages")
+        detector.assert_called_once()
+
+    @mock.patch.dict(os.environ, {"UV_INSTALL_TARGET": "/custom/target"})
+    def test_env_var_overrides_host(self):
+        py_needs.register_host_detector(
+            "embedded", lambda: Path("/embedded"), priority=10
+        )
+        assert py_needs.get_install_target() == Path("/custom/target")
+
+    def test_failing_detector_is_skipped(self):
+        def broken():
+            raise RuntimeError
+
+        py_needs.register_host_detector("broken", broken, priority=20)
+        py_needs.register_host_detector("ok", lambda: Path("/ok"), priority=10)
+        assert py_needs.detect_host() == ("ok", Path("/ok"))
+        assert py_needs.unregister_host_detector("ok")
+        assert not py_needs.unregister_host_detector("ok")
+
+    @mock.patch("twat_ez.py_needs.sys.path", new_callable=list)
+    def test_blender_detected_from_loaded_bpy(self, mock_sys_path):
+        bpy = mock.MagicMock()
+        bpy.utils.user_resource.return_value = "/blender/scripts/modules"
+        mock_sys_path.append("/blender/scripts/modules")
+        with mock.patch.dict(sys.modules, {"bpy": bpy, "fontlab": None}):
+            assert py_needs.detect_host() == (
+                "blender",
+                Path("/blender/scripts/modules"),
+            )
+
+
 # Test UV_INSTALL_TARGET default behavior
 @mock.patch(
     "twat_ez.py_needs.site.getusersitepackages", return_value="/mocked/user/site"
@@ -756,18 +2102,18 @@ def test_public_api_imports():
 def test_cache_clearing_manual_example():
     with (
         mock.patch(
-            "twat_ez.py_needs.shutil.which", return_value="/bin/true"
-        ) as mock_shutil_which,
+            "twat_ez.py_needs._find_executable", return_value="/bin/true"
+        ) as mock_find,
         mock.patch("twat_ez.py_needs.verify_executable", return_value=(True, "OK")),
         mock.patch("twat_ez.py_needs.Path.exists", return_value=True),
     ):
         py_needs.which.cache_clear()  # Ensure cache is clear before first call
         py_needs.which("true")
-        mock_shutil_which.assert_called_once()  # Called
+        mock_find.assert_called_once()  # Called
 
         py_needs.which("true")
-        mock_shutil_which.assert_called_once()  # Still once due to cache
+        mock_find.assert_called_once()  # Still once due to cache
 
         py_needs.which.cache_clear()  # Clear cache
         py_needs.which("true")
-        assert mock_shutil_which.call_count == 2  # Called again
+        assert mock_find.call_count == 2  # Called again